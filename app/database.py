@@ -1,9 +1,12 @@
 import pymongo.mongo_client
+from motor.motor_asyncio import AsyncIOMotorClient
 
 import settings
 
 
 class Database:
+    client_class = pymongo.mongo_client.MongoClient
+
     def __init__(self, host, port, username: str, password: str, database: str):
         self.__username = username
         self.__password = password
@@ -15,16 +18,21 @@ class Database:
         self._document = None
         self._document_specification = None
         self._permissions = None
+        self._document_counts = None
+        self._sequences = None
+        self._count_writers = None
+        self._blobs = None
+        self._blob_links = None
 
     def __init_db(self):
-        self._client = pymongo.mongo_client.MongoClient(
+        self._client = self.client_class(
             host=self._host,
             port=int(self._port),
             username=self.__username,
             password=self.__password,
             authSource=self.__database,
         )
-        self._db = pymongo.mongo_client.database.Database = self._client[
+        self._db: pymongo.mongo_client.database.Database = self._client[
             self.__database
         ]
         self._document: pymongo.mongo_client.database.Collection = self._db[
@@ -36,6 +44,21 @@ class Database:
         self._permissions: pymongo.mongo_client.database.Collection = self._db[
             "permissions"
         ]
+        self._document_counts: pymongo.mongo_client.database.Collection = (
+            self._db["document_counts"]
+        )
+        self._sequences: pymongo.mongo_client.database.Collection = self._db[
+            "sequences"
+        ]
+        self._count_writers: pymongo.mongo_client.database.Collection = (
+            self._db["count_writers"]
+        )
+        self._blobs: pymongo.mongo_client.database.Collection = self._db[
+            "blobs"
+        ]
+        self._blob_links: pymongo.mongo_client.database.Collection = self._db[
+            "blob_links"
+        ]
         del self.__username
         del self.__password
         del self.__database
@@ -70,6 +93,45 @@ class Database:
             self.__init_db()
         return self._permissions
 
+    @property
+    def document_counts(self):
+        if self._document_counts is None:
+            self.__init_db()
+        return self._document_counts
+
+    @property
+    def sequences(self):
+        if self._sequences is None:
+            self.__init_db()
+        return self._sequences
+
+    @property
+    def count_writers(self):
+        if self._count_writers is None:
+            self.__init_db()
+        return self._count_writers
+
+    @property
+    def blobs(self):
+        if self._blobs is None:
+            self.__init_db()
+        return self._blobs
+
+    @property
+    def blob_links(self):
+        if self._blob_links is None:
+            self.__init_db()
+        return self._blob_links
+
+
+class AsyncDatabase(Database):
+    """
+    The same collections on a Motor client, for the FastAPI routers.
+    Motor binds to the running event loop on the first operation
+    """
+
+    client_class = AsyncIOMotorClient
+
 
 db = Database(
     settings.MONGO_URL,
@@ -78,3 +140,11 @@ db = Database(
     settings.MONGO_PASSWORD,
     settings.MONGO_DATABASE,
 )
+
+async_db = AsyncDatabase(
+    settings.MONGO_URL,
+    settings.MONGO_PORT,
+    settings.MONGO_USER,
+    settings.MONGO_PASSWORD,
+    settings.MONGO_DATABASE,
+)
@@ -1,3 +1,9 @@
+import os
+import threading
+from datetime import timedelta
+
+import certifi
+import urllib3
 from minio import Minio
 from minio.lifecycleconfig import (
     LifecycleConfig,
@@ -11,6 +17,26 @@ from minio.commonconfig import ENABLED
 
 import settings
 
+# the pool of the MinIO client keeps 10 connections by default, the parallel
+# uploads and copies of several requests need more
+MINIO_POOL_SIZE = max(
+    10, settings.MINIO_UPLOAD_CONCURRENCY, settings.MINIO_COPY_CONCURRENCY
+)
+
+
+def _make_http_client() -> urllib3.PoolManager:
+    """The default HTTP client of the MinIO client with a larger pool"""
+    timeout = timedelta(minutes=5).seconds
+    return urllib3.PoolManager(
+        timeout=urllib3.util.Timeout(connect=timeout, read=timeout),
+        maxsize=MINIO_POOL_SIZE,
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(
+            total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+        ),
+    )
+
 
 class MinioClient:
     def __init__(
@@ -21,17 +47,24 @@ class MinioClient:
         self._password = password
         self._secure = secure
         self._minio_client = None
+        self._lock = threading.Lock()
 
     def __call__(self):
+        # called from the thread pool, the bucket is initialized once
         if self._minio_client is None:
-            self.init_bucket()
+            with self._lock:
+                if self._minio_client is None:
+                    self.init_bucket()
         return self._minio_client
 
     def init_bucket(self):
-        self._minio_client = Minio(
-            self._url, self._user, self._password, secure=self._secure
+        client = Minio(
+            self._url,
+            self._user,
+            self._password,
+            secure=self._secure,
+            http_client=_make_http_client(),
         )
-        client = self._minio_client
         if not client.bucket_exists(settings.MINIO_BUCKET):
             client.make_bucket(settings.MINIO_BUCKET)
             client.set_bucket_versioning(
@@ -60,6 +93,8 @@ class MinioClient:
                 ]
             )
             client.set_bucket_lifecycle(settings.MINIO_BUCKET, lifecycle_config)
+        # published once the bucket is ready
+        self._minio_client = client
 
 
 minio_client = MinioClient(
@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0f\x64ocuments.proto\x12\tdocuments\".\n\x1dRequestGetObjectDocumentCount\x12\r\n\x05\x63heck\x18\x01 \x01(\x08\"\xbc\x01\n\x1eResponseGetObjectDocumentCount\x12_\n\x14object_and_documents\x18\x01 \x03(\x0b\x32\x41.documents.ResponseGetObjectDocumentCount.ObjectAndDocumentsEntry\x1a\x39\n\x17ObjectAndDocumentsEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\x32\x85\x01\n\x10\x44ocumentInformer\x12q\n\x16GetObjectDocumentCount\x12(.documents.RequestGetObjectDocumentCount\x1a).documents.ResponseGetObjectDocumentCount\"\x00\x30\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0f\x64ocuments.proto\x12\tdocuments\"=\n\x1dRequestGetObjectDocumentCount\x12\r\n\x05\x63heck\x18\x01 \x01(\x08\x12\r\n\x05since\x18\x02 \x01(\x03\"\xdc\x01\n\x1eResponseGetObjectDocumentCount\x12_\n\x14object_and_documents\x18\x01 \x03(\x0b\x32\x41.documents.ResponseGetObjectDocumentCount.ObjectAndDocumentsEntry\x12\x10\n\x08sequence\x18\x02 \x01(\x03\x12\x0c\n\x04\x66ull\x18\x03 \x01(\x08\x1a\x39\n\x17ObjectAndDocumentsEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\x32\x85\x01\n\x10\x44ocumentInformer\x12q\n\x16GetObjectDocumentCount\x12(.documents.RequestGetObjectDocumentCount\x1a).documents.ResponseGetObjectDocumentCount\"\x00\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -24,11 +24,11 @@ if _descriptor._USE_C_DESCRIPTORS == False:
   _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT_OBJECTANDDOCUMENTSENTRY']._options = None
   _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT_OBJECTANDDOCUMENTSENTRY']._serialized_options = b'8\001'
   _globals['_REQUESTGETOBJECTDOCUMENTCOUNT']._serialized_start=30
-  _globals['_REQUESTGETOBJECTDOCUMENTCOUNT']._serialized_end=76
-  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT']._serialized_start=79
-  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT']._serialized_end=267
-  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT_OBJECTANDDOCUMENTSENTRY']._serialized_start=210
-  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT_OBJECTANDDOCUMENTSENTRY']._serialized_end=267
-  _globals['_DOCUMENTINFORMER']._serialized_start=270
-  _globals['_DOCUMENTINFORMER']._serialized_end=403
+  _globals['_REQUESTGETOBJECTDOCUMENTCOUNT']._serialized_end=91
+  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT']._serialized_start=94
+  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT']._serialized_end=314
+  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT_OBJECTANDDOCUMENTSENTRY']._serialized_start=257
+  _globals['_RESPONSEGETOBJECTDOCUMENTCOUNT_OBJECTANDDOCUMENTSENTRY']._serialized_end=314
+  _globals['_DOCUMENTINFORMER']._serialized_start=317
+  _globals['_DOCUMENTINFORMER']._serialized_end=450
 # @@protoc_insertion_point(module_scope)
@@ -6,13 +6,15 @@ from typing import ClassVar as _ClassVar, Mapping as _Mapping, Optional as _Opti
 DESCRIPTOR: _descriptor.FileDescriptor
 
 class RequestGetObjectDocumentCount(_message.Message):
-    __slots__ = ("check",)
+    __slots__ = ("check", "since")
     CHECK_FIELD_NUMBER: _ClassVar[int]
+    SINCE_FIELD_NUMBER: _ClassVar[int]
     check: bool
-    def __init__(self, check: bool = ...) -> None: ...
+    since: int
+    def __init__(self, check: bool = ..., since: _Optional[int] = ...) -> None: ...
 
 class ResponseGetObjectDocumentCount(_message.Message):
-    __slots__ = ("object_and_documents",)
+    __slots__ = ("object_and_documents", "sequence", "full")
     class ObjectAndDocumentsEntry(_message.Message):
         __slots__ = ("key", "value")
         KEY_FIELD_NUMBER: _ClassVar[int]
@@ -21,5 +23,9 @@ class ResponseGetObjectDocumentCount(_message.Message):
         value: int
         def __init__(self, key: _Optional[int] = ..., value: _Optional[int] = ...) -> None: ...
     OBJECT_AND_DOCUMENTS_FIELD_NUMBER: _ClassVar[int]
+    SEQUENCE_FIELD_NUMBER: _ClassVar[int]
+    FULL_FIELD_NUMBER: _ClassVar[int]
     object_and_documents: _containers.ScalarMap[int, int]
-    def __init__(self, object_and_documents: _Optional[_Mapping[int, int]] = ...) -> None: ...
+    sequence: int
+    full: bool
+    def __init__(self, object_and_documents: _Optional[_Mapping[int, int]] = ..., sequence: _Optional[int] = ..., full: bool = ...) -> None: ...
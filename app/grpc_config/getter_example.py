@@ -6,10 +6,12 @@ from grpc.aio import Channel
 from documents.proto import documents_pb2_grpc, documents_pb2
 
 
-async def get_object_and_document_count(channel: Channel) -> None:
+async def get_object_and_document_count(
+    channel: Channel, since: int = 0
+) -> None:
     stub = documents_pb2_grpc.DocumentInformerStub(channel)
     message_as_dict = {}
-    msg = documents_pb2.RequestGetObjectDocumentCount(check=True)
+    msg = documents_pb2.RequestGetObjectDocumentCount(check=True, since=since)
     response_async_generator = stub.GetObjectDocumentCount(msg)
     async for item in response_async_generator:
         message_as_dict = json_format.MessageToDict(
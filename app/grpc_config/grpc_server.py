@@ -5,7 +5,12 @@ import logging
 
 import grpc
 
-from database import db
+from database import async_db
+from utils.document_counts import (
+    prune_document_counts,
+    rebuild_document_counts,
+    get_sequence_state,
+)
 from .documents.proto import documents_pb2_grpc, documents_pb2
 
 
@@ -15,32 +20,52 @@ class DocumentInformer(documents_pb2_grpc.DocumentInformerServicer):
         request: documents_pb2.RequestGetObjectDocumentCount,
         context: grpc.aio.ServicerContext,
     ) -> documents_pb2.ResponseGetObjectDocumentCount:
-        result = db.document.find(
-            {"externalIdentifier.id": {"$exists": True}, "status": "created"}
-        )
-        documents = list(result)
-        count_of_all_documents = len(documents)
+        """
+        Streams the number of created documents per object.
+        If "since" is set, only the counts changed after this watermark are streamed
+        (0 for objects left without documents), unless the counts were rebuilt after it
+        """
         step = 10000
+        sequence, rebuilt = await get_sequence_state()
+        full = not request.since or request.since < rebuilt
+        if full:
+            query = {"count": {"$gt": 0}}
+        else:
+            query = {"sequence": {"$gt": request.since}}
 
-        for start in range(0, count_of_all_documents, step):
-            end = min(start + step, count_of_all_documents)
-            object_and_document_count = {}
-
-            for document in documents[start:end]:
-                object_id = document.get("externalIdentifier", [{}])[0].get(
-                    "id"
+        object_and_document_count = {}
+        chunks_sent = 0
+        document_counts = async_db.document_counts.find(query, batch_size=step)
+        async for group in document_counts:
+            object_id = group["_id"]
+            if object_id is None or not str(object_id).isdigit():
+                continue
+            object_and_document_count[int(object_id)] = max(group["count"], 0)
+            if len(object_and_document_count) >= step:
+                yield documents_pb2.ResponseGetObjectDocumentCount(
+                    object_and_documents=object_and_document_count,
+                    sequence=sequence,
+                    full=full,
                 )
-                if object_id is not None:
-                    object_and_document_count[int(object_id)] = (
-                        object_and_document_count.get(int(object_id), 0) + 1
-                    )
+                object_and_document_count = {}
+                chunks_sent += 1
 
+        # the last chunk is sent even if empty to pass the watermark
+        if object_and_document_count or not chunks_sent:
             yield documents_pb2.ResponseGetObjectDocumentCount(
-                object_and_documents=object_and_document_count
+                object_and_documents=object_and_document_count,
+                sequence=sequence,
+                full=full,
             )
 
 
 async def start_grpc_serve() -> None:
+    if await async_db.document_counts.estimated_document_count() == 0:
+        logging.info("Building document counts")
+        await rebuild_document_counts()
+    else:
+        await prune_document_counts()
+
     server = grpc.aio.server()
     documents_pb2_grpc.add_DocumentInformerServicer_to_server(
         DocumentInformer(), server
@@ -1,15 +1,16 @@
-from database import db
+from database import async_db
 from kafka.consumer import kafka_utils
 from kafka.consumer.kafka_producer import (
     get_documents_kafka_producer_factory_method,
 )
 from schemas.document import Document
+from security.permissions_cache import invalidate_permissions_cache
 from utils.content_to_server import drop_document_data
 
 
-def process_document_delete(document_id: str):
-    document_data = db.document.find_one({"id": document_id})
-    drop_document_data(
+async def process_document_delete(document_id: str):
+    document_data = await async_db.document.find_one({"id": document_id})
+    await drop_document_data(
         document=document_data, base_url="", document_id=document_id
     )
     document = Document(**document_data)
@@ -27,3 +28,8 @@ async def process_security_message(msg_event: str, permissions: list):
 
     elif msg_event == kafka_utils.SecurityEvent.DELETED.value:
         await kafka_utils.delete_permission(permissions)
+
+    else:
+        return
+
+    await invalidate_permissions_cache()
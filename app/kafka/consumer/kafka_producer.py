@@ -1,10 +1,13 @@
+import threading
 from abc import ABC, abstractmethod
 
+from confluent_kafka import Producer
+
 import settings
 from kafka import kafka_document_pb2
 from schemas.document import Document
 from settings import KAFKA_TURN_ON
-from utils.kafka import send_to_kafka, DocumentsStatus
+from utils.kafka import send_to_kafka, DocumentsStatus, producer_config
 
 
 class KafkaProducerInterface(ABC):
@@ -27,8 +30,58 @@ class KafkaProducerInterface(ABC):
     def send_deleted_attachments_by_doc(self, docs: list[Document]):
         raise NotImplementedError()
 
+    def close(self):
+        pass
+
 
 class DocumentsKafkaProducer(KafkaProducerInterface):
+    """
+    Keeps one confluent_kafka.Producer for the whole process.
+    The producer is created on the first message, delivery reports are served by a
+    background thread and the local queue is flushed on close()
+    """
+
+    def __init__(self, kafka_topic):
+        super().__init__(kafka_topic)
+        self._producer: Producer | None = None
+        self._poll_thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def producer(self) -> Producer:
+        if self._producer is None:
+            with self._lock:
+                if self._producer is None:
+                    self._start()
+        return self._producer
+
+    def _start(self):
+        self._stopped.clear()
+        self._producer = Producer(producer_config())
+        self._poll_thread = threading.Thread(
+            target=self._poll, name="kafka-producer-poll", daemon=True
+        )
+        self._poll_thread.start()
+
+    def _poll(self):
+        while not self._stopped.is_set():
+            self._producer.poll(settings.KAFKA_PRODUCER_POLL_TIMEOUT)
+
+    def close(self):
+        with self._lock:
+            if self._producer is None:
+                return
+            self._stopped.set()
+            self._poll_thread.join()
+            remaining = self._producer.flush(
+                settings.KAFKA_PRODUCER_FLUSH_TIMEOUT
+            )
+            if remaining:
+                print(f"{remaining} kafka messages were not delivered")
+            self._producer = None
+            self._poll_thread = None
+
     @staticmethod
     def _collect_mo_ids(docs: list[Document]) -> list[int]:
         mo_ids = []
@@ -48,7 +101,10 @@ class DocumentsKafkaProducer(KafkaProducerInterface):
             return
         msg = kafka_document_pb2.Document(mo_id=mo_ids)
         send_to_kafka(
-            data=msg, topic=self.kafka_topic, key=DocumentsStatus.CREATED.value
+            data=msg,
+            topic=self.kafka_topic,
+            key=DocumentsStatus.CREATED.value,
+            producer=self.producer,
         )
 
     def send_created_attachments_by_doc(self, docs: list[Document]):
@@ -60,7 +116,10 @@ class DocumentsKafkaProducer(KafkaProducerInterface):
             return
         msg = kafka_document_pb2.Document(mo_id=mo_ids)
         send_to_kafka(
-            data=msg, topic=self.kafka_topic, key=DocumentsStatus.DELETED.value
+            data=msg,
+            topic=self.kafka_topic,
+            key=DocumentsStatus.DELETED.value,
+            producer=self.producer,
         )
 
     def send_deleted_attachments_by_doc(self, docs: list[Document]):
@@ -87,18 +146,25 @@ class DisabledDocumentsKafkaProducer(KafkaProducerInterface):
 
 
 _instance = None
+_instance_lock = threading.Lock()
 
 
 def get_documents_kafka_producer_factory_method():
     global _instance
-    if not _instance:
-        if KAFKA_TURN_ON:
-            _instance = DocumentsKafkaProducer(
-                kafka_topic=settings.KAFKA_PRODUCER_TOPIC
-            )
-        else:
-            return DisabledDocumentsKafkaProducer(
-                kafka_topic=settings.KAFKA_PRODUCER_TOPIC
-            )
-    print(_instance)
+    if not KAFKA_TURN_ON:
+        return DisabledDocumentsKafkaProducer(
+            kafka_topic=settings.KAFKA_PRODUCER_TOPIC
+        )
+    # called from the threadpool: the first requests must share one producer
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = DocumentsKafkaProducer(
+                    kafka_topic=settings.KAFKA_PRODUCER_TOPIC
+                )
     return _instance
+
+
+def close_documents_kafka_producer():
+    if _instance is not None:
+        _instance.close()
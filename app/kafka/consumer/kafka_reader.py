@@ -33,7 +33,7 @@ async def read_kafka_topics():
             try:
                 message_key = kafka_message.key().decode("utf-8")
                 if "documents/" in message_key:
-                    process_minio_changes(message=kafka_message)
+                    await process_minio_changes(message=kafka_message)
 
                 else:
                     message_class, message_event = message_key.split(":")
@@ -46,7 +46,7 @@ async def read_kafka_topics():
                             )
 
                         case "MO":
-                            process_object_changes(
+                            await process_object_changes(
                                 message=kafka_message,
                                 message_event=message_event,
                             )
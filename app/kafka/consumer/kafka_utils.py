@@ -8,7 +8,7 @@ import requests
 from fastapi import HTTPException
 from google.protobuf import json_format
 
-from database import db
+from database import async_db
 from grpc_config.inventory_instances import inventory_instances_pb2
 from grpc_config.security_manager.security_manager_pb2 import MOPermissions
 from kafka.consumer.kafka_messages_adapter import (
@@ -80,17 +80,17 @@ def _get_token_for_kafka_producer(conf):
 
 async def create_permission(objects: list[dict]):
     for obj in objects:
-        db.permissions.insert_one(obj)
+        await async_db.permissions.insert_one(obj)
 
 
 async def update_permission(objects: list[dict]):
     for obj in objects:
-        db.document.replace_one({"id": obj["id"]}, obj)
+        await async_db.permissions.replace_one({"id": obj["id"]}, obj)
 
 
 async def delete_permission(objects: list[dict]):
     for obj in objects:
-        db.collection.delete_one({"id": obj["id"]})
+        await async_db.permissions.delete_one({"id": obj["id"]})
 
 
 PROTO_TYPES_SERIALIZERS = {
@@ -139,7 +139,7 @@ def protobuf_kafka_msg_to_dict(
     return message_as_dict
 
 
-def process_minio_changes(message):
+async def process_minio_changes(message):
     print("inside")
     value = json.loads(message.value())
     print(value)
@@ -149,7 +149,7 @@ def process_minio_changes(message):
         print("inside 2")
         document_id = value["Key"].split("/")[1]
         print(document_id)
-        process_document_delete(document_id=document_id)
+        await process_document_delete(document_id=document_id)
 
 
 async def process_security_changes(message, message_event: str):
@@ -169,7 +169,7 @@ async def process_security_changes(message, message_event: str):
     )
 
 
-def process_object_changes(message, message_event: str):
+async def process_object_changes(message, message_event: str):
     if message_event == ObjEventStatus.DELETED.value:
         value = inventory_instances_pb2.ListMO()
         value.ParseFromString(message.value())
@@ -180,12 +180,12 @@ def process_object_changes(message, message_event: str):
 
         for deleted_object in message_as_dict["objects"]:
             query = {"externalIdentifier.id": str(deleted_object["id"])}
-            linked_documents = db.document.find(query)
             linked_documents = [
-                ResponseDocument(**doc) for doc in linked_documents
+                ResponseDocument(**doc)
+                async for doc in async_db.document.find(query)
             ]
             for linked_document in linked_documents:
-                process_document_delete(document_id=linked_document.id)
+                await process_document_delete(document_id=linked_document.id)
 
 
 def message_is_empty(message, consumer):
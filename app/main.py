@@ -3,11 +3,13 @@ from http.client import responses
 from fastapi import HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.requests import Request
+from pymongo.errors import PyMongoError
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import RedirectResponse, JSONResponse
 
 import settings
 from init_app import create_app
+from kafka.consumer.kafka_producer import close_documents_kafka_producer
 from routers import (
     document_router,
     document_specification_router,
@@ -18,6 +20,7 @@ from schemas.exception import ExceptionModel
 from security import security_config
 from settings import PREFIX, ROOT_PREFIX, API_VERSION
 from utils.exception_formatter import exception_formatter
+from utils.indexes import apply_indexes
 
 app_version = "4.0.0"
 app_title = "Documents"
@@ -73,6 +76,21 @@ async def redirect():
     return response
 
 
+@app.on_event("startup")
+def create_indexes():
+    if not settings.MONGO_CREATE_INDEXES:
+        return
+    try:
+        apply_indexes()
+    except PyMongoError as e:
+        print(f"Indexes were not created: {e}")
+
+
+@app.on_event("shutdown")
+def flush_kafka_producer():
+    close_documents_kafka_producer()
+
+
 @app.exception_handler(HTTPException)
 async def catch_http_exception(request: Request, exc: HTTPException):
     exception_response = ExceptionModel(
@@ -83,7 +101,7 @@ async def catch_http_exception(request: Request, exc: HTTPException):
     )
     return JSONResponse(
         status_code=exc.status_code,
-        content=exception_response.dict(by_alias=True, exclude_none=True),
+        content=exception_response.model_dump(by_alias=True, exclude_none=True),
     )
 
 
@@ -96,7 +114,7 @@ async def catch_http_exception(request: Request, exc: HTTPException):
 #                                         reason=responses[500],
 #                                         message=message,
 #                                         status=500)
-#     return JSONResponse(status_code=500, content=exception_response.dict(by_alias=True, exclude_none=True))
+#     return JSONResponse(status_code=500, content=exception_response.model_dump(by_alias=True, exclude_none=True))
 
 
 @app.exception_handler(RequestValidationError)
@@ -107,5 +125,5 @@ async def catch_validation_error(request: Request, exc: RequestValidationError):
     )
     return JSONResponse(
         status_code=422,
-        content=exception_response.dict(by_alias=True, exclude_none=True),
+        content=exception_response.model_dump(by_alias=True, exclude_none=True),
     )
@@ -1,40 +1,81 @@
+import logging
 from datetime import timedelta
+from email.utils import format_datetime
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, Body, HTTPException, Query, Depends
+from fastapi.concurrency import run_in_threadpool
 from minio import Minio
+from fastapi.requests import Request
+from fastapi.responses import Response, StreamingResponse
 from starlette.responses import RedirectResponse
 
 import settings
-from database import db
 from file_server import minio_client
-from schemas.document import Document
-from security.security_config import ADMIN_ROLE
-from security.security_data_models import UserData
-from security.security_factory import security
-from security.security_utils import (
-    get_available_object_to_read_ids_by_user_data,
-)
+from schemas.content_link import ContentLink, ContentLinkResponse
+from security.security_data_models import ObjectPermissions
+from security.security_utils import get_object_permissions
 from utils.document_utils import (
-    add_to_query_permission_filter,
+    find_one_permitted_document,
+    find_permitted_documents,
     DocumentNotExists,
 )
+from utils.blob_store import resolve_object_names
+from utils.content_proxy import (
+    RangeNotSatisfiable,
+    etag_matches,
+    get_content_disposition,
+    iterate_object,
+    parse_range,
+)
+from utils.presigned_urls import (
+    get_content_file,
+    get_content_headers,
+    presigned_url_cache,
+)
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# maximum number of links in one batch request
+CONTENT_LINKS_LIMIT = 1000
+
+
+def get_lifetime(days: int, hours: int, minutes: int) -> timedelta:
+    """Returns the lifetime of a link, it cannot exceed 7 days"""
+    limit = 7 * 24 * 60
+    inputted_limit = days * 24 * 60 + hours * 60 + minutes
+    if inputted_limit > limit:
+        raise HTTPException(
+            status_code=422,
+            detail="Please select a valid duration. "
+            "This is a temporary URL with integrated access credentials for sharing objects "
+            "valid for up to 7 days.",
+        )
+    return timedelta(days=days, hours=hours, minutes=minutes)
 
 
 @router.get("/content/{document_id}/{content_id}", include_in_schema=False)
-def get_content(
+async def get_content(
+    request: Request,
     document_id: str,
     content_id: str,
     version_id: str | None = Query(default=None),
     days: int = Query(default=0, ge=0, le=7),
     hours: int = Query(default=0, ge=0, le=24),
     minutes: int = Query(default=15, ge=0, le=60),
+    proxy: bool | None = Query(default=None),
     client: Minio = Depends(minio_client),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     """
-    Gets a temporary link from *MINIO* and redirects the user to this link
+    Gets a temporary link from *MINIO* and redirects the user to this link.
+    The same link is returned for PRESIGNED_URL_CACHE_WINDOW seconds, it stays
+    valid at least for the requested time.
+    With "proxy" the content is streamed by the service instead, with Range
+    and If-None-Match support
     Note: Link lifetime cannot exceed 7 days
     \f
     :param document_id: document ID
@@ -43,69 +84,256 @@ def get_content(
     :param days: the number of days the link will be available
     :param hours: the number of hours that the link will be available
     :param minutes: the number of minutes that the link will be available
+    :param proxy: stream the content instead of the redirect, CONTENT_PROXY if not set
     :param client: minio client
-    :param user_data: user data for security
+    :param object_permissions: permissions of the user, None for administrators
     :return: redirect link
     """
-    limit = 7 * 24 * 60
-    inputted_limit = days * 24 * 60 + hours * 60 + minutes
-    if inputted_limit > limit:
-        raise HTTPException(
-            status_code=422,
-            detail="Please select a valid duration. "
-            "This is a temporary URL with integrated access credentials for sharing objects "
-            "valid for up to 7 days.",
+    if proxy is None:
+        proxy = settings.CONTENT_PROXY
+    if proxy:
+        return await proxy_content(
+            request=request,
+            document_id=document_id,
+            content_id=content_id,
+            version_id=version_id,
+            client=client,
+            object_permissions=object_permissions,
         )
+    lifetime = get_lifetime(days=days, hours=hours, minutes=minutes)
+    request_date, expires = presigned_url_cache.get_signing(lifetime)
+    key = (
+        document_id,
+        content_id,
+        version_id,
+        lifetime,
+        object_permissions.permissions if object_permissions else None,
+        request_date,
+    )
+    version = None
+    if request_date is not None:
+        versions = await presigned_url_cache.get_versions([document_id])
+        version = versions.get(document_id)
+        redirect_link = presigned_url_cache.get(key, version)
+        if redirect_link is not None:
+            return RedirectResponse(url=redirect_link)
     try:
-        filters = {"id": document_id}
-
-        if ADMIN_ROLE not in user_data.realm_access.roles:
-            available_object_ids_by_permission = (
-                get_available_object_to_read_ids_by_user_data(
-                    user_data=user_data.realm_access
-                )
-            )
-            filters = add_to_query_permission_filter(
-                filter_query=filters,
-                available_object_ids_by_permission=available_object_ids_by_permission,
-            )
-
-        document = db.document.find_one(filters)
-        document = Document(**document)
-        file_name = "content"
-        mime_type = None
-        for attachment in document.attachment:
-            if content_id == attachment.id:
-                file_name = attachment.name
-                mime_type = attachment.mime_type
-                break
-        headers = {
-            "response-content-disposition": f'inline; filename="{file_name}"'
-        }
-        if mime_type is not None and mime_type.lower() != "none":
-            headers["response-content-type"] = mime_type
-        redirect_link = client.get_presigned_url(
+        document = await find_one_permitted_document(
+            filters={"id": document_id}, object_permissions=object_permissions
+        )
+        if document is None:
+            raise DocumentNotExists
+        object_name = f"{document_id}/{content_id}"
+        object_names = await resolve_object_names([object_name])
+        redirect_link = await run_in_threadpool(
+            client.get_presigned_url,
             "GET",
             settings.MINIO_BUCKET,
-            f"{document_id}/{content_id}",
+            object_names[object_name],
             version_id=version_id,
-            expires=timedelta(days=days, hours=hours, minutes=minutes),
-            response_headers=headers,
+            expires=expires,
+            response_headers=get_content_headers(document, content_id),
+            request_date=request_date,
         )
-        return RedirectResponse(url=redirect_link)
     except Exception as e:
         print(e)  # TODO: logging
         raise HTTPException(status_code=404, detail="File not found")
+    presigned_url_cache.set(key, redirect_link, version)
+    return RedirectResponse(url=redirect_link)
+
+
+async def proxy_content(
+    request: Request,
+    document_id: str,
+    content_id: str,
+    version_id: str | None,
+    client: Minio,
+    object_permissions: ObjectPermissions | None,
+) -> Response:
+    """
+    Streams the content from MinIO through the service.
+    The ETag of MinIO is passed through: a matching If-None-Match gets 304,
+    a single byte range gets 206 unless If-Range names another version
+    """
+    object_name = f"{document_id}/{content_id}"
+    try:
+        document = await find_one_permitted_document(
+            filters={"id": document_id},
+            object_permissions=object_permissions,
+            fields=["id", "attachment"],
+        )
+        if document is None:
+            raise DocumentNotExists
+        file_name, mime_type = get_content_file(document, content_id)
+        object_name = (await resolve_object_names([object_name]))[object_name]
+        stat = await run_in_threadpool(
+            client.stat_object,
+            settings.MINIO_BUCKET,
+            object_name,
+            version_id=version_id,
+        )
+    except Exception as e:
+        logger.warning("Content %s is not found: %s", object_name, e)
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = f'"{stat.etag}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": get_content_disposition(file_name),
+    }
+    if stat.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(stat.last_modified, True)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = stat.size
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    status_code = 200
+    start, length = 0, 0
+    headers["Content-Length"] = str(size)
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(length)
+    # the sync iterator is run in the thread pool by the response
+    return StreamingResponse(
+        iterate_object(
+            client=client,
+            object_name=object_name,
+            etag=stat.etag,
+            start=start,
+            length=length,
+            version_id=version_id,
+        ),
+        status_code=status_code,
+        media_type=mime_type or stat.content_type,
+        headers=headers,
+    )
+
+
+@router.post(
+    "/content", response_model=list[ContentLinkResponse], tags=["Content"]
+)
+async def get_content_links(
+    links: Annotated[list[ContentLink], Body(max_length=CONTENT_LINKS_LIMIT)],
+    days: int = Query(default=0, ge=0, le=7),
+    hours: int = Query(default=0, ge=0, le=24),
+    minutes: int = Query(default=15, ge=0, le=60),
+    client: Minio = Depends(minio_client),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
+):
+    """
+    Returns the temporary links of many contents at once, in the order of the
+    request. The link is null if the document or the content is not found or
+    the user cannot read it
+    Note: Link lifetime cannot exceed 7 days
+    \f
+    :param links: document ID, content ID and optional version of the contents
+    :param days: the number of days the links will be available
+    :param hours: the number of hours that the links will be available
+    :param minutes: the number of minutes that the links will be available
+    :param client: minio client
+    :param object_permissions: permissions of the user, None for administrators
+    :return: links of the contents
+    """
+    lifetime = get_lifetime(days=days, hours=hours, minutes=minutes)
+    request_date, expires = presigned_url_cache.get_signing(lifetime)
+    scope = object_permissions.permissions if object_permissions else None
+    keys = [
+        (
+            link.document_id,
+            link.content_id,
+            link.version_id,
+            lifetime,
+            scope,
+            request_date,
+        )
+        for link in links
+    ]
+    urls = [None] * len(links)
+    versions = {}
+    if request_date is not None:
+        versions = await presigned_url_cache.get_versions(
+            list({link.document_id for link in links})
+        )
+        urls = [
+            presigned_url_cache.get(key, versions.get(link.document_id))
+            for key, link in zip(keys, links)
+        ]
+    missing = [index for index, url in enumerate(urls) if url is None]
+    if missing:
+        # one query for all the documents, filtered by the user permissions
+        document_ids = list({links[index].document_id for index in missing})
+        cursor = find_permitted_documents(
+            filters={"id": {"$in": document_ids}},
+            object_permissions=object_permissions,
+            fields=["id", "attachment"],
+        )
+        documents = {document["id"]: document async for document in cursor}
+        object_names = await resolve_object_names(
+            list(
+                {
+                    f"{links[index].document_id}/{links[index].content_id}"
+                    for index in missing
+                }
+            )
+        )
+
+        def sign():
+            for index in missing:
+                link = links[index]
+                document = documents.get(link.document_id)
+                if document is None or not any(
+                    attachment.get("id") == link.content_id
+                    for attachment in document.get("attachment", [])
+                ):
+                    continue
+                urls[index] = client.get_presigned_url(
+                    "GET",
+                    settings.MINIO_BUCKET,
+                    object_names[f"{link.document_id}/{link.content_id}"],
+                    version_id=link.version_id,
+                    expires=expires,
+                    response_headers=get_content_headers(
+                        document, link.content_id
+                    ),
+                    request_date=request_date,
+                )
+                presigned_url_cache.set(
+                    keys[index], urls[index], versions.get(link.document_id)
+                )
+
+        # MinIO client is synchronous
+        await run_in_threadpool(sign)
+    return [
+        ContentLinkResponse(**link.model_dump(), url=url)
+        for link, url in zip(links, urls)
+    ]
 
 
 @router.get(
     "/content/{document_id}/{content_id}/versions", include_in_schema=False
 )
-def get_versions(
+async def get_versions(
     document_id: str,
     content_id: str,
     client: Minio = Depends(minio_client),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     """
     Returns the available versions for the given document
@@ -113,29 +341,26 @@ def get_versions(
     :param document_id: document ID
     :param content_id: content ID
     :param client: minio client
-    :param user_data: user data for security
+    :param object_permissions: permissions of the user, None for administrators
     :return: versions of the document
     """
     try:
-        filters = {"id": document_id}
-
-        if ADMIN_ROLE not in user_data.realm_access.roles:
-            available_object_ids_by_permission = (
-                get_available_object_to_read_ids_by_user_data(
-                    user_data=user_data.realm_access
-                )
-            )
-            filters = add_to_query_permission_filter(
-                filter_query=filters,
-                available_object_ids_by_permission=available_object_ids_by_permission,
-            )
-
-        document = db.document.find_one(filters)
+        document = await find_one_permitted_document(
+            filters={"id": document_id}, object_permissions=object_permissions
+        )
         if document:
-            resp = client.list_objects(
-                settings.MINIO_BUCKET,
-                f"{document_id}/{content_id}",
-                include_version=True,
+            object_name = f"{document_id}/{content_id}"
+            object_name = (await resolve_object_names([object_name]))[
+                object_name
+            ]
+            resp = await run_in_threadpool(
+                lambda: list(
+                    client.list_objects(
+                        settings.MINIO_BUCKET,
+                        object_name,
+                        include_version=True,
+                    )
+                )
             )
             result = [
                 {
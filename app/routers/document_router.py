@@ -1,35 +1,40 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Path, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.requests import Request
-from fastapi.responses import Response
-from pymongo.cursor import Cursor
+from fastapi.responses import Response, StreamingResponse
 
-from database import db
+from database import async_db
 from kafka.consumer.kafka_producer import (
     get_documents_kafka_producer_factory_method,
 )
 from schemas.document import Document, ChangeDocument, ResponseDocument
-from security.security_config import ADMIN_ROLE
-from security.security_data_models import UserData
-from security.security_factory import security
-from security.security_utils import (
-    get_available_object_to_read_ids_by_user_data,
-    get_available_object_to_create_ids_by_user_data,
-    get_available_object_to_update_ids_by_user_data,
-    get_available_object_to_delete_ids_by_user_data,
-)
+from security.security_data_models import ObjectPermissions
+from security.security_utils import get_object_permissions
 from settings import API_VERSION
 from utils.content_to_server import (
     replace_content_with_link,
     patch_document_data,
     drop_document_data,
 )
-from utils.document_utils import add_to_query_permission_filter
+from utils.document_counts import update_document_counts
+from utils.document_utils import (
+    find_permitted_documents,
+    find_one_permitted_document,
+)
+from utils.ndjson import NDJSON_MEDIA_TYPE, stream_ndjson, wants_ndjson
+from utils.pagination import KEYSET_SORT, add_keyset_filter, encode_cursor
 from utils.parser import parse_query_wrapper
+from utils.serializer import JSON_MEDIA_TYPE, TrustedSerializer
+from utils.total_count import get_total_count
 
 router = APIRouter()
 
+# stored documents are serialized as the response models without validation
+documents_serializer = TrustedSerializer(ResponseDocument, exclude_none=True)
+document_serializer = TrustedSerializer(ResponseDocument)
+
 
 @router.get(
     "/document",
@@ -37,57 +42,109 @@ router = APIRouter()
     tags=["Document"],
     response_model_exclude_none=True,
 )
-def list_documents(
+async def list_documents(
+    request: Request,
     response: Response,
     data: dict = Depends(parse_query_wrapper(ChangeDocument)),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     """
     This operation list document entities.
     Attribute selection is enabled for all first level attributes.
     Filtering may be available depending on the compliance level supported by an implementation.
+    With "Accept: application/x-ndjson" or "stream=true" the documents are streamed one per line.
+    With "cursor" the documents are paged by creation date: an empty cursor
+    requests the first page, the cursor of the next page is returned in the
+    X-Next-Cursor header, or in a last {"@nextCursor": ...} line of a stream.
     \f
+    :param request: http connection, used to build the next page link
     :param response: response, used to change headers
     :param data: user request parsed using a self-written parser
-    :param user_data: user data for security
+    :param object_permissions: permissions of the user, None for administrators
     :return: list of ResponseDocument
     """
     offset = data.get("offset", None)
     limit = data.get("limit", None)
     filters = data.get("filters", {})
     fields = data.get("fields", [])
-    if ADMIN_ROLE not in user_data.realm_access.roles:
-        available_object_ids_by_permission = (
-            get_available_object_to_read_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-        )
-        filters = add_to_query_permission_filter(
-            filter_query=filters,
-            available_object_ids_by_permission=available_object_ids_by_permission,
+    cursor = data.get("cursor", None)
+
+    # keyset pagination is requested with a cursor, empty for the first page
+    keyset = "cursor" in data
+    page_filters = filters
+    sort = None
+    hidden_fields = []
+    if keyset:
+        sort = KEYSET_SORT
+        if cursor is not None:
+            page_filters = add_keyset_filter(filters, cursor)
+        if fields:
+            hidden_fields = [key for key, _ in sort if key not in fields]
+            fields = fields + hidden_fields
+
+    resp = find_permitted_documents(
+        filters=page_filters,
+        object_permissions=object_permissions,
+        fields=fields,
+        offset=None if keyset else offset,
+        limit=limit,
+        sort=sort,
+    )
+    total_count = await get_total_count(
+        collection=async_db.document,
+        filters=filters,
+        object_permissions=object_permissions,
+        mode=data.get("count", None),
+        filtered=data.get("filtered", True),
+    )
+
+    if wants_ndjson(request, data.get("stream", None)):
+        headers = {}
+        if total_count is not None:
+            headers["X-Total-Count"] = str(total_count)
+        return StreamingResponse(
+            stream_ndjson(
+                resp,
+                documents_serializer,
+                exclude=tuple(hidden_fields),
+                page_size=limit if keyset else None,
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
         )
 
-    resp: Cursor = db.document.find(filters, fields)
+    res = await resp.to_list(length=None)
+    if keyset and limit and len(res) == limit:
+        next_cursor = encode_cursor(res[-1])
+        next_url = request.url.remove_query_params("offset")
+        next_url = next_url.include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    for r in res:
+        for field in hidden_fields:
+            r.pop(field, None)
 
-    if offset:
-        resp = resp.skip(offset)
-    if limit:
-        resp = resp.limit(limit)
-    res = list(r for r in resp)
     response.headers["X-Result-Count"] = str(len(res))
-    response.headers["X-Total-Count"] = str(
-        db.document.count_documents(filters)
+    if total_count is not None:
+        response.headers["X-Total-Count"] = str(total_count)
+    return Response(
+        content=documents_serializer.dumps_many(res),
+        media_type=JSON_MEDIA_TYPE,
+        headers=response.headers,
     )
-    return res
 
 
 @router.get(
     "/document/{id}", response_model=ResponseDocument, tags=["Document"]
 )
-def retrieve_document(
+async def retrieve_document(
     id: str = Path(alias="id"),
     data: dict = Depends(parse_query_wrapper(ChangeDocument)),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     """
     This operation retrieves a document entity.
@@ -96,27 +153,20 @@ def retrieve_document(
     \f
     :param id: document ID
     :param data: user request parsed using a self-written parser
-    :param user_data: user data for security
+    :param object_permissions: permissions of the user, None for administrators
     :return: list of ResponseDocument
     """
     filters = data.get("filters", {})
     filters["id"] = id
     fields = data.get("fields", [])
-    if ADMIN_ROLE not in user_data.realm_access.roles:
-        available_object_ids_by_permission = (
-            get_available_object_to_read_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-        )
-        filters = add_to_query_permission_filter(
-            filter_query=filters,
-            available_object_ids_by_permission=available_object_ids_by_permission,
-        )
-
-    result = db.document.find_one(filters, fields)
+    result = await find_one_permitted_document(
+        filters=filters, object_permissions=object_permissions, fields=fields
+    )
     if not result:
         raise HTTPException(status_code=404, detail="Document not found")
-    return result
+    return Response(
+        content=document_serializer.dumps(result), media_type=JSON_MEDIA_TYPE
+    )
 
 
 @router.post(
@@ -130,20 +180,22 @@ async def create_document(
     document: Document,
     request: Request,
     kfk_producer=Depends(get_documents_kafka_producer_factory_method),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     """
     This operation creates a document entity.
     \f
     :param document: Document
     :param request: http connection
-    :param user_data: user data for security
+    :param object_permissions: permissions of the user, None for administrators
     :param kfk_producer: kafka producer
     :return: Document with id
     """
     if (
         document.id is not None
-        and db.document.find_one({"id": document.id}) is not None
+        and await async_db.document.find_one({"id": document.id}) is not None
     ):
         raise HTTPException(
             status_code=409, detail="Document with this ID already exists"
@@ -152,31 +204,29 @@ async def create_document(
         document.href = (
             f"{request.base_url}v{API_VERSION}/document/{document.id}"
         )
-    replace_content_with_link(document, request.base_url)
+    await run_in_threadpool(
+        replace_content_with_link, document, request.base_url
+    )
 
-    document_to_create = document.dict(exclude_none=True, by_alias=True)
+    document_to_create = document.model_dump(exclude_none=True, by_alias=True)
     document_object_id = document_to_create.get("externalIdentifier", [{}])[
         0
     ].get("id")
 
-    if ADMIN_ROLE not in user_data.realm_access.roles and document_object_id:
-        available_object_ids_by_permission = (
-            get_available_object_to_create_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-        )
-        if str(document_object_id) not in available_object_ids_by_permission:
+    if object_permissions is not None and document_object_id:
+        if str(document_object_id) not in object_permissions.create:
             raise HTTPException(
                 status_code=500,
                 detail="Access denied: the current user lacks the necessary "
                 "permissions to perform this action.",
             )
 
-    resp = db.document.insert_one(
-        document=document.dict(exclude_none=True, by_alias=True)
+    resp = await async_db.document.insert_one(
+        document=document.model_dump(exclude_none=True, by_alias=True)
     )
     if not resp.acknowledged:
         raise HTTPException(status_code=500, detail="document not saved")
+    await update_document_counts(new_documents=[document])
     kfk_producer.send_created_attachments_by_doc(docs=[document])
     return document
 
@@ -187,11 +237,13 @@ async def create_document(
     tags=["Document"],
     response_model_exclude_none=True,
 )
-def patch_document(
+async def patch_document(
     request: Request,
     document: ChangeDocument,
     id: str = Path(alias="id"),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     """
     This operation allows partial updates of a document entity. Support of json/merge
@@ -204,36 +256,25 @@ def patch_document(
     :param id: Document ID
     :param document: ChangeDocument
     :param request: http connection
-    :param user_data: user data for security
+    :param object_permissions: permissions of the user, None for administrators
     :return: changed Document
     """
-    old_document = db.document.find_one({"id": id})
+    old_document = await async_db.document.find_one({"id": id})
     if old_document is None:
         raise HTTPException(status_code=404, detail="Document not found")
 
     document_linked_to_object = old_document.get("externalIdentifier", [{}])[
         0
     ].get("id")
-    if (
-        ADMIN_ROLE not in user_data.realm_access.roles
-        and document_linked_to_object
-    ):
-        available_object_ids_by_permission = (
-            get_available_object_to_update_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-        )
-        if (
-            str(document_linked_to_object)
-            not in available_object_ids_by_permission
-        ):
+    if object_permissions is not None and document_linked_to_object:
+        if str(document_linked_to_object) not in object_permissions.update:
             raise HTTPException(
                 status_code=500,
                 detail="Access denied: the current user lacks the necessary "
                 "permissions to perform this action.",
             )
 
-    new_document = patch_document_data(
+    new_document = await patch_document_data(
         old_document=old_document,
         document=document,
         base_url=request.base_url,
@@ -248,44 +289,35 @@ def patch_document(
     tags=["Document"],
     status_code=204,
 )
-def delete_document(
+async def delete_document(
     request: Request,
     id: Annotated[str, Path(alias="id")],
     kfk_producer=Depends(get_documents_kafka_producer_factory_method),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     """
     This operation deletes a document entity.
     \f
     :param id: Document ID
     """
-    document = db.document.find_one({"id": id})
+    document = await async_db.document.find_one({"id": id})
     if document is None:
         raise HTTPException(status_code=404, detail="Document not found")
 
     document_linked_to_object = document.get("externalIdentifier", [{}])[0].get(
         "id"
     )
-    if (
-        ADMIN_ROLE not in user_data.realm_access.roles
-        and document_linked_to_object
-    ):
-        available_object_ids_by_permission = (
-            get_available_object_to_delete_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-        )
-        if (
-            str(document_linked_to_object)
-            not in available_object_ids_by_permission
-        ):
+    if object_permissions is not None and document_linked_to_object:
+        if str(document_linked_to_object) not in object_permissions.delete:
             raise HTTPException(
                 status_code=500,
                 detail="Access denied: the current user lacks the necessary "
                 "permissions to perform this action.",
             )
 
-    drop_document_data(
+    await drop_document_data(
         document=document, document_id=id, base_url=request.base_url
     )
     # document = Document(**document)
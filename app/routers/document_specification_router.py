@@ -1,10 +1,10 @@
-import pydantic
 from fastapi import APIRouter, Depends, Path, HTTPException
-from pymongo.cursor import Cursor
+from fastapi.concurrency import run_in_threadpool
+from motor.motor_asyncio import AsyncIOMotorCursor
 from fastapi.responses import Response
 from fastapi.requests import Request
 
-from database import db
+from database import async_db
 from schemas.document_specification import (
     DocumentSpecification,
     ChangeDocumentSpecification,
@@ -14,6 +14,7 @@ from settings import API_VERSION
 from utils.content_to_server import replace_content_with_link, drop_old_content
 from utils.merge_json import merge
 from utils.parser import parse_query_wrapper
+from utils.total_count import get_total_count
 
 router = APIRouter()
 
@@ -23,7 +24,7 @@ router = APIRouter()
     response_model=list[ResponseDocumentSpecification],
     tags=["DocumentSpecification"],
 )
-def list_document_specifications(
+async def list_document_specifications(
     response: Response,
     data: dict = Depends(parse_query_wrapper(ChangeDocumentSpecification)),
 ):
@@ -40,16 +41,23 @@ def list_document_specifications(
     limit = data.get("limit", None)
     filters = data.get("filters", {})
     fields = data.get("fields", [])
-    resp: Cursor = db.document_specification.find(filters, fields)
+    resp: AsyncIOMotorCursor = async_db.document_specification.find(
+        filters, fields
+    )
     if offset:
         resp = resp.skip(offset)
     if limit:
         resp = resp.limit(limit)
-    res = list(r for r in resp)
+    res = await resp.to_list(length=None)
     response.headers["X-Result-Count"] = str(len(res))
-    response.headers["X-Total-Count"] = str(
-        db.document_specification.count_documents(filters)
+    total_count = await get_total_count(
+        collection=async_db.document_specification,
+        filters=filters,
+        mode=data.get("count", None),
+        filtered=data.get("filtered", True),
     )
+    if total_count is not None:
+        response.headers["X-Total-Count"] = str(total_count)
     return res
 
 
@@ -58,7 +66,7 @@ def list_document_specifications(
     response_model=ResponseDocumentSpecification,
     tags=["DocumentSpecification"],
 )
-def retrieve_document_specification(
+async def retrieve_document_specification(
     id: str = Path(alias="id"),
     data: dict = Depends(parse_query_wrapper(ChangeDocumentSpecification)),
 ):
@@ -74,7 +82,7 @@ def retrieve_document_specification(
     filters = data.get("filters", {})
     filters["id"] = id
     fields = data.get("fields", [])
-    result = db.document_specification.find_one(filters, fields)
+    result = await async_db.document_specification.find_one(filters, fields)
     if not result:
         raise HTTPException(
             status_code=404, detail="Document specification not found"
@@ -89,7 +97,7 @@ def retrieve_document_specification(
     response_model_exclude_none=True,
     status_code=201,
 )
-def create_document_specification(
+async def create_document_specification(
     request: Request, document_spec: DocumentSpecification
 ):
     """
@@ -100,7 +108,9 @@ def create_document_specification(
     """
     if (
         document_spec.id is not None
-        and db.document_specification.find_one({"id": document_spec.id})
+        and await async_db.document_specification.find_one(
+            {"id": document_spec.id}
+        )
         is not None
     ):
         raise HTTPException(
@@ -108,8 +118,8 @@ def create_document_specification(
         )
     attachment = document_spec.attachment
     document_spec.attachment = None
-    resp = db.document_specification.insert_one(
-        document=document_spec.dict(exclude_none=True, by_alias=True)
+    resp = await async_db.document_specification.insert_one(
+        document=document_spec.model_dump(exclude_none=True, by_alias=True)
     )
 
     document_id = (
@@ -121,15 +131,17 @@ def create_document_specification(
     document_spec.id = document_id
     document_spec.href = href
     document_spec.attachment = attachment
-    replace_content_with_link(document_spec, request.base_url)
+    await run_in_threadpool(
+        replace_content_with_link, document_spec, request.base_url
+    )
     if document_spec.attachment is None:
         att_dict = None
     else:
         att_dict = [
-            att.dict(by_alias=True, exclude_none=True)
+            att.model_dump(by_alias=True, exclude_none=True)
             for att in document_spec.attachment
         ]
-    db.document_specification.update_one(
+    await async_db.document_specification.update_one(
         filter={"_id": resp.inserted_id},
         update={
             "$set": {
@@ -148,7 +160,7 @@ def create_document_specification(
     tags=["DocumentSpecification"],
     response_model_exclude_none=True,
 )
-def patch_document_specification(
+async def patch_document_specification(
     request: Request,
     document_spec: ChangeDocumentSpecification,
     id: str = Path(alias="id"),
@@ -165,21 +177,27 @@ def patch_document_specification(
     :param document_spec: ChangeDocumentSpecification
     :return: changed DocumentSpecification
     """
-    old_document_spec = db.document_specification.find_one({"id": id})
+    old_document_spec = await async_db.document_specification.find_one(
+        {"id": id}
+    )
     if old_document_spec is None:
         raise HTTPException(status_code=404, detail="Document not found")
     new_document_spec = merge(
-        old_document_spec, document_spec.dict(by_alias=True, exclude_unset=True)
+        old_document_spec,
+        document_spec.model_dump(by_alias=True, exclude_unset=True),
     )
 
     old_document_spec = DocumentSpecification(**old_document_spec)
     new_document_spec = DocumentSpecification(**new_document_spec)
 
-    drop_old_content(old_document_spec, document_spec)
+    await run_in_threadpool(drop_old_content, old_document_spec, document_spec)
 
-    replace_content_with_link(new_document_spec, request.base_url)
-    db.document_specification.replace_one(
-        {"id": id}, new_document_spec.dict(exclude_none=True, by_alias=True)
+    await run_in_threadpool(
+        replace_content_with_link, new_document_spec, request.base_url
+    )
+    await async_db.document_specification.replace_one(
+        {"id": id},
+        new_document_spec.model_dump(exclude_none=True, by_alias=True),
     )
     return new_document_spec
 
@@ -190,15 +208,15 @@ def patch_document_specification(
     tags=["DocumentSpecification"],
     status_code=204,
 )
-def delete_document_specification(id: str = Path(alias="id")):
+async def delete_document_specification(id: str = Path(alias="id")):
     """
     This operation deletes a document_spec specification entity.
     \f
     :param id: Document specification ID
     """
-    document_spec = db.document_specification.find_one({"id": id})
+    document_spec = await async_db.document_specification.find_one({"id": id})
     if document_spec is None:
         raise HTTPException(status_code=404, detail="Document not found")
-    document_spec = pydantic.parse_obj_as(DocumentSpecification, document_spec)
-    drop_old_content(document_spec)
-    db.document_specification.delete_one({"id": id})
+    document_spec = DocumentSpecification.model_validate(document_spec)
+    await run_in_threadpool(drop_old_content, document_spec)
+    await async_db.document_specification.delete_one({"id": id})
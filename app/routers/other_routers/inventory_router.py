@@ -1,31 +1,26 @@
 from datetime import datetime
+from functools import partial
 from typing import Annotated, List
 
 from fastapi import APIRouter, HTTPException, Depends, Path, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.requests import Request
+from fastapi.responses import Response, StreamingResponse
 from minio import Minio, S3Error
 from minio.commonconfig import CopySource
 from starlette.status import HTTP_507_INSUFFICIENT_STORAGE
 
 import settings
-from database import db
+from database import async_db
 from file_server import minio_client
-from kafka import kafka_document_pb2
 from kafka.consumer.kafka_producer import (
     get_documents_kafka_producer_factory_method,
     KafkaProducerInterface,
 )
 from schemas.document import Document, ResponseDocument
 from schemas.document_status_type import DocumentStatusType
-from security.security_config import ADMIN_ROLE
-from security.security_data_models import UserData
-from security.security_factory import security
-from security.security_utils import (
-    get_available_object_to_read_ids_by_user_data,
-    get_available_object_to_create_ids_by_user_data,
-    get_available_object_to_update_ids_by_user_data,
-    get_available_object_to_delete_ids_by_user_data,
-)
+from security.security_data_models import ObjectPermissions
+from security.security_utils import get_object_permissions
 from tasks.create_document_with_attachments import (
     create_document_with_attachment,
     delete_attachment,
@@ -35,12 +30,33 @@ from tasks.find_document_by_id_and_attachment_name import (
 )
 from tasks.remove_object_version import remove_object_latest_version
 from tasks.upload_attachment import upload_attachment
-from utils.content_to_server import drop_document_data
-from utils.document_utils import add_to_query_permission_filter
-from utils.kafka import DocumentsStatus, send_to_kafka
+from utils.archive import ZIP_MEDIA_TYPE, get_archive_files, iterate_archive
+from utils.blob_store import (
+    link_blobs,
+    release_blob,
+    remove_contents,
+    resolve_object_names,
+    restore_link,
+)
+from utils.content_to_server import drop_old_content
+from utils.document_counts import (
+    get_counted_objects,
+    apply_counted_objects_diff,
+    update_document_counts,
+)
+from utils.document_utils import find_permitted_documents
+from utils.parallel import run_in_parallel
+from utils.presigned_urls import stamp_content_version
+from utils.serializer import JSON_MEDIA_TYPE, TrustedSerializer
 
 router = APIRouter()
 
+# copied attachments between the progress messages of copy_between_objects
+COPY_PROGRESS_STEP = 100
+
+# stored documents are serialized as the response model without validation
+documents_serializer = TrustedSerializer(ResponseDocument)
+
 
 @router.post(
     "/copy_between_objects",
@@ -48,29 +64,36 @@ router = APIRouter()
     tags=["Inventory"],
     response_model_exclude_none=True,
 )
-def copy_attachments(
+async def copy_attachments(
     from_mo_id: int,
     to_mo_id: int,
     client: Minio = Depends(minio_client),
-    user_data: UserData = Depends(security),
+    kfk_producer: KafkaProducerInterface = Depends(
+        get_documents_kafka_producer_factory_method
+    ),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     from_mo_id = str(from_mo_id)
     to_mo_id = str(to_mo_id)
-
-    already_existing_mo_documents_filter = {"externalIdentifier.id": to_mo_id}
-    if ADMIN_ROLE not in user_data.realm_access.roles:
-        filter_query = get_available_object_to_read_ids_by_user_data(
-            user_data=user_data.realm_access
-        )
-        already_existing_mo_documents_filter = add_to_query_permission_filter(
-            filter_query=already_existing_mo_documents_filter,
-            available_object_ids_by_permission=filter_query,
+    if (
+        object_permissions is not None
+        and to_mo_id not in object_permissions.create
+    ):
+        raise HTTPException(
+            status_code=500,
+            detail="Access denied: the current user lacks the necessary "
+            "permissions to perform this action.",
         )
 
-    existing_documents = db.document.find(already_existing_mo_documents_filter)
+    existing_documents = find_permitted_documents(
+        filters={"externalIdentifier.id": to_mo_id},
+        object_permissions=object_permissions,
+    )
     already_existing_mo_attachment_ids = set()
-    for document in existing_documents:
-        document = Document.validate(document)
+    async for document in existing_documents:
+        document = Document.model_validate(document)
         for attachment in document.attachment:
             already_existing_mo_attachment_ids.add(attachment.id)
 
@@ -78,25 +101,20 @@ def copy_attachments(
         "status": {"$ne": "deleted"},
         "externalIdentifier.id": from_mo_id,
     }
-    if ADMIN_ROLE not in user_data.realm_access.roles:
-        filter_query = get_available_object_to_read_ids_by_user_data(
-            user_data=user_data.realm_access
-        )
-        filters = add_to_query_permission_filter(
-            filter_query=filters,
-            available_object_ids_by_permission=filter_query,
-        )
-
-    documents = db.document.find(filters)
-    current_datetime = datetime.utcnow()
-    results = []
-    for document in documents:
+    documents = find_permitted_documents(
+        filters=filters, object_permissions=object_permissions
+    )
+    current_datetime = datetime.now()
+    new_documents: list[Document] = []
+    # source and target object names of the copied attachments
+    copies: list[tuple[str, str]] = []
+    async for document in documents:
         # mongodb
         old_document_id = document.pop("id")
-        document = Document.validate(document)
+        document = Document.model_validate(document)
         document.creation_date = current_datetime
         document.last_update = current_datetime
-        document.status = DocumentStatusType.CREATED
+        document.status = DocumentStatusType.CREATED.value
 
         new_external_identifier = []
         for external_identifier in document.external_identifier:
@@ -117,56 +135,71 @@ def copy_attachments(
             attachment.url = attachment.url.replace(
                 old_document_id, document.id
             )
-
-            # minio
-            source = CopySource(
-                bucket_name=settings.MINIO_BUCKET,
-                object_name=f"{old_document_id}/{attachment.id}",
-            )
-            try:
-                client.copy_object(
-                    bucket_name=settings.MINIO_BUCKET,
-                    object_name=f"{document.id}/{attachment.id}",
-                    source=source,
+            new_attachment.append(attachment)
+            copies.append(
+                (
+                    f"{old_document_id}/{attachment.id}",
+                    f"{document.id}/{attachment.id}",
                 )
-            except S3Error as e:
-                for new_att in new_attachment:
-                    client.remove_object(
-                        bucket_name=settings.MINIO_BUCKET,
-                        object_name=f"{document.id}/{new_att.id}",
-                    )
-                raise HTTPException(status_code=500, detail=e.message)
-            else:
-                new_attachment.append(attachment)
+            )
         if not new_attachment:
             continue
         document.attachment = new_attachment
+        new_documents.append(document)
+    if not new_documents:
+        return []
 
-        if ADMIN_ROLE not in user_data.realm_access.roles and document:
-            filter_query = get_available_object_to_create_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-            if str(document) not in filter_query:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Access denied: the current user lacks the necessary "
-                    "permissions to perform this action.",
-                )
+    # minio, blobs are shared and only the other contents are copied
+    linked = await run_in_threadpool(link_blobs, copies)
+    copies = [copy for copy in copies if copy[1] not in linked]
 
-        db.document.insert_one(
-            document=document.dict(exclude_none=True, by_alias=True)
-        )
-        results.append(document.dict(exclude_none=True, by_alias=True))
-
-        # kafka
-        mo_ids = [int(e_i.id) for e_i in document.external_identifier]
-        data = kafka_document_pb2.Document(mo_id=mo_ids)
-        send_to_kafka(
-            data=data,
-            topic=settings.KAFKA_PRODUCER_TOPIC,
-            key=DocumentsStatus.CREATED.value,
+    def report_progress(done: int, total: int):
+        if done % COPY_PROGRESS_STEP == 0 or done == total:
+            print(f"Copied {done}/{total} attachments to object {to_mo_id}")
+
+    copied, error = await run_in_threadpool(
+        run_in_parallel,
+        [
+            partial(
+                client.copy_object,
+                bucket_name=settings.MINIO_BUCKET,
+                object_name=object_name,
+                source=CopySource(
+                    bucket_name=settings.MINIO_BUCKET, object_name=source_name
+                ),
+            )
+            for source_name, object_name in copies
+        ],
+        max_workers=settings.MINIO_COPY_CONCURRENCY,
+        on_progress=report_progress,
+    )
+    if error is not None:
+        # one removal request for all the copied objects
+        await run_in_threadpool(
+            remove_contents,
+            client,
+            [*linked, *(copies[index][1] for index in copied)],
         )
-    return results
+        if not isinstance(error, S3Error):
+            raise error
+        raise HTTPException(status_code=500, detail=error.message)
+
+    await async_db.document.insert_many(
+        [i.model_dump(exclude_none=True, by_alias=True) for i in new_documents]
+    )
+    await update_document_counts(new_documents=new_documents)
+
+    # kafka, one message for all the documents
+    kfk_producer.send_created_attachments_by_mo_ids(
+        mo_ids=[
+            int(e_i.id)
+            for document in new_documents
+            for e_i in document.external_identifier
+        ]
+    )
+    return [
+        i.model_dump(exclude_none=True, by_alias=True) for i in new_documents
+    ]
 
 
 @router.post(
@@ -174,98 +207,117 @@ def copy_attachments(
     response_model=list[ResponseDocument],
     tags=["Inventory"],
 )
-def add_attachments_to_mo_id(
+async def add_attachments_to_mo_id(
     request: Request,
     mo_id: Annotated[int, Path(gt=0)],
     attachments: list[UploadFile],
     client: Minio = Depends(minio_client),
     kfk_producer=Depends(get_documents_kafka_producer_factory_method),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     create_documents: list[Document] = []
     update_documents: list[Document] = []
-    now = datetime.utcnow()
-    try:
-        for attachment in attachments:
-            print(attachment.filename)
-            exists_documents = find_document_by_id_and_attachment_name(
-                attachment_name=attachment.filename, mo_id=mo_id
+    uploads: list[tuple[Document, UploadFile, bool]] = []
+    now = datetime.now()
+    for attachment in attachments:
+        print(attachment.filename)
+        exists_documents = await find_document_by_id_and_attachment_name(
+            attachment_name=attachment.filename, mo_id=mo_id
+        )
+        if exists_documents:
+            document = exists_documents[0]
+            deleted_attachment = delete_attachment(
+                document=document, file=attachment
             )
-            if exists_documents:
-                document = exists_documents[0]
-                deleted_attachment = delete_attachment(
-                    document=document, file=attachment
-                )
-                document = create_document_with_attachment(
-                    attachment=attachment,
-                    mo_id=mo_id,
-                    now=now,
-                    base_url=str(request.base_url),
-                    attachment_id=deleted_attachment.id,
-                )
-            else:
-                document = create_document_with_attachment(
-                    attachment=attachment,
-                    mo_id=mo_id,
-                    now=now,
-                    base_url=str(request.base_url),
-                )
-            upload_attachment(
+            document = create_document_with_attachment(
+                attachment=attachment,
+                mo_id=mo_id,
+                now=now,
+                base_url=str(request.base_url),
+                attachment_id=deleted_attachment.id,
+            )
+        else:
+            document = create_document_with_attachment(
+                attachment=attachment,
+                mo_id=mo_id,
+                now=now,
+                base_url=str(request.base_url),
+            )
+        uploads.append((document, attachment, bool(exists_documents)))
+
+    # the files are uploaded in parallel, if one fails the uploaded ones
+    # are rolled back. Results are the blobs linked before, by index
+    uploaded, error = await run_in_threadpool(
+        run_in_parallel,
+        [
+            partial(
+                upload_attachment,
                 document_id=document.id,
                 attachment_id=document.attachment[-1].id,
                 client=client,
                 file=attachment,
             )
-            if exists_documents:
-                update_documents.append(document)
-            else:
-                create_documents.append(document)
-    except S3Error:
+            for document, attachment, _ in uploads
+        ],
+        max_workers=settings.MINIO_UPLOAD_CONCURRENCY,
+    )
+    previous_blobs = []
+    for index, previous in uploaded.items():
+        document, _, exists = uploads[index]
+        if exists:
+            update_documents.append(document)
+            previous_blobs.append(previous)
+        else:
+            create_documents.append(document)
+    if error is not None:
         for result in create_documents:
-            drop_document_data(
-                document=result.dict(by_alias=True, exclude_none=True),
-                document_id=result.id,
-                base_url=request.base_url,
-            )
-        for result in update_documents:
-            remove_object_latest_version(
+            await run_in_threadpool(drop_old_content, result)
+        for result, previous in zip(update_documents, previous_blobs):
+            if settings.BLOB_DEDUPLICATION:
+                await run_in_threadpool(
+                    restore_link,
+                    client=client,
+                    object_name=f"{result.id}/{result.attachment[-1].id}",
+                    previous=previous,
+                )
+                continue
+            await run_in_threadpool(
+                remove_object_latest_version,
                 document_id=result.id,
                 attachment_id=result.attachment[-1].id,
                 client=client,
             )
+        if not isinstance(error, S3Error):
+            raise error
         raise HTTPException(
             status_code=HTTP_507_INSUFFICIENT_STORAGE,
             detail="Insufficient Storage",
         )
     results = []
     if create_documents:
-        if ADMIN_ROLE not in user_data.realm_access.roles:
-            available_object_ids_by_permission = (
-                get_available_object_to_create_ids_by_user_data(
-                    user_data=user_data.realm_access
-                )
-            )
-            if str(mo_id) not in available_object_ids_by_permission:
+        if object_permissions is not None:
+            if str(mo_id) not in object_permissions.create:
                 raise HTTPException(
                     status_code=500,
                     detail="Access denied: the current user lacks the necessary "
                     "permissions to perform this action.",
                 )
 
-        db.document.insert_many(
-            [i.dict(by_alias=True, exclude_none=True) for i in create_documents]
+        await async_db.document.insert_many(
+            [
+                i.model_dump(by_alias=True, exclude_none=True)
+                for i in create_documents
+            ]
         )
+        await update_document_counts(new_documents=create_documents)
         results.extend(create_documents)
         kfk_producer.send_created_attachments_by_doc(docs=create_documents)
 
     if update_documents:
-        if ADMIN_ROLE not in user_data.realm_access.roles:
-            available_object_ids_by_permission = (
-                get_available_object_to_update_ids_by_user_data(
-                    user_data=user_data.realm_access
-                )
-            )
-            if str(mo_id) not in available_object_ids_by_permission:
+        if object_permissions is not None:
+            if str(mo_id) not in object_permissions.update:
                 raise HTTPException(
                     status_code=500,
                     detail="Access denied: the current user lacks the necessary "
@@ -273,10 +325,16 @@ def add_attachments_to_mo_id(
                 )
 
         for upd_doc in update_documents:
-            db.document.replace_one(
+            await async_db.document.replace_one(
                 filter={"id": upd_doc.id},
-                replacement=upd_doc.dict(exclude_none=True, by_alias=True),
+                replacement=stamp_content_version(
+                    upd_doc.model_dump(exclude_none=True, by_alias=True)
+                ),
             )
+        # replaced contents
+        for previous in previous_blobs:
+            if previous is not None:
+                await run_in_threadpool(release_blob, client, previous)
         results.extend(update_documents)
     return results
 
@@ -286,28 +344,67 @@ def add_attachments_to_mo_id(
     response_model=List[ResponseDocument],
     tags=["Inventory"],
 )
-def get_documents_by_mo_id(
+async def get_documents_by_mo_id(
     mo_id: Annotated[int, Path(gt=0)],
     status: Annotated[list[str], None] = Query(None),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
     query = {"externalIdentifier.id": str(mo_id)}
     if status:
         query["status"] = {"$in": [st for st in status]}
 
-    if ADMIN_ROLE not in user_data.realm_access.roles:
-        available_object_ids_by_permission = (
-            get_available_object_to_read_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-        )
-        query = add_to_query_permission_filter(
-            filter_query=query,
-            available_object_ids_by_permission=available_object_ids_by_permission,
-        )
-    response = db.document.find(query)
-    results = [ResponseDocument(**i) for i in response]
-    return results
+    response = find_permitted_documents(
+        filters=query, object_permissions=object_permissions
+    )
+    results = await response.to_list(length=None)
+    return Response(
+        content=documents_serializer.dumps_many(results),
+        media_type=JSON_MEDIA_TYPE,
+    )
+
+
+@router.get("/inventory/object/{mo_id}/archive", tags=["Inventory"])
+async def get_archive_by_mo_id(
+    mo_id: Annotated[int, Path(gt=0)],
+    status: Annotated[list[str], None] = Query(None),
+    client: Minio = Depends(minio_client),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
+):
+    """
+    Streams a zip archive of the attachments of the object documents
+    readable by the user. The archive is written while it is sent
+    \f
+    :param mo_id: object ID
+    :param status: statuses of the documents, all if not set
+    :param client: minio client
+    :param object_permissions: permissions of the user, None for administrators
+    :return: zip archive
+    """
+    query = {"externalIdentifier.id": str(mo_id)}
+    if status:
+        query["status"] = {"$in": [st for st in status]}
+
+    response = find_permitted_documents(
+        filters=query,
+        object_permissions=object_permissions,
+        fields=["id", "attachment"],
+    )
+    documents = await response.to_list(length=None)
+    files = get_archive_files(documents)
+    object_names = await resolve_object_names([name for _, name in files])
+    files = [(arcname, object_names[name]) for arcname, name in files]
+    return StreamingResponse(
+        # the sync iterator is run in the thread pool by the response
+        iterate_archive(client=client, files=files),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": f'attachment; filename="object_{mo_id}.zip"'
+        },
+    )
 
 
 @router.delete(
@@ -315,32 +412,29 @@ def get_documents_by_mo_id(
     response_model=None,
     tags=["Inventory"],
 )
-def delete_documents_by_mo_id(
+async def delete_documents_by_mo_id(
     mo_id: Annotated[int, Path(gt=0)],
     client: Minio = Depends(minio_client),
     kfk_producer: KafkaProducerInterface = Depends(
         get_documents_kafka_producer_factory_method
     ),
-    user_data: UserData = Depends(security),
+    object_permissions: ObjectPermissions | None = Depends(
+        get_object_permissions
+    ),
 ):
-    if ADMIN_ROLE not in user_data.realm_access.roles:
-        available_object_ids_by_permission = (
-            get_available_object_to_delete_ids_by_user_data(
-                user_data=user_data.realm_access
-            )
-        )
-
-        if str(mo_id) in available_object_ids_by_permission:
+    if object_permissions is not None:
+        if str(mo_id) not in object_permissions.delete:
             raise HTTPException(
                 status_code=500,
                 detail="Access denied: the current user lacks the necessary "
                 "permissions to perform this action.",
             )
 
-    query = {"externalIdentifier": str(mo_id)}
+    query = {"externalIdentifier.id": str(mo_id)}
 
-    response = db.document.find(query)
-    results = [Document(**i) for i in response]
+    response = async_db.document.find(query)
+    results = [Document(**i) async for i in response]
+    counted_objects_before = get_counted_objects(results)
     file_urls: list[str] = []
     documents_to_update: list[Document] = []
     documents_to_update_kafka: list[Document] = []
@@ -353,7 +447,7 @@ def delete_documents_by_mo_id(
                     file_url = f"{document.id}/{attachment.id}"
                     file_urls.append(file_url)
         else:
-            kafka_document = document.copy(deep=True)
+            kafka_document = document.model_copy(deep=True)
             kafka_document.external_identifier = [
                 i for i in document.external_identifier if i.id == str(mo_id)
             ]
@@ -364,20 +458,24 @@ def delete_documents_by_mo_id(
             ]
             documents_to_update.append(document)
     if file_urls:
-        client.remove_objects(
-            settings.MINIO_BUCKET, delete_object_list=file_urls
-        )
+        await run_in_threadpool(remove_contents, client, file_urls)
     if documents_to_delete:
         document_ids = [i.id for i in documents_to_delete]
         query = {"id": {"$in": document_ids}}
-        db.document.delete_many(query)
+        await async_db.document.delete_many(query)
         kfk_producer.send_deleted_attachments_by_doc(docs=documents_to_delete)
     if documents_to_update:
         for upd_doc in documents_to_update:
-            db.document.replace_one(
+            await async_db.document.replace_one(
                 filter={"id": upd_doc.id},
-                replacement=upd_doc.dict(exclude_none=True, by_alias=True),
+                replacement=stamp_content_version(
+                    upd_doc.model_dump(exclude_none=True, by_alias=True)
+                ),
             )
         kfk_producer.send_deleted_attachments_by_doc(
             docs=documents_to_update_kafka
         )
+    await apply_counted_objects_diff(
+        before=counted_objects_before,
+        after=get_counted_objects(documents_to_update),
+    )
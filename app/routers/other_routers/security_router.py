@@ -1,11 +1,12 @@
 import grpc
 from fastapi import APIRouter
 
-from database import db
+from database import async_db
 from grpc_config.security_manager import (
     security_manager_pb2_grpc,
     security_manager_pb2,
 )
+from security.permissions_cache import invalidate_permissions_cache
 
 from settings import INVENTORY_GRPC_PORT, INVENTORY_GRPC_HOST
 
@@ -14,7 +15,8 @@ router = APIRouter()
 
 @router.get("/refresh_all_mo_permissions", tags=["Security"])
 async def refresh_all_mo_permissions():
-    db.permissions.delete_many({})
+    await async_db.permissions.delete_many({})
+    await invalidate_permissions_cache()
 
     async with grpc.aio.insecure_channel(
         f"{INVENTORY_GRPC_HOST}:{INVENTORY_GRPC_PORT}"
@@ -39,4 +41,5 @@ async def refresh_all_mo_permissions():
                     "permission_name": permission_instance.permission_name,
                     "permission": permission_instance.permission,
                 }
-                db.permissions.insert_one(new_record)
+                await async_db.permissions.insert_one(new_record)
+    await invalidate_permissions_cache()
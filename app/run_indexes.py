@@ -0,0 +1,21 @@
+import argparse
+import logging
+
+from utils.indexes import apply_indexes, get_index_report
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="MongoDB index management")
+    parser.add_argument("command", choices=["apply", "report"])
+    args = parser.parse_args()
+
+    if args.command == "apply":
+        for collection, names in apply_indexes().items():
+            logging.info("%s: %s", collection, ", ".join(names))
+    else:
+        for collection, report in get_index_report().items():
+            for kind, names in report.items():
+                if names:
+                    logging.info(
+                        "%s %s: %s", collection, kind, ", ".join(names)
+                    )
@@ -0,0 +1,10 @@
+import asyncio
+import logging
+
+from utils.document_counts import rebuild_document_counts
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logging.info("Rebuilding document counts")
+    asyncio.run(rebuild_document_counts())
+    logging.info("Document counts rebuilt")
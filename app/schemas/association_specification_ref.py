@@ -1,11 +1,12 @@
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.load_field_description import field_description
 
 fd = field_description["AssociationSpecificationRef"]
 
 
-class AssociationSpecificationRef(BaseModel):
+class AssociationSpecificationRef(SchemaModel):
     """
     Reference to an AssociationSpecification object.
     """
@@ -14,12 +15,12 @@ class AssociationSpecificationRef(BaseModel):
         default=None, alias="@referredType", description=fd["@referredType"]
     )
     name: str | None = Field(default=None, description=fd["name"])
-    href: AnyUrl | None = Field(default=None, description=fd["href"])
+    href: Url | None = Field(default=None, description=fd["href"])
     id: str = Field(description=fd["id"])
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -1,7 +1,8 @@
 import uuid
 
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.load_field_description import field_description
 from schemas.quantity import Quantity
 from schemas.time_period import TimePeriod
@@ -9,7 +10,7 @@ from schemas.time_period import TimePeriod
 fd = field_description["AttachmentRefOrValue"]
 
 
-class AttachmentRefOrValue(BaseModel):
+class AttachmentRefOrValue(SchemaModel):
     """
     An attachment by value or by reference. An attachment complements the description of an element,
     for example through a document, a video, a picture.
@@ -19,16 +20,16 @@ class AttachmentRefOrValue(BaseModel):
         default=None, alias="@referredType", description=fd["@referredType"]
     )
     description: str | None = Field(default=None, description=fd["description"])
-    href: AnyUrl | None = Field(default=None, description=fd["href"])
+    href: Url | None = Field(default=None, description=fd["href"])
     id: str | None = Field(
         default_factory=lambda: str(uuid.uuid4()), description=fd["id"]
     )
-    url: AnyUrl | None = Field(default=None, description=fd["url"])
-    name: str | None = Field(description=fd["name"])
+    url: Url | None = Field(default=None, description=fd["url"])
+    name: str | None = Field(default=None, description=fd["name"])
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -0,0 +1,65 @@
+import types
+import typing
+from typing import Annotated, Union
+
+from pydantic import (
+    AfterValidator,
+    AnyUrl,
+    BaseModel,
+    ConfigDict,
+    PlainSerializer,
+)
+from pydantic.fields import FieldInfo
+
+# URLs are validated, but kept as strings, the way they are stored
+Url = Annotated[
+    AnyUrl, AfterValidator(str), PlainSerializer(str, return_type=str)
+]
+
+# the contents are stored in MinIO as "{id}/{attachment id}", deduplicated
+# contents as "blobs/{sha256}"
+BLOB_NAMESPACE = "blobs"
+
+
+def _check_content_owner_id(value: str) -> str:
+    if value == BLOB_NAMESPACE:
+        raise ValueError(f'"{BLOB_NAMESPACE}" is reserved')
+    return value
+
+
+# ID of a document or a specification, it names the objects of the contents
+ContentOwnerId = Annotated[str, AfterValidator(_check_content_owner_id)]
+
+
+class SchemaModel(BaseModel):
+    """
+    Base of the TMF667 schemas.
+    Numbers are accepted for string fields, as they were with pydantic 1.
+    Fields are also read by name, FastAPI validates the returned models
+    into the response model from their attributes
+    """
+
+    model_config = ConfigDict(coerce_numbers_to_str=True, validate_by_name=True)
+
+
+def get_item_type(annotation):
+    """
+    Returns the type of the values of an annotation: Optional, lists and
+    Annotated are unwrapped, so "list[Quantity] | None" gives Quantity
+    """
+    while True:
+        origin = typing.get_origin(annotation)
+        args = typing.get_args(annotation)
+        if origin is Annotated or origin in (list, set, tuple):
+            annotation = args[0]
+        elif origin in (Union, types.UnionType):
+            args = [arg for arg in args if arg is not type(None)]
+            if len(args) != 1:
+                return annotation
+            annotation = args[0]
+        else:
+            return annotation
+
+
+def get_alias(name: str, field: FieldInfo) -> str:
+    return field.alias or name
@@ -1,14 +1,15 @@
 import uuid
 
-from pydantic import BaseModel, Field, AnyUrl, types
+from pydantic import Field, types
 
+from schemas.base_model import SchemaModel, Url
 from schemas.characteristic_relationship import CharacteristicRelationship
 from schemas.load_field_description import field_description
 
 fd = field_description["Characteristic"]
 
 
-class Characteristic(BaseModel):
+class Characteristic(SchemaModel):
     """
     Describes a given characteristic of an object or entity through a name/value pair.
     """
@@ -16,7 +17,7 @@ class Characteristic(BaseModel):
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -33,7 +34,7 @@ class Characteristic(BaseModel):
         default_factory=lambda: str(uuid.uuid4()), description=fd["id"]
     )
     name: str = Field(description=fd["name"])
-    value: types.Any = Field(description=fd["value"])
+    value: types.Any = Field(default=None, description=fd["value"])
     value_type: str | None = Field(
         default=None, alias="valueType", description=fd["valueType"]
     )
@@ -1,7 +1,8 @@
 import uuid
 
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.characteristic_specification_relationship import (
     CharacteristicSpecificationRelationship,
 )
@@ -14,7 +15,7 @@ from schemas.time_period import TimePeriod
 fd = field_description["CharacteristicSpecification"]
 
 
-class CharacteristicSpecification(BaseModel):
+class CharacteristicSpecification(SchemaModel):
     """
     This class defines a characteristic specification.
     """
@@ -49,7 +50,7 @@ class CharacteristicSpecification(BaseModel):
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
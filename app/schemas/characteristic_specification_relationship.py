@@ -1,12 +1,13 @@
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.load_field_description import field_description
 from schemas.time_period import TimePeriod
 
 fd = field_description["CharacteristicSpecificationRelationship"]
 
 
-class CharacteristicSpecificationRelationship(BaseModel):
+class CharacteristicSpecificationRelationship(SchemaModel):
     """
     An aggregation, migration, substitution, dependency or exclusivity relationship between/among Characteristic
     specifications. The specification characteristic is embedded within the specification whose ID and href are in this
@@ -16,7 +17,7 @@ class CharacteristicSpecificationRelationship(BaseModel):
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -28,7 +29,7 @@ class CharacteristicSpecificationRelationship(BaseModel):
         description=fd["characteristicSpecificationId"],
     )
     name: str | None = Field(default=None, description=fd["name"])
-    parent_specification_href: AnyUrl | None = Field(
+    parent_specification_href: Url | None = Field(
         default=None,
         alias="parentSpecificationHref",
         description=fd["parentSpecificationHref"],
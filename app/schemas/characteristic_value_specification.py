@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field, AnyUrl, types
+from pydantic import Field, types
 
+from schemas.base_model import SchemaModel, Url
 from schemas.load_field_description import field_description
 from schemas.range_interval import RangeInterval
 from schemas.time_period import TimePeriod
@@ -7,7 +8,7 @@ from schemas.time_period import TimePeriod
 fd = field_description["CharacteristicValueSpecification"]
 
 
-class CharacteristicValueSpecification(BaseModel):
+class CharacteristicValueSpecification(SchemaModel):
     """
     Specification of a value (number or text or an object) that can be assigned to a Characteristic.
     """
@@ -15,7 +16,7 @@ class CharacteristicValueSpecification(BaseModel):
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -0,0 +1,27 @@
+from pydantic import Field
+
+from schemas.base_model import SchemaModel
+
+
+class ContentLink(SchemaModel):
+    """
+    Content of a document attachment
+    """
+
+    document_id: str = Field(alias="documentId", description="Document ID")
+    content_id: str = Field(
+        alias="contentId", description="Content (attachment) ID"
+    )
+    version_id: str | None = Field(
+        default=None,
+        alias="versionId",
+        description="Content version, the latest version if not specified",
+    )
+
+
+class ContentLinkResponse(ContentLink):
+    """
+    Temporary link to the content, null if it is not found
+    """
+
+    url: str | None = Field(default=None, description="Temporary link")
@@ -1,8 +1,9 @@
 import uuid
 from datetime import datetime
 
-from pydantic import BaseModel, AnyUrl, Field
+from pydantic import ConfigDict, Field
 
+from schemas.base_model import ContentOwnerId, SchemaModel, Url
 from schemas.attachment_ref_or_value import AttachmentRefOrValue
 from schemas.category_ref import CategoryRef
 from schemas.characteristic import Characteristic
@@ -19,7 +20,7 @@ from schemas.related_party import RelatedParty
 fd = field_description["Document"]
 
 
-class ChangeDocument(BaseModel):
+class ChangeDocument(SchemaModel):
     """
     Used to modify an already existing document
     """
@@ -70,8 +71,7 @@ class ChangeDocument(BaseModel):
     )
     version: str | None = Field(default=None, description=fd["version"])
 
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class Document(ChangeDocument):
@@ -79,14 +79,14 @@ class Document(ChangeDocument):
     The document is the main element for displaying and interacting with the microservice
     """
 
-    href: AnyUrl | None = Field(default=None, description=fd["href"])
-    id: str | None = Field(
+    href: Url | None = Field(default=None, description=fd["href"])
+    id: ContentOwnerId | None = Field(
         default_factory=lambda: str(uuid.uuid4()), description=fd["id"]
     )
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -99,15 +99,18 @@ class Document(ChangeDocument):
         description=fd["creationDate"],
     )
     status: DocumentStatusType | None = Field(
-        default=DocumentStatusType.CREATED, description=fd["status"]
+        default=DocumentStatusType.CREATED,
+        validate_default=True,
+        description=fd["status"],
     )
 
     @classmethod
     def get_field_names(cls, alias=False):
-        return list(cls.schema(alias).get("properties").keys())
+        return list(
+            cls.model_json_schema(by_alias=alias).get("properties").keys()
+        )
 
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class ResponseDocument(Document):
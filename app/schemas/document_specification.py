@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import ConfigDict, Field
 
+from schemas.base_model import ContentOwnerId, SchemaModel, Url
 from schemas.attachment_ref_or_value import AttachmentRefOrValue
 from schemas.characteristic_specification import CharacteristicSpecification
 from schemas.constraint_ref import ConstraintRef
@@ -19,7 +20,7 @@ from schemas.time_period import TimePeriod
 fd = field_description["DocumentSpecification"]
 
 
-class ChangeDocumentSpecification(BaseModel):
+class ChangeDocumentSpecification(SchemaModel):
     """
     Used to modify an already existing document specification
     """
@@ -73,12 +74,12 @@ class DocumentSpecification(ChangeDocumentSpecification):
     """
 
     name: str = Field(description=fd["name"])
-    href: AnyUrl | None = Field(default=None, description=fd["href"])
-    id: str | None = Field(default=None, description=fd["id"])
+    href: Url | None = Field(default=None, description=fd["href"])
+    id: ContentOwnerId | None = Field(default=None, description=fd["id"])
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -87,10 +88,11 @@ class DocumentSpecification(ChangeDocumentSpecification):
 
     @classmethod
     def get_field_names(cls, alias=False):
-        return list(cls.schema(alias).get("properties").keys())
+        return list(
+            cls.model_json_schema(by_alias=alias).get("properties").keys()
+        )
 
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class ResponseDocumentSpecification(DocumentSpecification):
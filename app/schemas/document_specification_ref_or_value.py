@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.attachment_ref_or_value import AttachmentRefOrValue
 from schemas.characteristic_specification import CharacteristicSpecification
 from schemas.constraint_ref import ConstraintRef
@@ -19,7 +20,7 @@ from schemas.time_period import TimePeriod
 fd = field_description["DocumentSpecificationRefOrValue"]
 
 
-class DocumentSpecificationRefOrValue(BaseModel):
+class DocumentSpecificationRefOrValue(SchemaModel):
     """
     A DocumentSpecificationRefOrValue where you can select between a DocumentSpecification (by Value)
     or a DocumentSpecificationRef (by Reference).
@@ -29,12 +30,12 @@ class DocumentSpecificationRefOrValue(BaseModel):
         default=None, alias="@referredType", description=fd["@referredType"]
     )
     name: str | None = Field(default=None, description=fd["name"])
-    href: AnyUrl | None = Field(default=None, description=fd["href"])
+    href: Url | None = Field(default=None, description=fd["href"])
     id: str | None = Field(default=None, description=fd["id"])
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.association_specification_ref import AssociationSpecificationRef
 from schemas.load_field_description import field_description
 from schemas.time_period import TimePeriod
@@ -7,7 +8,7 @@ from schemas.time_period import TimePeriod
 fd = field_description["EntitySpecificationRelationship"]
 
 
-class EntitySpecificationRelationship(BaseModel):
+class EntitySpecificationRelationship(SchemaModel):
     """
     A migration, substitution, dependency, or exclusivity relationship between/among entity specifications.
     """
@@ -16,12 +17,12 @@ class EntitySpecificationRelationship(BaseModel):
         default=None, alias="@referredType", description=fd["@referredType"]
     )
     name: str | None = Field(default=None, description=fd["name"])
-    href: AnyUrl | None = Field(default=None, description=fd["href"])
+    href: Url | None = Field(default=None, description=fd["href"])
     id: str | None = Field(default=None, description=fd["id"])
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
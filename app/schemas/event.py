@@ -1,8 +1,9 @@
 import enum
 from datetime import datetime
 
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.document import Document
 from schemas.document_specification import DocumentSpecification
 
@@ -20,26 +21,26 @@ class DocumentSpecificationEventType(enum.Enum):
     DELETE = "DocumentSpecificationDeleteEvent"
 
 
-class SpecificEvent(BaseModel):
+class SpecificEvent(SchemaModel):
     document: Document | None = Field(default=None)
     document_specification: DocumentSpecification | None = Field(
         default=None, alias="documentSpecification"
     )
 
 
-class Event(BaseModel):
+class Event(SchemaModel):
     correlation_id: str | None = Field(default=None, alias="correlationId")
-    description: str | None
-    domain: str | None
+    description: str | None = None
+    domain: str | None = None
     event_id: str = Field(alias="eventId")
     event_time: datetime = Field(alias="eventTime")
     event_type: DocumentEventType | DocumentSpecificationEventType = Field(
         alias="eventType"
     )
     field_path: str | None = Field(default=None, alias="fieldPath")
-    href: AnyUrl | None
-    id: str | None
-    priority: str | None
+    href: Url | None = None
+    id: str | None = None
+    priority: str | None = None
     time_occurred: datetime | None = Field(default=None, alias="timeOccurred")
-    title: str | None
+    title: str | None = None
     event: SpecificEvent
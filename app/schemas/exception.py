@@ -1,11 +1,12 @@
-from pydantic import BaseModel, AnyUrl, Field
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.load_field_description import field_description
 
 fd = field_description["Exception"]
 
 
-class ExceptionModel(BaseModel):
+class ExceptionModel(SchemaModel):
     """
     Used when an API throws an Error, typically with HTTP error response-code (3xx, 4xx, 5xx)
     """
@@ -20,7 +21,7 @@ class ExceptionModel(BaseModel):
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -1,11 +1,12 @@
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import Field
 
+from schemas.base_model import SchemaModel, Url
 from schemas.load_field_description import field_description
 
 fd = field_description["ExternalIdentifier"]
 
 
-class ExternalIdentifier(BaseModel):
+class ExternalIdentifier(SchemaModel):
     """
     An identification of an entity that is owned by or originates in a software system different from the current
     system, for example a ProductOrder handed off from a commerce platform into an order handling system. The structure
@@ -15,12 +16,12 @@ class ExternalIdentifier(BaseModel):
     sequence the IDs in the array in reverse order of provenance, i.e., most recent system first in the list.
     """
 
-    href: AnyUrl | None = Field(default=None, description=fd["href"])
+    href: Url | None = Field(default=None, description=fd["href"])
     id: str | None = Field(default=None, description=fd["id"])
     base_type: str | None = Field(
         default=None, alias="@baseType", description=fd["@baseType"]
     )
-    schema_location: AnyUrl | None = Field(
+    schema_location: Url | None = Field(
         default=None, alias="@schemaLocation", description=fd["@schemaLocation"]
     )
     type: str | None = Field(
@@ -1,11 +1,11 @@
-from pydantic import AnyUrl, BaseModel
+from schemas.base_model import SchemaModel, Url
 
 
-class CreateListener(BaseModel):
-    callback: AnyUrl
+class CreateListener(SchemaModel):
+    callback: Url
 
 
-class Listener(BaseModel):
+class Listener(SchemaModel):
     id: str
-    callback: AnyUrl
-    query: str | None
+    callback: Url
+    query: str | None = None
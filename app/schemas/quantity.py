@@ -1,11 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import Field
 
+from schemas.base_model import SchemaModel
 from schemas.load_field_description import field_description
 
 fd = field_description["Quantity"]
 
 
-class Quantity(BaseModel):
+class Quantity(SchemaModel):
     """
     An amount in a given unit.
     """
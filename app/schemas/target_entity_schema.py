@@ -1,11 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import Field
 
+from schemas.base_model import SchemaModel
 from schemas.load_field_description import field_description
 
 fd = field_description["TargetEntitySchema"]
 
 
-class TargetEntitySchema(BaseModel):
+class TargetEntitySchema(SchemaModel):
     """
     The reference object to the schema and type of target entity which is described by a specification.
     """
@@ -1,8 +1,10 @@
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import Field
 
+from schemas.base_model import SchemaModel
 
-class TimePeriod(BaseModel):
+
+class TimePeriod(SchemaModel):
     end_datetime: datetime | None = Field(default=None, alias="endDateTime")
     start_datetime: datetime | None = Field(default=None, alias="startDateTime")
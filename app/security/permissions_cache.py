@@ -0,0 +1,71 @@
+import threading
+
+from cachetools import LRUCache, TTLCache
+
+from database import async_db
+from security.security_config import (
+    PERMISSIONS_CACHE_SIZE,
+    PERMISSIONS_CACHE_VERSION_TTL,
+)
+from security.security_data_models import ObjectPermissions
+
+PERMISSIONS_SEQUENCE_ID = "permissions"
+
+
+class PermissionsCache:
+    """
+    Keeps the object permissions resolved for a set of roles.
+    The permissions collection is changed by the Kafka consumer, which runs in another
+    process, so entries are tagged with the permissions version stored in MongoDB.
+    The version is re-read at most once per "version_ttl" seconds.
+    The version must be read before the permissions are queried, so a result
+    queried while the permissions change is tagged with the old version
+    """
+
+    def __init__(self, maxsize: int, version_ttl: float):
+        self._cache = LRUCache(maxsize=maxsize)
+        self._version = TTLCache(maxsize=1, ttl=version_ttl)
+        self._lock = threading.Lock()
+
+    async def get_version(self) -> int:
+        version = self._version.get(PERMISSIONS_SEQUENCE_ID)
+        if version is None:
+            sequence = await async_db.sequences.find_one(
+                {"_id": PERMISSIONS_SEQUENCE_ID}
+            )
+            version = sequence["value"] if sequence else 0
+            with self._lock:
+                self._version[PERMISSIONS_SEQUENCE_ID] = version
+        return version
+
+    def get(self, key, version: int) -> ObjectPermissions | None:
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def set(self, key, value: ObjectPermissions, version: int):
+        """
+        :param version: permissions version read before the value was queried
+        """
+        with self._lock:
+            self._cache[key] = (version, value)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._version.clear()
+
+
+permissions_cache = PermissionsCache(
+    maxsize=PERMISSIONS_CACHE_SIZE, version_ttl=PERMISSIONS_CACHE_VERSION_TTL
+)
+
+
+async def invalidate_permissions_cache():
+    """Must be called after every change of the permissions collection"""
+    await async_db.sequences.update_one(
+        {"_id": PERMISSIONS_SEQUENCE_ID}, {"$inc": {"value": 1}}, upsert=True
+    )
+    permissions_cache.clear()
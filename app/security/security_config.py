@@ -57,6 +57,10 @@ OPA_POLICY_PATH = f"/v1/data/{OPA_POLICY}"
 # OTHER
 SECURITY_TYPE = os.environ.get("SECURITY_TYPE", "DISABLE").upper()
 ADMIN_ROLE = "__admin"
+# IN - permitted object IDs are sent in the query, LOOKUP - joined from permissions
+PERMISSION_FILTER_STRATEGY = os.environ.get(
+    "PERMISSION_FILTER_STRATEGY", "IN"
+).upper()
 
 # CACHE
 SECURITY_MIDDLEWARE_PROTOCOL = os.environ.get(
@@ -78,3 +82,9 @@ if (
 else:
     SECURITY_POSTFIX = f"/api/security_middleware/v1/cached/realms/{KEYCLOAK_REALM}/protocol/openid-connect/userinfo"
 SECURITY_MIDDLEWARE_URL = f"{SECURITY_MIDDLEWARE_PROTOCOL}://{SECURITY_MIDDLEWARE_HOST}:{SECURITY_MIDDLEWARE_PORT}{SECURITY_POSTFIX}"
+
+# PERMISSIONS CACHE
+PERMISSIONS_CACHE_SIZE = int(os.environ.get("PERMISSIONS_CACHE_SIZE", 500))
+PERMISSIONS_CACHE_VERSION_TTL = float(
+    os.environ.get("PERMISSIONS_CACHE_VERSION_TTL", 1)
+)
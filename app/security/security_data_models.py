@@ -47,9 +47,20 @@ class UserData:
         )
 
 
+@dataclass(frozen=True)
+class ObjectPermissions:
+    """IDs of objects on which the user is permitted each action"""
+
+    permissions: tuple[str, ...]
+    read: frozenset[str]
+    create: frozenset[str]
+    update: frozenset[str]
+    delete: frozenset[str]
+
+
 class UserPermission(BaseModel):
     is_admin: bool = False
-    user_permissions: List[str] = None
+    user_permissions: Optional[List[str]] = None
 
 
 class UserPermissionBuilder:
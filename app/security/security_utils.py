@@ -1,6 +1,23 @@
-from database import db
+from fastapi import Depends
+
+from database import async_db
 from security.data.utils import role_prefix
-from security.security_data_models import ClientRoles
+from security.permissions_cache import permissions_cache
+from security.security_config import ADMIN_ROLE
+from security.security_data_models import (
+    ClientRoles,
+    ObjectPermissions,
+    UserData,
+)
+from security.security_factory import security
+
+# action -> permission record field holding the object ID
+PERMISSION_ACTIONS = {
+    "read": "parent_id",
+    "create": "id",
+    "update": "id",
+    "delete": "id",
+}
 
 
 def format_user_permissions(user_data: ClientRoles):
@@ -10,81 +27,56 @@ def format_user_permissions(user_data: ClientRoles):
     return permissions_to_search
 
 
-def get_available_object_to_read_ids_by_user_data(user_data: ClientRoles):
-    permissions_to_search = format_user_permissions(user_data=user_data)
-
-    deny_receive_data = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "read": False}
-    )
-    if [instance for instance in deny_receive_data]:
-        return []
-
-    permit_instances = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "read": True}
-    )
-    available_object_ids = [
-        str(permission["parent_id"]) for permission in permit_instances
-    ]
-
-    return available_object_ids
-
-
-def get_available_object_to_create_ids_by_user_data(user_data: ClientRoles):
+async def get_object_permissions_by_user_data(
+    user_data: ClientRoles,
+) -> ObjectPermissions:
+    """
+    Resolves the objects available to the user roles for every action with one query.
+    If any of the roles denies an action, nothing is available for this action.
+    Results are cached per role set until the permissions change
+    """
     permissions_to_search = format_user_permissions(user_data=user_data)
-
-    deny_receive_data = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "create": False}
+    cache_key = tuple(sorted(set(permissions_to_search)))
+    # read before the query, a change during the query makes the result stale
+    version = await permissions_cache.get_version()
+    object_permissions = permissions_cache.get(cache_key, version)
+    if object_permissions is not None:
+        return object_permissions
+
+    projection = {"_id": 0, **{field: 1 for field in PERMISSION_ACTIONS}}
+    projection.update({field: 1 for field in PERMISSION_ACTIONS.values()})
+    permission_records = async_db.permissions.find(
+        {"permission": {"$in": permissions_to_search}}, projection
     )
-    if [instance for instance in deny_receive_data]:
-        return []
 
-    permit_instances = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "create": True}
+    denied = set()
+    available = {action: set() for action in PERMISSION_ACTIONS}
+    async for record in permission_records:
+        for action, id_field in PERMISSION_ACTIONS.items():
+            flag = record.get(action)
+            if flag is False:
+                denied.add(action)
+            elif flag is True:
+                available[action].add(str(record.get(id_field)))
+
+    object_permissions = ObjectPermissions(
+        permissions=cache_key,
+        **{
+            action: frozenset() if action in denied else frozenset(ids)
+            for action, ids in available.items()
+        },
     )
-
-    available_object_ids = [
-        str(permission["id"]) for permission in permit_instances
-    ]
-
-    return available_object_ids
-
-
-def get_available_object_to_update_ids_by_user_data(user_data: ClientRoles):
-    permissions_to_search = format_user_permissions(user_data=user_data)
-
-    deny_receive_data = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "update": False}
-    )
-    if [instance for instance in deny_receive_data]:
-        return []
-
-    permit_instances = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "update": True}
-    )
-
-    available_object_ids = [
-        str(permission["id"]) for permission in permit_instances
-    ]
-
-    return available_object_ids
-
-
-def get_available_object_to_delete_ids_by_user_data(user_data: ClientRoles):
-    permissions_to_search = format_user_permissions(user_data=user_data)
-
-    deny_receive_data = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "delete": False}
-    )
-
-    if [instance for instance in deny_receive_data]:
-        return []
-
-    permit_instances = db.permissions.find(
-        {"permission": {"$in": permissions_to_search}, "delete": True}
-    )
-
-    available_object_ids = [
-        str(permission["id"]) for permission in permit_instances
-    ]
-
-    return available_object_ids
+    permissions_cache.set(cache_key, object_permissions, version)
+    return object_permissions
+
+
+async def get_object_permissions(
+    user_data: UserData = Depends(security),
+) -> ObjectPermissions | None:
+    """
+    Dependency resolving the object permissions once per request.
+    Returns None for administrators, who are not restricted
+    """
+    if ADMIN_ROLE in user_data.realm_access.roles:
+        return None
+    return await get_object_permissions_by_user_data(user_data.realm_access)
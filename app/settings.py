@@ -12,11 +12,25 @@ MINIO_SECURE = os.environ.get("MINIO_SECURE", "False").upper() in (
     "YES",
     "1",
 )
+# attachments of a request uploaded to MinIO at the same time
+MINIO_UPLOAD_CONCURRENCY = int(os.environ.get("MINIO_UPLOAD_CONCURRENCY", 8))
+# server-side copies of a request running at the same time
+MINIO_COPY_CONCURRENCY = int(os.environ.get("MINIO_COPY_CONCURRENCY", 8))
+# store identical attachments once, by SHA-256, with reference counting
+BLOB_DEDUPLICATION = os.environ.get("BLOB_DEDUPLICATION", "False").upper() in (
+    "TRUE",
+    "Y",
+    "YES",
+    "1",
+)
 MONGO_URL = os.environ.get("MONGO_URL", "mongodb")
 MONGO_PORT = os.environ.get("MONGO_PORT", "27017")
 MONGO_USER = os.environ.get("MONGO_USER", "documents")
 MONGO_PASSWORD = os.environ.get("MONGO_PASSWORD", "")
 MONGO_DATABASE = os.environ.get("MONGO_DATABASE", "documents")
+MONGO_CREATE_INDEXES = os.environ.get(
+    "MONGO_CREATE_INDEXES", "True"
+).upper() in ("TRUE", "Y", "YES", "1")
 
 DEBUG = os.environ.get("DEBUG", "False").upper() in ("TRUE", "Y", "YES", "1")
 
@@ -52,7 +66,21 @@ KAFKA_SECURED = str(os.environ.get("KAFKA_SECURED", False)).upper() in (
 KAFKA_PRODUCER_TOPIC = os.environ.get(
     "KAFKA_PRODUCER_TOPIC", "documents.changes"
 )
-KAFKA_PRODUCER_CONNECT_CONFIG = {"bootstrap.servers": KAFKA_URL}
+KAFKA_PRODUCER_LINGER_MS = int(os.environ.get("KAFKA_PRODUCER_LINGER_MS", 20))
+KAFKA_PRODUCER_BATCH_SIZE = int(
+    os.environ.get("KAFKA_PRODUCER_BATCH_SIZE", 65536)
+)
+KAFKA_PRODUCER_POLL_TIMEOUT = float(
+    os.environ.get("KAFKA_PRODUCER_POLL_TIMEOUT", 0.5)
+)
+KAFKA_PRODUCER_FLUSH_TIMEOUT = float(
+    os.environ.get("KAFKA_PRODUCER_FLUSH_TIMEOUT", 10)
+)
+KAFKA_PRODUCER_CONNECT_CONFIG = {
+    "bootstrap.servers": KAFKA_URL,
+    "linger.ms": KAFKA_PRODUCER_LINGER_MS,
+    "batch.size": KAFKA_PRODUCER_BATCH_SIZE,
+}
 
 KAFKA_CONSUMER_GROUP_ID = os.environ.get("KAFKA_CONSUMER_GROUP_ID", "Documents")
 KAFKA_CONSUMER_OFFSET = os.environ.get("KAFKA_CONSUMER_OFFSET", "latest")
@@ -132,5 +160,43 @@ SECURITY_MIDDLEWARE_PROTOCOL = os.environ.get(
 )
 SECURITY_TYPE = os.environ.get("SECURITY_TYPE", "KEYCLOAK-INFO")
 
+# X-TOTAL-COUNT SETTINGS
+TOTAL_COUNT_DEFAULT_MODE = os.environ.get(
+    "TOTAL_COUNT_DEFAULT_MODE", "exact"
+).lower()
+TOTAL_COUNT_CACHE_TTL = float(os.environ.get("TOTAL_COUNT_CACHE_TTL", 5))
+TOTAL_COUNT_CACHE_SIZE = int(os.environ.get("TOTAL_COUNT_CACHE_SIZE", 1000))
+
+# NDJSON SETTINGS
+NDJSON_BATCH_SIZE = int(os.environ.get("NDJSON_BATCH_SIZE", 1000))
+
+# ARCHIVE SETTINGS
+# deflate level of the attachment archives, 0 only stores the files
+ARCHIVE_COMPRESS_LEVEL = int(os.environ.get("ARCHIVE_COMPRESS_LEVEL", 1))
+
+# CONTENT PROXY SETTINGS
+# contents are streamed through the service instead of the MinIO redirect
+CONTENT_PROXY = os.environ.get("CONTENT_PROXY", "False").upper() in (
+    "TRUE",
+    "Y",
+    "YES",
+    "1",
+)
+CONTENT_PROXY_CHUNK_SIZE = int(
+    os.environ.get("CONTENT_PROXY_CHUNK_SIZE", 1024 * 1024)
+)
+
+# PRESIGNED URL CACHE SETTINGS
+# URLs are reused during windows of this many seconds, 0 disables the cache
+PRESIGNED_URL_CACHE_WINDOW = float(
+    os.environ.get("PRESIGNED_URL_CACHE_WINDOW", 60)
+)
+PRESIGNED_URL_CACHE_SIZE = int(
+    os.environ.get("PRESIGNED_URL_CACHE_SIZE", 10000)
+)
+
+# QUERY PARSER SETTINGS
+QUERY_PARSER_CACHE_SIZE = int(os.environ.get("QUERY_PARSER_CACHE_SIZE", 1024))
+
 # UVICORN SETTINGS
 UVICORN_WORKERS = os.environ.get("UVICORN_WORKERS", "")
@@ -1,19 +1,19 @@
-from pydantic import parse_obj_as
+from pydantic import TypeAdapter
 
-from database import Database, db
+from database import AsyncDatabase, async_db
 from schemas.document import Document
 
+documents_adapter = TypeAdapter(list[Document])
 
-def find_document_by_id_and_attachment_name(
-    mo_id: int, attachment_name: str, db_client: Database = db
+
+async def find_document_by_id_and_attachment_name(
+    mo_id: int, attachment_name: str, db_client: AsyncDatabase = async_db
 ) -> list[Document] | None:
     query = {
         "externalIdentifier": {"$elemMatch": {"id": str(mo_id)}},
         "attachment": {"$elemMatch": {"name": attachment_name}},
     }
-    documents = [
-        parse_obj_as(Document, i) for i in db_client.document.find(query)
-    ]
+    documents = await db_client.document.find(query).to_list(length=None)
     if not documents:
         return None
-    return documents
+    return documents_adapter.validate_python(documents)
@@ -12,7 +12,8 @@ def remove_object_latest_version(
     )
     latest_file_version = None
     for v in versions:
-        if not v.is_latest:
+        # the name is a prefix, "a/1" also lists "a/10"
+        if v.object_name != attachment_name or not v.is_latest:
             continue
         if v.is_delete_marker:
             break
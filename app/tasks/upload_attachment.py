@@ -2,12 +2,29 @@ from fastapi import UploadFile
 from minio import Minio
 
 import settings
+from utils.blob_store import store_blob
 
 
 def upload_attachment(
     client: Minio, document_id: str, attachment_id: str, file: UploadFile
-):
+) -> str | None:
+    """
+    :return: the blob linked to the attachment before, with BLOB_DEDUPLICATION
+    """
     object_name = f"{document_id}/{attachment_id}"
+    if settings.BLOB_DEDUPLICATION:
+
+        def open_data():
+            file.file.seek(0)
+            return file.file
+
+        return store_blob(
+            client=client,
+            object_name=object_name,
+            open_data=open_data,
+            length=file.size,
+            content_type=file.content_type,
+        )
     client.put_object(
         bucket_name=settings.MINIO_BUCKET,
         object_name=object_name,
@@ -15,3 +32,4 @@ def upload_attachment(
         length=file.size,
         content_type=file.content_type,
     )
+    return None
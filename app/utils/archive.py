@@ -0,0 +1,141 @@
+import io
+import posixpath
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Iterator
+
+from minio import Minio, S3Error
+from urllib3 import BaseHTTPResponse
+
+import settings
+
+ZIP_MEDIA_TYPE = "application/zip"
+
+
+class _ArchiveOutput(io.RawIOBase):
+    """
+    Unseekable output of the zip writer, keeps the written bytes until
+    they are sent. Data descriptors are written after every file then
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def get_archive_files(documents: list[dict]) -> list[tuple[str, str]]:
+    """
+    Returns the archive name and the object name of every attachment.
+    Repeated attachment names get a number, like "name (2).pdf"
+    """
+    files = []
+    names = set()
+    for document in documents:
+        for attachment in document.get("attachment") or []:
+            name = posixpath.basename(attachment.get("name") or "content")
+            stem, extension = posixpath.splitext(name)
+            number = 1
+            while name in names:
+                number += 1
+                name = f"{stem} ({number}){extension}"
+            names.add(name)
+            files.append((name, f"{document['id']}/{attachment['id']}"))
+    return files
+
+
+def _set_compression(info: zipfile.ZipInfo, level: int):
+    """
+    ZipFile.open writes with the level of the ZipInfo, not with
+    the compresslevel of the ZipFile
+    """
+    if level == 0:
+        info.compress_type = zipfile.ZIP_STORED
+        return
+    info.compress_type = zipfile.ZIP_DEFLATED
+    if "compress_level" in zipfile.ZipInfo.__slots__:
+        # Python 3.13+
+        info.compress_level = level
+    else:
+        info._compresslevel = level
+
+
+def _open_object(client: Minio, object_name: str) -> BaseHTTPResponse | None:
+    try:
+        return client.get_object(settings.MINIO_BUCKET, object_name)
+    except S3Error as e:
+        # removed content is skipped
+        print(e)
+        return None
+
+
+def _close(response: BaseHTTPResponse | None):
+    if response is not None:
+        response.close()
+        response.release_conn()
+
+
+def iterate_archive(
+    client: Minio, files: list[tuple[str, str]]
+) -> Iterator[bytes]:
+    """
+    Yields a zip archive of the MinIO objects as it is written.
+    Objects are read in CONTENT_PROXY_CHUNK_SIZE chunks and the next object
+    is requested while the current one is written, so the archive is never
+    held in memory or on disk
+    :param client: minio client
+    :param files: archive name and object name of the files
+    """
+    output = _ArchiveOutput()
+    executor = ThreadPoolExecutor(max_workers=1)
+    following: Future | None = None
+    response = None
+    try:
+        with zipfile.ZipFile(output, "w") as archive:
+            if files:
+                following = executor.submit(_open_object, client, files[0][1])
+            for index, (name, _) in enumerate(files):
+                response = following.result()
+                following = None
+                if index + 1 < len(files):
+                    following = executor.submit(
+                        _open_object, client, files[index + 1][1]
+                    )
+                if response is None:
+                    continue
+                info = zipfile.ZipInfo(name)
+                last_modified = response.headers.get("last-modified")
+                if last_modified:
+                    info.date_time = parsedate_to_datetime(
+                        last_modified
+                    ).timetuple()[:6]
+                _set_compression(info, settings.ARCHIVE_COMPRESS_LEVEL)
+                info.file_size = int(response.headers.get("content-length", 0))
+                with archive.open(info, "w") as entry:
+                    for chunk in response.stream(
+                        settings.CONTENT_PROXY_CHUNK_SIZE
+                    ):
+                        entry.write(chunk)
+                        yield output.pop()
+                _close(response)
+                response = None
+        # the central directory
+        yield output.pop()
+    finally:
+        # the client may disconnect in the middle of the archive
+        _close(response)
+        if following is not None:
+            _close(following.result())
+        executor.shutdown(wait=False)
@@ -0,0 +1,37 @@
+import base64
+import binascii
+
+
+def get_decoded_length(content: str) -> int:
+    """
+    Returns the size of the decoded base64 content without decoding it
+    :raise binascii.Error: the content length is not a multiple of 4
+    """
+    if len(content) % 4:
+        raise binascii.Error("Incorrect padding")
+    return len(content) // 4 * 3 - content[-2:].count("=")
+
+
+class Base64Reader:
+    """
+    File-like reader decoding base64 content by parts, as they are read.
+    Only the requested part is decoded, so the memory of an upload does not
+    depend on the size of the content
+    """
+
+    def __init__(self, content: str):
+        self._content = content
+        self._position = 0
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = get_decoded_length(self._content)
+        while len(self._buffer) < size and self._position < len(self._content):
+            # 4 characters are decoded into 3 bytes
+            chars = -(-(size - len(self._buffer)) // 3) * 4
+            chunk = self._content[self._position : self._position + chars]
+            self._position += len(chunk)
+            self._buffer += base64.b64decode(chunk, validate=True)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
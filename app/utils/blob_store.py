@@ -0,0 +1,229 @@
+import hashlib
+import time
+from collections import Counter
+from typing import BinaryIO, Callable
+
+from minio import Minio
+from minio.deleteobjects import DeleteObject
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+import settings
+from database import async_db, db
+from schemas.base_model import BLOB_NAMESPACE
+
+# blobs are stored by the SHA-256 of the content, the namespace cannot be
+# a document or a specification ID, so the names do not collide
+BLOB_PREFIX = f"{BLOB_NAMESPACE}/"
+_HASH_CHUNK_SIZE = 1024 * 1024
+# state of a blob whose object is being removed
+BLOB_REMOVING = "removing"
+# a new reference of a blob being removed waits up to 5 seconds
+BLOB_REMOVAL_WAIT = 0.1
+BLOB_REMOVAL_ATTEMPTS = 50
+
+
+def get_blob_object_name(digest: str) -> str:
+    return f"{BLOB_PREFIX}{digest}"
+
+
+def _hash_content(data: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    while chunk := data.read(_HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reference_blob(digest: str, length: int) -> dict | None:
+    """
+    Adds a reference to the blob, creating it if needed. A blob that is
+    being removed cannot be referenced, the reference waits for the removal
+    :return: the blob before the reference, None if it was created
+    """
+    for _ in range(BLOB_REMOVAL_ATTEMPTS):
+        try:
+            return db.blobs.find_one_and_update(
+                {"_id": digest, "state": {"$ne": BLOB_REMOVING}},
+                {
+                    "$inc": {"refs": 1},
+                    "$setOnInsert": {"size": length, "stored": False},
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # the upsert of a blob in the removing state
+            time.sleep(BLOB_REMOVAL_WAIT)
+    raise RuntimeError(f"Blob {digest} is still being removed")
+
+
+def store_blob(
+    client: Minio,
+    object_name: str,
+    open_data: Callable[[], BinaryIO],
+    length: int,
+    content_type: str | None = None,
+) -> str | None:
+    """
+    Stores the content once per SHA-256 and links the object name to it.
+    The content is read twice: hashed first, then uploaded if the blob
+    does not exist. The blob the object name was linked to is not released,
+    so the change can be reverted (see release_blob and restore_link)
+    :param client: minio client
+    :param object_name: object name of the content, "{document_id}/{attachment_id}"
+    :param open_data: returns a new reader of the content
+    :param length: content size
+    :param content_type: content mime type
+    :return: the blob linked to the object name before, None if there was none
+    """
+    digest = _hash_content(open_data())
+    blob = _reference_blob(digest, length)
+    # the reference keeps the blob from being removed; a blob referenced
+    # before is already uploaded unless its first upload is in progress
+    if blob is None or not blob.get("stored", True):
+        try:
+            client.put_object(
+                bucket_name=settings.MINIO_BUCKET,
+                object_name=get_blob_object_name(digest),
+                data=open_data(),
+                length=length,
+                content_type=content_type or "application/octet-stream",
+            )
+        except Exception:
+            release_blob(client, digest)
+            raise
+        db.blobs.update_one({"_id": digest}, {"$set": {"stored": True}})
+    previous = db.blob_links.find_one_and_update(
+        {"_id": object_name}, {"$set": {"blob": digest}}, upsert=True
+    )
+    return previous["blob"] if previous else None
+
+
+def link_blobs(copies: list[tuple[str, str]]) -> set[str]:
+    """
+    Copies the contents without copying data: the object names are linked
+    to the blobs of the source names, in one write per collection
+    :param copies: source and new target object names
+    :return: the target names linked, the other sources are not blobs
+    """
+    if not copies:
+        return set()
+    source_blobs = {
+        link["_id"]: link["blob"]
+        for link in db.blob_links.find(
+            {"_id": {"$in": list({source for source, _ in copies})}}
+        )
+    }
+    links = {
+        target: source_blobs[source]
+        for source, target in copies
+        if source in source_blobs
+    }
+    if not links:
+        return set()
+    refs = Counter(links.values())
+    db.blobs.bulk_write(
+        [
+            UpdateOne({"_id": digest}, {"$inc": {"refs": count}})
+            for digest, count in refs.items()
+        ],
+        ordered=False,
+    )
+    db.blob_links.insert_many(
+        [{"_id": target, "blob": digest} for target, digest in links.items()],
+        ordered=False,
+    )
+    return set(links)
+
+
+def release_blob(client: Minio, digest: str, count: int = 1):
+    """
+    Drops count references of the blob, the last one removes the blob.
+    The blob is marked as removing while its object is removed, a store_blob
+    of the same content waits for the removal and uploads the content again
+    """
+    blob = db.blobs.find_one_and_update(
+        {"_id": digest},
+        {"$inc": {"refs": -count}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if blob is None or blob["refs"] > 0:
+        return
+    # no reference can be added from here until the blob is deleted
+    removing = db.blobs.update_one(
+        {"_id": digest, "refs": {"$lte": 0}, "state": {"$ne": BLOB_REMOVING}},
+        {"$set": {"state": BLOB_REMOVING}},
+    )
+    if not removing.modified_count:
+        return
+    try:
+        client.remove_object(
+            bucket_name=settings.MINIO_BUCKET,
+            object_name=get_blob_object_name(digest),
+        )
+    except Exception:
+        db.blobs.update_one(
+            {"_id": digest, "state": BLOB_REMOVING}, {"$unset": {"state": ""}}
+        )
+        raise
+    db.blobs.delete_one({"_id": digest, "state": BLOB_REMOVING})
+
+
+def unlink_blobs(client: Minio, object_names: list[str]) -> list[str]:
+    """
+    Unlinks the object names from their blobs and releases the blobs
+    :return: the object names that are not linked, their objects are stored
+    by name and must be removed by the caller
+    """
+    if not object_names:
+        return object_names
+    links = {
+        link["_id"]: link["blob"]
+        for link in db.blob_links.find({"_id": {"$in": object_names}})
+    }
+    if not links:
+        return object_names
+    db.blob_links.delete_many({"_id": {"$in": list(links)}})
+    for digest, count in Counter(links.values()).items():
+        release_blob(client, digest, count)
+    return [name for name in object_names if name not in links]
+
+
+def remove_contents(client: Minio, object_names: list[str]):
+    """
+    Removes the contents: blobs are released, other objects are removed
+    """
+    object_names = unlink_blobs(client, object_names)
+    if object_names:
+        # removal is lazy, errors are returned while iterating
+        errors = client.remove_objects(
+            settings.MINIO_BUCKET,
+            delete_object_list=[DeleteObject(name) for name in object_names],
+        )
+        for error in errors:
+            print(error)
+
+
+def restore_link(client: Minio, object_name: str, previous: str | None):
+    """Reverts store_blob: links the object name back to the previous blob"""
+    if previous is None:
+        unlink_blobs(client, [object_name])
+        return
+    link = db.blob_links.find_one_and_update(
+        {"_id": object_name}, {"$set": {"blob": previous}}
+    )
+    if link is not None:
+        release_blob(client, link["blob"])
+
+
+async def resolve_object_names(object_names: list[str]) -> dict[str, str]:
+    """
+    Returns the object names in MinIO: the blob of linked names,
+    the same name for the rest
+    """
+    if not object_names:
+        return {}
+    links = async_db.blob_links.find({"_id": {"$in": object_names}})
+    resolved = {name: name for name in object_names}
+    async for link in links:
+        resolved[link["_id"]] = get_blob_object_name(link["blob"])
+    return resolved
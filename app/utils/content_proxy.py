@@ -0,0 +1,84 @@
+import re
+from typing import Iterator
+from urllib.parse import quote
+
+from minio import Minio
+
+import settings
+
+_range_pattern = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Returns the first and the last byte of a single "bytes" range.
+    None means the whole content: no header, several ranges or another unit
+    :raise RangeNotSatisfiable: the range is outside the content
+    """
+    if not header:
+        return None
+    match = _range_pattern.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # the last bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = size - 1 if not end else min(int(end), size - 1)
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Checks an If-None-Match header, weak tags are compared by value"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in tags
+
+
+def get_content_disposition(file_name: str) -> str:
+    """Header value with the file name encoded by RFC 5987"""
+    return f"inline; filename*=UTF-8''{quote(file_name)}"
+
+
+def iterate_object(
+    client: Minio,
+    object_name: str,
+    etag: str,
+    start: int = 0,
+    length: int = 0,
+    version_id: str | None = None,
+) -> Iterator[bytes]:
+    """
+    Yields the object from MinIO in CONTENT_PROXY_CHUNK_SIZE chunks.
+    The next chunk is read only when the previous one is sent, so the memory
+    does not depend on the object size and a slow client slows the reading.
+    If-Match keeps the chunks of the checked version only
+    """
+    response = client.get_object(
+        settings.MINIO_BUCKET,
+        object_name,
+        offset=start,
+        length=length,
+        version_id=version_id,
+        request_headers={"If-Match": etag},
+    )
+    try:
+        yield from response.stream(settings.CONTENT_PROXY_CHUNK_SIZE)
+    finally:
+        response.close()
+        response.release_conn()
@@ -1,56 +1,134 @@
-import base64
-import io
+import binascii
 import sys
+from functools import partial
 
-import pydantic
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from starlette.datastructures import URL
 
 import settings
-from database import db
+from database import async_db
 from file_server import minio_client
+from schemas.attachment_ref_or_value import AttachmentRefOrValue
 from schemas.document import Document, ChangeDocument
 from schemas.document_specification import (
     DocumentSpecification,
     ChangeDocumentSpecification,
 )
 from schemas.document_status_type import DocumentStatusType
+from utils.base64_stream import Base64Reader, get_decoded_length
 from settings import API_VERSION
+from utils.blob_store import (
+    release_blob,
+    remove_contents,
+    restore_link,
+    store_blob,
+    unlink_blobs,
+)
+from utils.document_counts import update_document_counts
 from utils.merge_json import merge
+from utils.parallel import run_in_parallel
+from utils.presigned_urls import stamp_content_version
+
+
+def _upload_content(
+    object_name: str, attachment: AttachmentRefOrValue
+) -> str | None:
+    """
+    :return: the blob linked to the object name before with BLOB_DEDUPLICATION,
+    the version of the uploaded object otherwise
+    """
+    try:
+        length = get_decoded_length(attachment.content)
+        if settings.BLOB_DEDUPLICATION:
+            return store_blob(
+                client=minio_client(),
+                object_name=object_name,
+                open_data=lambda: Base64Reader(attachment.content),
+                length=length,
+                content_type=attachment.mime_type,
+            )
+        # the content is decoded part by part while it is uploaded,
+        # large attachments are sent with a multipart upload
+        result = minio_client().put_object(
+            bucket_name=settings.MINIO_BUCKET,
+            object_name=object_name,
+            data=Base64Reader(attachment.content),
+            length=length,
+            content_type=attachment.mime_type,
+        )
+        return result.version_id
+    except binascii.Error as e:
+        print(e, file=sys.stderr)
+        raise HTTPException(
+            status_code=422, detail="Content is not valid base64"
+        )
+    except Exception as e:
+        print(e, file=sys.stderr)
+        raise HTTPException(
+            status_code=422, detail="The file could not be saved"
+        )
 
 
 def replace_content_with_link(
     document: Document | DocumentSpecification, base_url
 ):
+    """
+    Uploads the content of the attachments to MinIO in parallel and replaces
+    it with the content URL. If an upload fails, the uploaded objects
+    are removed, so the attachments are saved all or none
+    """
     if document.attachment is None:
         return
-    for attachment in document.attachment:
-        if attachment.content is not None:
-            decoded_attachment = base64.b64decode(
-                attachment.content, validate=True
-            )
-            buf = io.BytesIO(decoded_attachment)
-            try:
-                attachment.mime_type.encode("latin-1")
-            except Exception as e:
-                print(e, file=sys.stderr)
-                raise HTTPException(status_code=422, detail="Mime type error")
-            try:
-                minio_client().put_object(
+    attachments = [
+        attachment
+        for attachment in document.attachment
+        if attachment.content is not None
+    ]
+    for attachment in attachments:
+        try:
+            attachment.mime_type.encode("latin-1")
+        except Exception as e:
+            print(e, file=sys.stderr)
+            raise HTTPException(status_code=422, detail="Mime type error")
+
+    object_names = [
+        f"{document.id}/{attachment.id}" for attachment in attachments
+    ]
+    # the blobs linked before or the uploaded versions, by index
+    uploaded, error = run_in_parallel(
+        [
+            partial(_upload_content, object_name, attachment)
+            for object_name, attachment in zip(object_names, attachments)
+        ],
+        max_workers=settings.MINIO_UPLOAD_CONCURRENCY,
+    )
+    if error is not None:
+        for index, result in uploaded.items():
+            object_name = object_names[index]
+            if settings.BLOB_DEDUPLICATION:
+                restore_link(minio_client(), object_name, result)
+            else:
+                # the bucket is versioned, removing the uploaded version
+                # brings back the replaced content
+                minio_client().remove_object(
                     bucket_name=settings.MINIO_BUCKET,
-                    object_name=f"{document.id}/{attachment.id}",
-                    data=buf,
-                    length=buf.getbuffer().nbytes,
-                    content_type=attachment.mime_type,
+                    object_name=object_name,
+                    version_id=result,
                 )
-            except Exception as e:
-                print(e, file=sys.stderr)
-                raise HTTPException(
-                    status_code=422, detail="The file could not be saved"
-                )
-            attachment.content = None
-            print(base_url)
-            attachment.url = f"{base_url}v{API_VERSION}/content/{document.id}/{attachment.id}"
+        raise error
+    if settings.BLOB_DEDUPLICATION:
+        # replaced contents
+        for previous in uploaded.values():
+            if previous is not None:
+                release_blob(minio_client(), previous)
+
+    print(base_url)
+    for attachment in attachments:
+        attachment.content = None
+        attachment.url = (
+            f"{base_url}v{API_VERSION}/content/{document.id}/{attachment.id}"
+        )
     return document
 
 
@@ -65,9 +143,14 @@ def drop_old_content(
         return
 
     if new_document is None:
+        unlink_blobs(
+            minio_client(),
+            [f"{old_document.id}/{att.id}" for att in old_document.attachment],
+        )
         objects_to_delete = minio_client().list_objects(
             bucket_name=settings.MINIO_BUCKET,
-            prefix=old_document.id,
+            # "a" must not list the contents of "ab"
+            prefix=f"{old_document.id}/",
             recursive=True,
         )
         for obj in objects_to_delete:
@@ -80,22 +163,26 @@ def drop_old_content(
         new_att = []
     else:
         new_att = [att.id for att in new_document.attachment]
-    for old_att in old_document.attachment:
-        if old_att.id not in new_att:
-            minio_client().remove_object(
-                bucket_name=settings.MINIO_BUCKET,
-                object_name=f"{old_document.id}/{old_att.id}",
-            )
+    remove_contents(
+        minio_client(),
+        [
+            f"{old_document.id}/{old_att.id}"
+            for old_att in old_document.attachment
+            if old_att.id not in new_att
+        ],
+    )
 
 
-def drop_document_data(document: dict, base_url: str | URL, document_id: str):
-    document = pydantic.parse_obj_as(Document, document)
-    drop_old_content(document)
+async def drop_document_data(
+    document: dict, base_url: str | URL, document_id: str
+):
+    document = Document.model_validate(document)
+    await run_in_threadpool(drop_old_content, document)
     changed_document = ChangeDocument(status=DocumentStatusType.DELETED)
-    old_document = db.document.find_one({"id": document_id})
+    old_document = await async_db.document.find_one({"id": document_id})
     if old_document is None:
         raise HTTPException(status_code=404, detail="Document not found")
-    patch_document_data(
+    await patch_document_data(
         old_document=old_document,
         document=changed_document,
         base_url=base_url,
@@ -103,22 +190,28 @@ def drop_document_data(document: dict, base_url: str | URL, document_id: str):
     )
 
 
-def patch_document_data(
+async def patch_document_data(
     document: ChangeDocument,
     old_document: dict | Document,
     base_url: str | URL,
     document_id: str,
 ):
     new_document = merge(
-        old_document, document.dict(by_alias=True, exclude_unset=True)
+        old_document, document.model_dump(by_alias=True, exclude_unset=True)
     )
     old_document = Document(**old_document)
     new_document = Document(**new_document)
 
-    drop_old_content(old_document, new_document)
-
-    replace_content_with_link(new_document, base_url)
-    db.document.replace_one(
-        {"id": document_id}, new_document.dict(exclude_none=True, by_alias=True)
+    # MinIO client is synchronous
+    await run_in_threadpool(drop_old_content, old_document, new_document)
+    await run_in_threadpool(replace_content_with_link, new_document, base_url)
+    await async_db.document.replace_one(
+        {"id": document_id},
+        stamp_content_version(
+            new_document.model_dump(exclude_none=True, by_alias=True)
+        ),
+    )
+    await update_document_counts(
+        old_documents=[old_document], new_documents=[new_document]
     )
     return new_document
@@ -0,0 +1,242 @@
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from database import async_db
+from schemas.document import Document
+from schemas.document_status_type import DocumentStatusType
+
+COUNTED_STATUS = DocumentStatusType.CREATED.value
+SEQUENCE_ID = "document_counts"
+DUPLICATE_KEY_ERROR = 11000
+# counters written by one request of the rebuild
+REBUILD_BATCH_SIZE = 10000
+# a write that takes longer is not waited for by the readers
+COUNTS_WRITE_LEASE = timedelta(minutes=1)
+# the grouping of all the documents comes before the first batch
+REBUILD_LEASE = timedelta(hours=1)
+
+
+def get_counted_object_id(document: Document) -> str | None:
+    """
+    Returns the object the document is counted for: the first external identifier
+    of a document in the "created" status
+    """
+    if document.status != COUNTED_STATUS:
+        return None
+    if not document.external_identifier:
+        return None
+    return document.external_identifier[0].id
+
+
+def get_counted_objects(documents: Iterable[Document]) -> Counter:
+    counted_objects = Counter()
+    for document in documents:
+        object_id = get_counted_object_id(document)
+        if object_id is not None:
+            counted_objects[object_id] += 1
+    return counted_objects
+
+
+def _lease_expiry(lease: timedelta) -> datetime:
+    return datetime.now(timezone.utc) + lease
+
+
+@asynccontextmanager
+async def counts_write(lease: timedelta = COUNTS_WRITE_LEASE):
+    """
+    Allocates the watermark of a change of the "document_counts" collection.
+    The write holds a lease in "count_writers" until the block ends, the
+    watermark stops before the oldest lease (see get_sequence_state).
+    The lease is taken before the watermark, so no watermark is allocated
+    without a lease. A process stopped inside the block leaves its lease
+    until it expires
+    :param lease: time after which the write is not waited for
+    """
+    writer = await async_db.count_writers.insert_one(
+        {"expires": _lease_expiry(lease)}
+    )
+    try:
+        state = await async_db.sequences.find_one_and_update(
+            {"_id": SEQUENCE_ID},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        await async_db.count_writers.update_one(
+            {"_id": writer.inserted_id}, {"$set": {"sequence": state["value"]}}
+        )
+        yield state["value"]
+    finally:
+        await async_db.count_writers.delete_one({"_id": writer.inserted_id})
+
+
+async def renew_counts_write(sequence: int, lease: timedelta):
+    """Extends the lease of a long write, like the rebuild"""
+    await async_db.count_writers.update_one(
+        {"sequence": sequence}, {"$set": {"expires": _lease_expiry(lease)}}
+    )
+
+
+async def get_sequence_state() -> tuple[int, int]:
+    """
+    Returns the watermark every change up to which is written and the watermark
+    of the last rebuild or prune.
+    The watermark is the last allocated one, but before the oldest running
+    write. A write that is taking its watermark may get any newer one, the
+    stored watermark is kept until then
+    """
+    sequence = await async_db.sequences.find_one({"_id": SEQUENCE_ID}) or {}
+    stored = sequence.get("stable", 0)
+    rebuilt = sequence.get("rebuilt", 0)
+    stable = sequence.get("value", 0)
+    leases = async_db.count_writers.find(
+        {"expires": {"$gt": datetime.now(timezone.utc)}}
+    )
+    async for lease in leases:
+        if lease.get("sequence") is None:
+            return stored, rebuilt
+        stable = min(stable, lease["sequence"] - 1)
+    if stable <= stored:
+        return stored, rebuilt
+    await async_db.sequences.update_one(
+        {"_id": SEQUENCE_ID}, {"$max": {"stable": stable}}
+    )
+    return stable, rebuilt
+
+
+def get_count_pipeline(match: dict) -> list[dict]:
+    """Counts the documents per object, for the documents matching the filter"""
+    return [
+        {"$match": {**match, "status": COUNTED_STATUS}},
+        {
+            "$project": {
+                "_id": 0,
+                "object": {"$arrayElemAt": ["$externalIdentifier", 0]},
+            }
+        },
+        {"$group": {"_id": "$object.id", "count": {"$sum": 1}}},
+        {"$match": {"_id": {"$ne": None}}},
+    ]
+
+
+def set_count(object_id: str, count: int, sequence: int) -> UpdateOne:
+    """
+    Sets the counter unless it was set with a newer watermark: a count taken
+    with a newer watermark includes all the writes of the older ones
+    """
+    return UpdateOne(
+        {"_id": object_id, "sequence": {"$lt": sequence}},
+        {"$set": {"count": count, "sequence": sequence}},
+        upsert=True,
+    )
+
+
+async def write_counts(operations: list[UpdateOne]):
+    if not operations:
+        return
+    try:
+        await async_db.document_counts.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # the upsert of a counter set with a newer watermark
+        if any(
+            error["code"] != DUPLICATE_KEY_ERROR
+            for error in e.details["writeErrors"]
+        ):
+            raise
+
+
+async def apply_counted_objects_diff(before: Counter, after: Counter):
+    """
+    Recounts the objects changed between before and after in the "document_counts"
+    collection. The counters are counted again instead of incremented, so concurrent
+    writes and rebuilds cannot make them drift.
+    Counters that dropped to zero are kept until the next prune so that they are
+    reported by the incremental GetObjectDocumentCount
+    """
+    object_ids = [
+        object_id
+        for object_id in before.keys() | after.keys()
+        if before.get(object_id, 0) != after.get(object_id, 0)
+    ]
+    if not object_ids:
+        return
+    async with counts_write() as sequence:
+        # the documents are written before the watermark is taken
+        pipeline = get_count_pipeline(
+            {
+                "externalIdentifier.id": {"$in": object_ids},
+                "externalIdentifier.0.id": {"$in": object_ids},
+            }
+        )
+        counts = {object_id: 0 for object_id in object_ids}
+        async for group in async_db.document.aggregate(pipeline):
+            counts[group["_id"]] = group["count"]
+        await write_counts(
+            [
+                set_count(object_id, count, sequence)
+                for object_id, count in counts.items()
+            ]
+        )
+
+
+async def update_document_counts(
+    old_documents: Iterable[Document] = (),
+    new_documents: Iterable[Document] = (),
+):
+    """
+    Keeps the "document_counts" collection in line with a write.
+    :param old_documents: documents as they were before the write (removed or replaced)
+    :param new_documents: documents as they are after the write (inserted or replacements)
+    """
+    await apply_counted_objects_diff(
+        before=get_counted_objects(old_documents),
+        after=get_counted_objects(new_documents),
+    )
+
+
+async def rebuild_document_counts():
+    """
+    Recomputes the "document_counts" collection from the documents on the MongoDB side.
+    Counters set by concurrent writes with newer watermarks are kept, counters of
+    objects left without documents are removed.
+    Incremental requests with a watermark older than the rebuild get the full map
+    """
+    async with counts_write(REBUILD_LEASE) as sequence:
+        counts = async_db.document.aggregate(
+            get_count_pipeline({"externalIdentifier.id": {"$exists": True}}),
+            allowDiskUse=True,
+        )
+        operations = []
+        async for group in counts:
+            operations.append(set_count(group["_id"], group["count"], sequence))
+            if len(operations) >= REBUILD_BATCH_SIZE:
+                await write_counts(operations)
+                await renew_counts_write(sequence, REBUILD_LEASE)
+                operations = []
+        await write_counts(operations)
+        # not found by the rebuild and not changed since it started
+        await async_db.document_counts.delete_many(
+            {"sequence": {"$lt": sequence}}
+        )
+    await async_db.sequences.update_one(
+        {"_id": SEQUENCE_ID}, {"$max": {"rebuilt": sequence}}
+    )
+
+
+async def prune_document_counts():
+    """
+    Removes the counters of objects left without documents.
+    Incremental requests older than the removed zeros get the full map
+    """
+    stable, _ = await get_sequence_state()
+    await async_db.document_counts.delete_many(
+        {"count": {"$lte": 0}, "sequence": {"$lte": stable}}
+    )
+    await async_db.sequences.update_one(
+        {"_id": SEQUENCE_ID}, {"$max": {"rebuilt": stable}}
+    )
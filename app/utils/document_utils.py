@@ -1,3 +1,13 @@
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from database import async_db
+from security.security_config import PERMISSION_FILTER_STRATEGY
+from security.security_data_models import ObjectPermissions
+
+PERMITTED_FIELD = "_permitted"
+OBJECT_IDS_FIELD = "_object_ids"
+
+
 def add_to_query_permission_filter(
     filter_query: dict, available_object_ids_by_permission: list[int]
 ) -> dict:
@@ -19,5 +29,163 @@ def add_to_query_permission_filter(
     return filter_query
 
 
+def use_permission_lookup(object_permissions: ObjectPermissions | None):
+    """
+    The lookup is used only if it is selected and there are permitted objects:
+    an empty set means the read is denied or nothing is permitted, and "$in" is cheap then
+    """
+    return (
+        object_permissions is not None
+        and PERMISSION_FILTER_STRATEGY == "LOOKUP"
+        and bool(object_permissions.read)
+    )
+
+
+def get_permission_lookup_stages(
+    object_permissions: ObjectPermissions,
+) -> list[dict]:
+    """
+    Aggregation stages keeping documents that are not linked to objects or are linked to
+    an object readable by the user. Permissions are joined on the MongoDB side instead of
+    sending all permitted object IDs in the query.
+    The object IDs are converted to the numeric type of parent_id once per document,
+    so the join is an equality on the indexed parent_id
+    """
+    return [
+        {
+            "$set": {
+                OBJECT_IDS_FIELD: {
+                    "$map": {
+                        "input": {"$ifNull": ["$externalIdentifier.id", []]},
+                        "in": {
+                            "$convert": {
+                                "input": "$$this",
+                                "to": "long",
+                                "onError": None,
+                                "onNull": None,
+                            }
+                        },
+                    }
+                }
+            }
+        },
+        {
+            "$lookup": {
+                "from": async_db.permissions.name,
+                "localField": OBJECT_IDS_FIELD,
+                "foreignField": "parent_id",
+                "as": PERMITTED_FIELD,
+            }
+        },
+        {
+            "$match": {
+                "$or": [
+                    {"externalIdentifier.id": None},
+                    {
+                        PERMITTED_FIELD: {
+                            "$elemMatch": {
+                                "permission": {
+                                    "$in": list(object_permissions.permissions)
+                                },
+                                "read": True,
+                            }
+                        }
+                    },
+                ]
+            }
+        },
+        {"$unset": [OBJECT_IDS_FIELD, PERMITTED_FIELD]},
+    ]
+
+
+def find_permitted_documents(
+    filters: dict,
+    object_permissions: ObjectPermissions | None,
+    fields: list[str] | None = None,
+    offset: int | None = None,
+    limit: int | None = None,
+    sort: list[tuple[str, int]] | None = None,
+    collection: AsyncIOMotorCollection = None,
+):
+    """
+    Finds documents readable by the user with the selected permission filter strategy
+    :param filters: mongo filter
+    :param object_permissions: permissions of the user, None for administrators
+    :param fields: fields to return, all if empty
+    :param offset: number of documents to skip
+    :param limit: maximum number of documents to return
+    :param sort: list of (key, direction) pairs
+    :param collection: collection with documents
+    :return: cursor
+    """
+    if collection is None:
+        collection = async_db.document
+    if not use_permission_lookup(object_permissions):
+        if object_permissions is not None:
+            filters = add_to_query_permission_filter(
+                filter_query=filters,
+                available_object_ids_by_permission=object_permissions.read,
+            )
+        cursor = collection.find(filters, fields or None)
+        if sort:
+            cursor = cursor.sort(sort)
+        if offset:
+            cursor = cursor.skip(offset)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    pipeline = [{"$match": filters}]
+    if sort:
+        pipeline.append({"$sort": dict(sort)})
+    pipeline.extend(get_permission_lookup_stages(object_permissions))
+    if fields:
+        pipeline.append({"$project": {field: 1 for field in fields}})
+    if offset:
+        pipeline.append({"$skip": offset})
+    if limit:
+        pipeline.append({"$limit": limit})
+    return collection.aggregate(pipeline)
+
+
+async def find_one_permitted_document(
+    filters: dict,
+    object_permissions: ObjectPermissions | None,
+    fields: list[str] | None = None,
+    collection: AsyncIOMotorCollection = None,
+) -> dict | None:
+    documents = find_permitted_documents(
+        filters=filters,
+        object_permissions=object_permissions,
+        fields=fields,
+        limit=1,
+        collection=collection,
+    )
+    documents = await documents.to_list(length=1)
+    return documents[0] if documents else None
+
+
+async def count_permitted_documents(
+    filters: dict,
+    object_permissions: ObjectPermissions | None,
+    collection: AsyncIOMotorCollection = None,
+) -> int:
+    if collection is None:
+        collection = async_db.document
+    if not use_permission_lookup(object_permissions):
+        if object_permissions is not None:
+            filters = add_to_query_permission_filter(
+                filter_query=filters,
+                available_object_ids_by_permission=object_permissions.read,
+            )
+        return await collection.count_documents(filters)
+
+    pipeline = [{"$match": filters}]
+    pipeline.extend(get_permission_lookup_stages(object_permissions))
+    pipeline.append({"$count": "count"})
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    return result[0]["count"] if result else 0
+
+
 class DocumentNotExists(Exception):
     pass
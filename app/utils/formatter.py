@@ -1,11 +1,28 @@
 import abc
 from abc import abstractmethod
-# from dateutil.parser import parse as date_parse
+from datetime import datetime
+
+from functools import lru_cache
+
+from pydantic import BaseModel, TypeAdapter
+
+from schemas.base_model import get_alias, get_item_type
+
+# field types stored in MongoDB as non-string values
+COERCED_TYPES = (datetime, bool, int, float)
+
+
+@lru_cache
+def _get_adapter(field_type: type) -> TypeAdapter:
+    return TypeAdapter(field_type)
 
 
 class AbstractFormatter(abc.ABC):
     __separators = (";", "&")
 
+    def __init__(self, pydantic_model: type[BaseModel] | None = None):
+        self.pydantic_model = pydantic_model
+
     def format(self, value1, operator, value2):
         if operator in AbstractFormatter.__separators:
             return self.separator_formatter(value1, operator, value2)
@@ -44,41 +61,105 @@ class MongoFormatter(AbstractFormatter):
 
     separators = {";": "$or", "&": "$and"}
 
+    def __init__(self, pydantic_model: type[BaseModel] | None = None):
+        super().__init__(pydantic_model)
+        self._field_types = {}
+
     @staticmethod
     def _name_formatter(raw_data: list[str]) -> str:
         return ".".join(raw_data)
 
     @staticmethod
-    def _value_formatter(raw_data: list[str]):
+    def _value_formatter(raw_data: list):
         return raw_data[0] if len(raw_data) == 1 else raw_data
 
+    @staticmethod
+    def _resolve_field_type(model: type[BaseModel] | None, name: list[str]):
+        """
+        Returns the declared type of the (nested) field by its aliases,
+        None if the model does not describe it
+        """
+        field_type = None
+        for part in name:
+            if model is None:
+                return None
+            field = next(
+                (
+                    f
+                    for n, f in model.model_fields.items()
+                    if get_alias(n, f) == part
+                ),
+                None,
+            )
+            if field is None:
+                return None
+            field_type = get_item_type(field.annotation)
+            if not (
+                isinstance(field_type, type)
+                and issubclass(field_type, BaseModel)
+            ):
+                model = None
+            else:
+                model = field_type
+        return field_type
+
+    def _get_field_type(self, name: list[str]):
+        key = tuple(name)
+        if key not in self._field_types:
+            self._field_types[key] = self._resolve_field_type(
+                self.pydantic_model, name
+            )
+        return self._field_types[key]
+
+    @staticmethod
+    def _coerce_datetime(value: str) -> datetime:
+        """
+        Accepts ISO dates and datetimes only, a date means its midnight.
+        The dates are stored as naive local time, so a time zone is converted
+        to it
+        """
+        try:
+            float(value)
+        except ValueError:
+            pass
+        else:
+            raise ValueError(f"{value} is not an ISO date")
+        result = datetime.fromisoformat(value)
+        if result.tzinfo is not None:
+            result = result.astimezone().replace(tzinfo=None)
+        return result
+
+    @staticmethod
+    def _coerce_value(field_type: type, value: str):
+        if field_type is datetime:
+            return MongoFormatter._coerce_datetime(value)
+        return _get_adapter(field_type).validate_python(value)
+
+    def _value_coercer(
+        self, name: list[str], operator: str, value: list[str]
+    ) -> list:
+        """
+        Converts the values to the declared field type, so that they are compared
+        with the stored values and not with their string form
+        """
+        if operator == "$regex":
+            return value
+        field_type = self._get_field_type(name)
+        if field_type not in COERCED_TYPES:
+            return value
+        return [self._coerce_value(field_type, v) for v in value]
+
     def operator_formatter(
         self, name: list[str], operator: str, value: list[str]
     ):
         operator = MongoFormatter.operators.get(operator)
+        value = self._value_coercer(name, operator, value)
         return MongoFormatter._operator_formatter(name, operator, value)
 
     @staticmethod
-    def _operator_formatter(name: list[str], operator: str, value: list[str]):
+    def _operator_formatter(name: list[str], operator: str, value: list):
         name = MongoFormatter._name_formatter(name)
         value = MongoFormatter._value_formatter(value)
-        # try:
-        #     new_vals = []
-        #     for val in value:
-        #         new_vals.append(date_parse(val))
-        #     value = new_vals
-        # except ValueError:
-        #     try:
-        #         new_vals = []
-        #         for val in value:
-        #             new_vals.append(int(val))
-        #     except ValueError:
-        #         try:
-        #             new_vals = []
-        #             for val in value:
-        #                 new_vals.append(float(val))
-        #         except ValueError:
-        #             pass
         if isinstance(value, list) and operator == "$eq":
             operator = "$in"
         elif operator == "$eq":
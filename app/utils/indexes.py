@@ -0,0 +1,83 @@
+from pymongo import ASCENDING, IndexModel
+
+from database import db
+
+# collection -> indexes required by the service queries
+INDEXES: dict[str, list[IndexModel]] = {
+    "document": [
+        # retrieve, patch, delete and content by document ID
+        IndexModel([("id", ASCENDING)]),
+        # documents of an object (get_documents_by_mo_id, the permission filter,
+        # find_document_by_id_and_attachment_name, document counts rebuild).
+        # attachment.name cannot be added: both fields are arrays
+        IndexModel(
+            [("externalIdentifier.id", ASCENDING), ("status", ASCENDING)]
+        ),
+        # keyset pagination of GET /document
+        IndexModel([("creationDate", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "document_specification": [
+        IndexModel([("id", ASCENDING)]),
+    ],
+    "permissions": [
+        # user permissions resolution and the permission lookup
+        IndexModel(
+            [
+                ("permission", ASCENDING),
+                ("read", ASCENDING),
+                ("parent_id", ASCENDING),
+            ]
+        ),
+        # updates and deletes from the security topic
+        IndexModel([("id", ASCENDING)]),
+        # the permission lookup of document reads
+        IndexModel([("parent_id", ASCENDING)]),
+    ],
+    "document_counts": [
+        # incremental GetObjectDocumentCount
+        IndexModel([("sequence", ASCENDING)]),
+    ],
+    "count_writers": [
+        # leases of stopped writers are removed once expired
+        IndexModel([("expires", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+
+def apply_indexes() -> dict[str, list[str]]:
+    """
+    Creates the registered indexes. Existing indexes with the same keys and options are
+    left as they are, so it is safe to run on every start
+    :return: names of the registered indexes by collection
+    """
+    result = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = getattr(db, collection_name)
+        result[collection_name] = collection.create_indexes(indexes)
+    return result
+
+
+def get_index_report() -> dict[str, dict[str, list[str]]]:
+    """
+    Compares the registry with the database.
+    missing - registered, but not created;
+    unregistered - created, but not registered;
+    unused - not used since the server start (from $indexStats)
+    """
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = getattr(db, collection_name)
+        registered = {index.document["name"] for index in indexes}
+        existing = set(collection.index_information()) - {"_id_"}
+        stats = collection.aggregate([{"$indexStats": {}}])
+        unused = {
+            stat["name"]
+            for stat in stats
+            if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+        }
+        report[collection_name] = {
+            "missing": sorted(registered - existing),
+            "unregistered": sorted(existing - registered),
+            "unused": sorted(unused),
+        }
+    return report
@@ -15,16 +15,22 @@ class DocumentsStatus(Enum):
     DELETED = "DELETED"
 
 
-def send_to_kafka(data: kafka_document_pb2.Document, topic, key):
-    prod_config = producer_config()
-    producer = Producer(prod_config)
-    producer.produce(
-        topic=topic,
-        key=key,
-        value=data.SerializeToString(),
-        on_delivery=delivery_report,
-    )
-    producer.flush()
+def send_to_kafka(
+    data: kafka_document_pb2.Document, topic, key, producer: Producer
+):
+    """Enqueues the message into the producer's local queue.
+    Delivery is confirmed asynchronously by the producer polling thread."""
+    value = data.SerializeToString()
+    try:
+        producer.produce(
+            topic=topic, key=key, value=value, on_delivery=delivery_report
+        )
+    except BufferError:
+        # local queue is full: serve delivery callbacks to free it and retry
+        producer.poll(settings.KAFKA_PRODUCER_POLL_TIMEOUT)
+        producer.produce(
+            topic=topic, key=key, value=value, on_delivery=delivery_report
+        )
 
 
 def producer_config():
@@ -0,0 +1,59 @@
+from typing import AsyncIterator
+
+import orjson
+from fastapi.requests import Request
+from motor.motor_asyncio import AsyncIOMotorCursor
+
+import settings
+from utils.pagination import encode_cursor
+from utils.serializer import TrustedSerializer
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# the last line of a full keyset page, documents always have an "id"
+NEXT_CURSOR_FIELD = "@nextCursor"
+
+
+def wants_ndjson(request: Request, stream: bool | None) -> bool:
+    """NDJSON is requested by the "stream" parameter or by the Accept header"""
+    if stream is not None:
+        return stream
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def stream_ndjson(
+    cursor: AsyncIOMotorCursor,
+    serializer: TrustedSerializer,
+    exclude: tuple[str, ...] = (),
+    batch_size: int = None,
+    page_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yields the cursor documents as NDJSON, one chunk per batch,
+    so that only one batch is held in memory
+    :param cursor: documents cursor
+    :param serializer: serializer of the response model
+    :param exclude: fields requested only for paging
+    :param batch_size: documents per chunk, NDJSON_BATCH_SIZE if not set
+    :param page_size: limit of a keyset page, a full page ends with
+    the cursor of the next page
+    """
+    if batch_size is None:
+        batch_size = settings.NDJSON_BATCH_SIZE
+    count = 0
+    next_cursor = None
+    while True:
+        documents = await cursor.to_list(length=batch_size)
+        if not documents:
+            break
+        count += len(documents)
+        if page_size:
+            next_cursor = encode_cursor(documents[-1])
+        lines = []
+        for document in documents:
+            for field in exclude:
+                document.pop(field, None)
+            lines.append(serializer.dumps(document))
+        lines.append(b"")
+        yield b"\n".join(lines)
+    if page_size and count == page_size:
+        yield orjson.dumps({NEXT_CURSOR_FIELD: next_cursor}) + b"\n"
@@ -0,0 +1,54 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from pymongo import ASCENDING
+
+# documents are paged by creation date, the ID makes the order unique
+KEYSET_SORT = [("creationDate", ASCENDING), ("id", ASCENDING)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(document: dict) -> str:
+    """Returns an opaque cursor pointing after the document"""
+    creation_date = document.get("creationDate")
+    if isinstance(creation_date, datetime):
+        creation_date = creation_date.isoformat()
+    raw = json.dumps({"c": creation_date, "i": document.get("id")})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        creation_date = raw["c"]
+        if creation_date is not None:
+            creation_date = datetime.fromisoformat(creation_date)
+        return {"creationDate": creation_date, "id": raw["i"]}
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def add_keyset_filter(filters: dict, cursor: dict) -> dict:
+    """Restricts the filter to documents following the cursor in the KEYSET_SORT order"""
+    creation_date = cursor["creationDate"]
+    if creation_date is None:
+        # missing dates go first
+        after = [
+            {"creationDate": None, "id": {"$gt": cursor["id"]}},
+            {"creationDate": {"$ne": None}},
+        ]
+    else:
+        after = [
+            {"creationDate": creation_date, "id": {"$gt": cursor["id"]}},
+            {"creationDate": {"$gt": creation_date}},
+        ]
+    restriction = {"$or": after}
+    if filters:
+        return {"$and": [filters, restriction]}
+    return restriction
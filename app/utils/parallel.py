@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Sequence
+
+
+def run_in_parallel(
+    tasks: Sequence[Callable[[], object]],
+    max_workers: int,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> tuple[dict[int, Any], Exception | None]:
+    """
+    Runs blocking tasks (like MinIO requests) in at most max_workers threads.
+    After the first failure the tasks that have not started are cancelled
+    :param tasks: functions without arguments
+    :param max_workers: maximum number of tasks running at the same time
+    :param on_progress: called with the numbers of completed and all tasks
+    after each completed task
+    :return: results of the completed tasks by index and the first error,
+    None if all the tasks are completed
+    """
+    if not tasks:
+        return {}, None
+    error = None
+    done = 0
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(tasks)))
+    ) as executor:
+        futures = [executor.submit(task) for task in tasks]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            if future.exception() is None:
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, len(tasks))
+                continue
+            if error is None:
+                error = future.exception()
+                for pending in futures:
+                    pending.cancel()
+    completed = {
+        index: future.result()
+        for index, future in enumerate(futures)
+        if not future.cancelled() and future.exception() is None
+    }
+    return completed, error
@@ -1,10 +1,24 @@
 import re
+import threading
 from urllib.parse import unquote_plus
 
+from cachetools import LRUCache
 from fastapi import HTTPException, Request, Query
 from pydantic import BaseModel
 
+import settings
 from utils.formatter import AbstractFormatter, MongoFormatter
+from utils.pagination import decode_cursor
+from utils.total_count import CountMode
+
+
+def _copy_containers(value):
+    """Copies dicts and lists, values are immutable or not changed by the callers"""
+    if isinstance(value, dict):
+        return {key: _copy_containers(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_containers(item) for item in value]
+    return value
 
 
 # TODO Implemented only a simple version. See TMF630 parts 1.4,5-6
@@ -28,13 +42,28 @@ class Parser:
     )
     __separators = (";", "&")
 
+    __controls = ("fields", "offset", "limit", "cursor", "count", "stream")
+
     def __init__(self, formatter: AbstractFormatter, pydantic_model=None):
         self.formatter = formatter
-        if not issubclass(pydantic_model, BaseModel):
+        if pydantic_model is not None and not issubclass(
+            pydantic_model, BaseModel
+        ):
             raise ValueError(
                 '"pydantic_model" argument must be a subclass of BaseModel'
             )
         self.pydantic_model = pydantic_model
+        self._separator_pattern = re.compile(
+            self.build_pattern(self.__separators)
+        )
+        self._operator_pattern = re.compile(
+            self.build_pattern(self.__operators)
+        )
+        self._control_pattern = re.compile(
+            rf"({'|'.join(self.__controls)})=(.*)", flags=re.IGNORECASE
+        )
+        self._cache = LRUCache(maxsize=settings.QUERY_PARSER_CACHE_SIZE)
+        self._cache_lock = threading.Lock()
 
     @staticmethod
     def build_pattern(values: tuple):
@@ -43,77 +72,63 @@ class Parser:
         all_operators = [re.escape(o) for o in all_operators]
         return rf"""(?<!\\)({"|".join(all_operators)})"""
 
+    def _tokenize(self, raw_data: str) -> list[tuple[str | None, str]]:
+        """
+        Splits the query into terms, each with the separator preceding it
+        (None for the first one)
+        """
+        tokens = self._separator_pattern.split(raw_data)
+        terms = [(None, tokens[0])]
+        for index in range(1, len(tokens), 2):
+            terms.append((tokens[index], tokens[index + 1]))
+        return terms
+
     @staticmethod
-    def _find_fields(raw_data: str):
+    def _parse_fields(value: str) -> list[str]:
         result = ["id", "href"]
-        values = re.search(r"fields=[^;&]+", raw_data, flags=re.IGNORECASE)
-        if values is None:
-            return (0, 0), None
-
-        start = values.start()
-        end = values.end()
-
-        values = values.group(0)
-        values = values.split("=")[1].split(",")
+        values = value.split(",")
         if len(values) == 1 and values[0].lower() == "none":
-            return (start, end), result
-        return (start, end), result + values
+            return result
+        return result + values
 
-    @staticmethod
-    def _get_new_raw_data(raw_data: str, start, end):
-        if start == 0 and end == 0:
-            return raw_data
-        if start == 0:
-            end += 1
-        else:
-            start -= 1
-        return raw_data[:start] + raw_data[end:]
-
-    def _parse_field_offset_limit(self, raw_data: str):
+    def _parse_field_offset_limit(self, terms: list[tuple[str | None, str]]):
+        """
+        Takes the control parameters out of the terms.
+        A removed term takes its separator with it
+        """
         result = dict()
-        start_end, fields = self._find_fields(raw_data)
-        if fields is not None:
-            result["fields"] = fields
-        raw_data = self._get_new_raw_data(raw_data, start_end[0], start_end[1])
-
-        offset = re.search(r"offset=\d+", raw_data, flags=re.IGNORECASE)
-        if offset is not None:
-            value = offset.group(0)
-            result["offset"] = int(value.split("=")[1])
-            raw_data = self._get_new_raw_data(
-                raw_data, offset.start(), offset.end()
-            )
-
-        limit = re.search(r"limit=\d+", raw_data, flags=re.IGNORECASE)
-        if limit is not None:
-            value = limit.group(0)
-            result["limit"] = int(value.split("=")[1])
-            raw_data = self._get_new_raw_data(
-                raw_data, limit.start(), limit.end()
-            )
-        return result, raw_data
-
-    def _parse_other(self, raw_data):
-        # if len(raw_data) < 3:
-        #     return None
-        if raw_data.find("status=") == -1:
-            if len(raw_data) == 0:
-                raw_data = "status<>deleted"
+        filter_terms = []
+        for separator, term in terms:
+            control = self._control_pattern.fullmatch(term)
+            if control is None:
+                filter_terms.append((separator, term))
+                continue
+            name, value = control.group(1).lower(), control.group(2)
+            if name == "fields":
+                result["fields"] = self._parse_fields(value)
+            elif name in ("offset", "limit"):
+                result[name] = int(value)
+            elif name == "cursor":
+                # an empty cursor starts the keyset pagination
+                result["cursor"] = decode_cursor(value) if value else None
+            elif name == "stream":
+                result["stream"] = value.lower() in ("true", "1", "yes", "on")
             else:
-                raw_data = raw_data + "&status<>deleted"
-        print(raw_data, type(raw_data), len(raw_data))
-        separator_pattern = self.build_pattern(self.__separators)
-        operator_pattern = self.build_pattern(self.__operators)
-        name_operator_value_list = re.split(
-            separator_pattern, raw_data, flags=re.IGNORECASE
-        )
+                result["count"] = CountMode(value.lower())
+        if filter_terms:
+            filter_terms[0] = (None, filter_terms[0][1])
+        return result, filter_terms
+
+    def _parse_other(self, terms: list[tuple[str | None, str]]):
+        if not any("status=" in term for _, term in terms):
+            separator = "&" if terms else None
+            terms = terms + [(separator, "status<>deleted")]
 
         prev_separator = None
         prev_value = None
         current_value = None
-        for name_operator_value in name_operator_value_list:
-            if name_operator_value in self.__separators:
-                separator = name_operator_value
+        for separator, name_operator_value in terms:
+            if separator is not None:
                 if prev_separator is None:
                     prev_separator = separator
                     prev_value = current_value
@@ -123,10 +138,12 @@ class Parser:
                         prev_value, prev_separator, current_value
                     )
                     prev_separator = separator
-                continue
-            name, operator, value = re.split(
-                operator_pattern, name_operator_value
+            name, operator, value = self._operator_pattern.split(
+                name_operator_value, maxsplit=1
             )
+            if operator.startswith(".") and value.startswith("="):
+                # TMF630 form: creationDate.gt=2024-01-01
+                value = value[1:]
             name = name.split(".")
             value = value.split(",")
             current_value = self.formatter.format(name, operator, value)
@@ -138,13 +155,28 @@ class Parser:
             )
         return prev_value
 
-    def parse(self, raw_data: str):
-        result, raw_data = self._parse_field_offset_limit(raw_data)
-        filters = self._parse_other(raw_data)
+    def _parse(self, raw_data: str):
+        terms = self._tokenize(raw_data) if raw_data else []
+        result, terms = self._parse_field_offset_limit(terms)
+        result["filtered"] = len(terms) > 0
+        filters = self._parse_other(terms)
         if filters is not None:
             result["filters"] = filters
         return result
 
+    def parse(self, raw_data: str):
+        """
+        Parses the query, results are cached per query string.
+        A copy is returned, so the caller may change it
+        """
+        with self._cache_lock:
+            result = self._cache.get(raw_data)
+        if result is None:
+            result = self._parse(raw_data)
+            with self._cache_lock:
+                self._cache[raw_data] = result
+        return _copy_containers(result)
+
 
 def parse_query_wrapper(pydantic_model=None, formatter=MongoFormatter):
     if pydantic_model is not None and not issubclass(pydantic_model, BaseModel):
@@ -156,6 +188,8 @@ def parse_query_wrapper(pydantic_model=None, formatter=MongoFormatter):
             '"formatter" argument must be a subclass of AbstractFormatter'
         )
 
+    parser = Parser(formatter(pydantic_model), pydantic_model)
+
     def parse_query(
         filters: Request,
         fields: str | None = Query(
@@ -170,10 +204,23 @@ def parse_query_wrapper(pydantic_model=None, formatter=MongoFormatter):
             default=None,
             description="Requested number of resources to be provided in response",
         ),  # noqa
+        cursor: str | None = Query(
+            default=None,
+            description="Opaque cursor from the X-Next-Cursor header of the "
+            "previous page, empty for the first page of the keyset pagination",
+        ),  # noqa
+        count: CountMode | None = Query(
+            default=None,
+            description="How X-Total-Count is computed: exact, estimated or none",
+        ),  # noqa
+        stream: bool | None = Query(
+            default=None,
+            description="Stream the resources as NDJSON, "
+            "same as Accept: application/x-ndjson",
+        ),  # noqa
     ):
         # if len(filters.query_params) == 0:
         #     return dict()
-        parser = Parser(formatter(), pydantic_model)
         try:
             unquoted = unquote_plus(filters.query_params.__str__())
             result = parser.parse(unquoted)
@@ -0,0 +1,137 @@
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from cachetools import LRUCache
+
+import settings
+from database import async_db
+from security.permissions_cache import permissions_cache
+
+# S3 presigned URLs cannot live longer
+MAX_EXPIRES = timedelta(days=7)
+# stored with the document, changed by every replacement of the document
+CONTENT_VERSION_FIELD = "_contentVersion"
+
+
+def stamp_content_version(document: dict) -> dict:
+    """
+    Gives the stored document a new content version, the URLs cached for the
+    previous one are not returned. Must be applied to every replacement
+    """
+    document[CONTENT_VERSION_FIELD] = uuid.uuid4().hex
+    return document
+
+
+class PresignedUrlCache:
+    """
+    Keeps the presigned content URLs of the current time window.
+    URLs are signed at the window start and live for the requested time plus
+    the window, so a cached URL is valid at least for the requested time and
+    the same link is returned during the window (browsers cache the content).
+    Documents are changed by all the API processes and the Kafka consumer, so
+    entries are tagged with the version of their document, read by ID on every
+    request, and with the permissions version of the caller
+    """
+
+    def __init__(self, maxsize: int, window: float):
+        self.window = window
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def get_signing(
+        self, lifetime: timedelta
+    ) -> tuple[datetime | None, timedelta]:
+        """
+        :param lifetime: requested lifetime of the URL
+        :return: request date and expiry to sign the URLs with, the request
+        date is None if the URL cannot be cached
+        """
+        window = timedelta(seconds=self.window)
+        # a URL served at the window end must still live for the lifetime
+        if not self.enabled or lifetime + window > MAX_EXPIRES:
+            return None, lifetime
+        now = datetime.now(timezone.utc).timestamp()
+        window_start = datetime.fromtimestamp(
+            now - now % self.window, tz=timezone.utc
+        )
+        return window_start, lifetime + window
+
+    async def get_versions(self, document_ids: list[str]) -> dict[str, tuple]:
+        """
+        Returns the versions of the documents and of the permissions, must be
+        read before the documents are queried. Missing documents are left out
+        """
+        permissions_version = await permissions_cache.get_version()
+        documents = async_db.document.find(
+            {"id": {"$in": document_ids}},
+            {"_id": 1, "id": 1, CONTENT_VERSION_FIELD: 1},
+        )
+        return {
+            document["id"]: (
+                # a document deleted and created again gets a new _id
+                str(document["_id"]),
+                document.get(CONTENT_VERSION_FIELD),
+                permissions_version,
+            )
+            async for document in documents
+        }
+
+    def get(self, key: tuple, version: tuple | None) -> str | None:
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def set(self, key: tuple, url: str, version: tuple | None):
+        """
+        :param version: versions read before the document was queried
+        """
+        if version is None:
+            return
+        with self._lock:
+            self._cache[key] = (version, url)
+
+
+def get_content_file(document: dict, content_id: str) -> tuple[str, str | None]:
+    """
+    Returns the file name and the mime type of the content
+    from the stored document
+    """
+    file_name = "content"
+    mime_type = None
+    for attachment in document["attachment"]:
+        if content_id == attachment.get("id"):
+            file_name = attachment.get("name")
+            mime_type = attachment.get("mimeType")
+            break
+    if mime_type is not None and mime_type.lower() == "none":
+        mime_type = None
+    return file_name, mime_type
+
+
+def get_content_headers(document: dict, content_id: str) -> dict:
+    """
+    Returns the response headers of the content link: the attachment name
+    and mime type from the stored document
+    """
+    file_name, mime_type = get_content_file(document, content_id)
+    headers = {
+        "response-content-disposition": f'inline; filename="{file_name}"'
+    }
+    if mime_type is not None:
+        headers["response-content-type"] = mime_type
+    return headers
+
+
+presigned_url_cache = PresignedUrlCache(
+    maxsize=settings.PRESIGNED_URL_CACHE_SIZE,
+    window=settings.PRESIGNED_URL_CACHE_WINDOW,
+)
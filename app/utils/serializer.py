@@ -0,0 +1,82 @@
+from typing import Iterable
+
+import orjson
+from bson import ObjectId
+from pydantic import BaseModel
+
+from schemas.base_model import get_alias, get_item_type
+
+JSON_MEDIA_TYPE = "application/json"
+
+# alias -> nested shape, None for plain values
+Shape = dict[str, "Shape | None"]
+
+_shapes: dict[type[BaseModel], Shape] = {}
+
+
+def get_shape(model: type[BaseModel]) -> Shape:
+    """
+    Returns the output fields of the model by alias, nested models included.
+    Shapes are built once per model, recursive models refer to the same shape
+    """
+    if model in _shapes:
+        return _shapes[model]
+    shape = {}
+    _shapes[model] = shape
+    for name, field in model.model_fields.items():
+        field_type = get_item_type(field.annotation)
+        alias = get_alias(name, field)
+        if isinstance(field_type, type) and issubclass(field_type, BaseModel):
+            shape[alias] = get_shape(field_type)
+        else:
+            shape[alias] = None
+    return shape
+
+
+def _project(value, shape: Shape, exclude_none: bool):
+    if isinstance(value, list):
+        return [_project(item, shape, exclude_none) for item in value]
+    if not isinstance(value, dict):
+        return value
+    result = {}
+    for key, item_shape in shape.items():
+        item = value.get(key)
+        if item is None:
+            if not exclude_none:
+                result[key] = None
+        elif item_shape is None:
+            result[key] = item
+        else:
+            result[key] = _project(item, item_shape, exclude_none)
+    return result
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class TrustedSerializer:
+    """
+    Serializes stored documents into the JSON of the response model without validating
+    them again: they were validated on write. Unknown fields (like "_id") are dropped,
+    missing fields are null or excluded with exclude_none, as by the response model.
+    Unlike the model, missing fields do not get default values
+    """
+
+    def __init__(self, model: type[BaseModel], exclude_none: bool = False):
+        self.shape = get_shape(model)
+        self.exclude_none = exclude_none
+
+    def project(self, document: dict) -> dict:
+        return _project(document, self.shape, self.exclude_none)
+
+    def dumps(self, document: dict) -> bytes:
+        return orjson.dumps(self.project(document), default=_default)
+
+    def dumps_many(self, documents: Iterable[dict]) -> bytes:
+        return orjson.dumps(
+            [self.project(document) for document in documents],
+            default=_default,
+        )
@@ -0,0 +1,75 @@
+import json
+import threading
+from enum import Enum
+
+from cachetools import TTLCache
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+import settings
+from security.security_data_models import ObjectPermissions
+from utils.document_utils import count_permitted_documents
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+_counts = None
+if settings.TOTAL_COUNT_CACHE_TTL > 0:
+    _counts = TTLCache(
+        maxsize=settings.TOTAL_COUNT_CACHE_SIZE,
+        ttl=settings.TOTAL_COUNT_CACHE_TTL,
+    )
+_counts_lock = threading.Lock()
+
+
+async def get_total_count(
+    collection: AsyncIOMotorCollection,
+    filters: dict,
+    object_permissions: ObjectPermissions | None = None,
+    mode: CountMode | None = None,
+    filtered: bool = True,
+) -> int | None:
+    """
+    Returns the value of the X-Total-Count header.
+    exact - counted documents, cached for TOTAL_COUNT_CACHE_TTL seconds per filter and
+    permission scope;
+    estimated - collection metadata count if neither the user nor the permissions filter
+    the request (deleted documents included), the exact count otherwise;
+    none - not counted
+    :param collection: collection with documents
+    :param filters: mongo filter
+    :param object_permissions: permissions of the user, None for administrators
+    :param mode: count mode, TOTAL_COUNT_DEFAULT_MODE if not set
+    :param filtered: whether the user set any filter
+    """
+    if mode is None:
+        mode = CountMode(settings.TOTAL_COUNT_DEFAULT_MODE)
+    if mode == CountMode.NONE:
+        return None
+    if mode == CountMode.ESTIMATED and not filtered and not object_permissions:
+        return await collection.estimated_document_count()
+
+    scope = object_permissions.permissions if object_permissions else None
+    key = (
+        collection.name,
+        json.dumps(filters, sort_keys=True, default=str),
+        scope,
+    )
+    if _counts is not None:
+        with _counts_lock:
+            count = _counts.get(key)
+        if count is not None:
+            return count
+
+    count = await count_permitted_documents(
+        filters=filters,
+        object_permissions=object_permissions,
+        collection=collection,
+    )
+    if _counts is not None:
+        with _counts_lock:
+            _counts[key] = count
+    return count
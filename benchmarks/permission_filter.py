@@ -0,0 +1,148 @@
+"""
+Compares the permission filter strategies of document reads: permitted object IDs sent
+in an "$in" query (IN) and permissions joined with "$lookup" (LOOKUP).
+
+Seeds temporary collections in the configured MongoDB database, runs a page read and a
+count with both strategies and drops the collections.
+
+Usage (MONGO_* environment variables as for the service):
+    python benchmarks/permission_filter.py --documents 200000 --permitted 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import bson
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from database import db  # noqa: E402
+from security.security_data_models import ObjectPermissions  # noqa: E402
+from utils.document_utils import (  # noqa: E402
+    add_to_query_permission_filter,
+    get_permission_lookup_stages,
+)
+
+PERMISSION = "realm_access.__benchmark"
+
+
+def seed(documents, permissions, args):
+    objects = args.objects
+    batch = []
+    for index in range(args.documents):
+        batch.append(
+            {
+                "id": str(uuid.uuid4()),
+                "name": f"document {index}",
+                "status": "created",
+                "externalIdentifier": [{"id": str(index % objects)}],
+            }
+        )
+        if len(batch) == 10000:
+            documents.insert_many(batch)
+            batch = []
+    if batch:
+        documents.insert_many(batch)
+    documents.create_index("externalIdentifier.id")
+
+    permissions.insert_many(
+        [
+            {
+                "id": object_id,
+                "parent_id": object_id,
+                "permission": PERMISSION,
+                "read": True,
+            }
+            for object_id in range(args.permitted)
+        ]
+    )
+    # as registered in utils.indexes
+    permissions.create_index([("permission", 1), ("read", 1)])
+    permissions.create_index("parent_id")
+
+
+def measure(name, func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"{name:<24}{elapsed:>10.1f} ms   result={result}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--objects", type=int, default=100000)
+    parser.add_argument("--permitted", type=int, default=50000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    suffix = uuid.uuid4().hex[:8]
+    documents = db.document.database[f"benchmark_document_{suffix}"]
+    permissions = db.document.database[f"benchmark_permissions_{suffix}"]
+    try:
+        seed(documents, permissions, args)
+        object_permissions = ObjectPermissions(
+            permissions=(PERMISSION,),
+            read=frozenset(str(i) for i in range(args.permitted)),
+            create=frozenset(),
+            update=frozenset(),
+            delete=frozenset(),
+        )
+        filters = {"status": "created"}
+
+        in_filter = add_to_query_permission_filter(
+            filter_query=filters,
+            available_object_ids_by_permission=object_permissions.read,
+        )
+        lookup_stages = get_permission_lookup_stages(object_permissions)
+        for stage in lookup_stages:
+            if "$lookup" in stage:
+                stage["$lookup"]["from"] = permissions.name
+        lookup_pipeline = [{"$match": filters}, *lookup_stages]
+
+        print(f"IN query size: {len(bson.encode(in_filter)) / 1024:.1f} KiB")
+        print(
+            "LOOKUP query size: "
+            f"{len(bson.encode({'p': lookup_pipeline})) / 1024:.1f} KiB"
+        )
+        measure(
+            "IN page",
+            lambda: len(list(documents.find(in_filter).limit(args.limit))),
+            args.repeat,
+        )
+        measure(
+            "LOOKUP page",
+            lambda: len(
+                list(
+                    documents.aggregate(
+                        lookup_pipeline + [{"$limit": args.limit}]
+                    )
+                )
+            ),
+            args.repeat,
+        )
+        measure(
+            "IN count",
+            lambda: documents.count_documents(in_filter),
+            args.repeat,
+        )
+        measure(
+            "LOOKUP count",
+            lambda: next(
+                documents.aggregate(lookup_pipeline + [{"$count": "count"}])
+            )["count"],
+            args.repeat,
+        )
+    finally:
+        documents.drop()
+        permissions.drop()
+
+
+if __name__ == "__main__":
+    main()
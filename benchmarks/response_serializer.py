@@ -0,0 +1,104 @@
+"""
+Compares the CPU cost per document of the read responses: validation into
+ResponseDocument and FastAPI serialization (model path) against the trusted
+serializer writing stored documents with orjson.
+
+No database is needed, the documents are generated in memory.
+
+Usage:
+    python benchmarks/response_serializer.py --documents 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from schemas.document import Document, ResponseDocument  # noqa: E402
+from utils.serializer import TrustedSerializer  # noqa: E402
+
+
+def generate(count: int, attachments: int) -> list[dict]:
+    documents = []
+    now = datetime.utcnow()
+    for index in range(count):
+        document_id = str(uuid.uuid4())
+        document = Document(
+            name=f"document {index}",
+            href=f"http://documents/v1/document/{document_id}",
+            id=document_id,
+            creationDate=now,
+            lastUpdate=now,
+            description="benchmark document",
+            externalIdentifier=[
+                {"id": str(index), "owner": "", "href": f"http://mo/{index}"}
+            ],
+            attachment=[
+                {
+                    "name": f"file {i}.pdf",
+                    "url": f"http://documents/v1/content/{document_id}/{i}",
+                    "mimeType": "application/pdf",
+                    "attachmentType": "pdf",
+                    "size": {"amount": 1.5, "units": "MB"},
+                }
+                for i in range(attachments)
+            ],
+            characteristic=[{"name": "pages", "value": index}],
+            relatedParty=[{"id": "1", "@referredType": "Individual"}],
+        )
+        # stored as by create_document
+        documents.append(document.model_dump(exclude_none=True, by_alias=True))
+    return documents
+
+
+def model_path(documents: list[dict], exclude_none: bool) -> bytes:
+    models = [ResponseDocument(**document) for document in documents]
+    content = jsonable_encoder(models, by_alias=True, exclude_none=exclude_none)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def measure(name, func, documents, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat / len(documents) * 1e6
+    print(f"{name:<32}{elapsed:>10.1f} us/document")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--attachments", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    documents = generate(args.documents, args.attachments)
+    for exclude_none in (True, False):
+        serializer = TrustedSerializer(ResponseDocument, exclude_none)
+        print(f"exclude_none={exclude_none}")
+        measure(
+            "  model",
+            lambda: model_path(documents, exclude_none),
+            documents,
+            args.repeat,
+        )
+        measure(
+            "  trusted",
+            lambda: serializer.dumps_many(documents),
+            documents,
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
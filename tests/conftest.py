@@ -1,15 +1,30 @@
 import os
+import mongomock
 import pytest
 import requests
 import sys
 
-from unittest.mock import MagicMock, patch
+from contextlib import ExitStack
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
 
 sys.path.append(os.path.join(sys.path[0], "..", "app"))
 
 from app.main import app_v1
+from database import async_db, db
+
+MONGO_COLLECTIONS = (
+    "document",
+    "document_specification",
+    "permissions",
+    "document_counts",
+    "sequences",
+    "count_writers",
+    "blobs",
+    "blob_links",
+)
 
 
 @pytest.fixture(autouse=True)
@@ -41,9 +56,22 @@ class RequestsSession(requests.Session):
 def mock_database():
     mock_db = MagicMock()
     mock_document = MagicMock()
+    # motor: cursors are created synchronously, operations are awaited
+    for method in (
+        "find_one",
+        "insert_one",
+        "replace_one",
+        "count_documents",
+        "estimated_document_count",
+    ):
+        setattr(mock_document, method, AsyncMock())
+    mock_document.find.return_value.to_list = AsyncMock(return_value=[])
     mock_db.document = mock_document
 
-    with patch("routers.document_router.db", mock_db):
+    with (
+        patch("routers.document_router.async_db", mock_db),
+        patch("utils.document_utils.async_db", mock_db),
+    ):
         yield mock_db
 
 
@@ -51,3 +79,22 @@ def mock_database():
 def client_session():
     with TestClient(app_v1) as rs:
         yield rs
+
+
+@pytest.fixture(name="mongo")
+def mongomock_database():
+    """
+    Replaces the collections of db and async_db with in-memory ones sharing
+    the data, yields the sync database to check the data with
+    """
+    client = mongomock.MongoClient()
+    async_database = AsyncMongoMockClient(mock_mongo_client=client)["documents"]
+    with ExitStack() as stack:
+        for name in MONGO_COLLECTIONS:
+            stack.enter_context(
+                patch.object(db, f"_{name}", client["documents"][name])
+            )
+            stack.enter_context(
+                patch.object(async_db, f"_{name}", async_database[name])
+            )
+        yield client["documents"]
@@ -0,0 +1,221 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from database import async_db
+from file_server import minio_client
+from security.security_data_models import ObjectPermissions
+from security.security_utils import get_object_permissions
+
+CONTENT = b"0123456789"
+ETAG = "abc"
+URL = "/content/doc/file"
+
+
+class FakeResponse:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def stream(self, chunk_size: int):
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start : start + chunk_size]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+def get_object(bucket_name, object_name, offset=0, length=0, **kwargs):
+    end = offset + length if length else None
+    return FakeResponse(CONTENT[offset:end])
+
+
+@pytest.fixture()
+def minio(rs, mongo, mock_database):
+    mock_database.document = async_db.document
+    mongo.document.insert_one(
+        {
+            "id": "doc",
+            "name": "doc",
+            "attachment": [{"id": "file", "name": "file.txt"}],
+        }
+    )
+    client = MagicMock()
+    client.stat_object.return_value = SimpleNamespace(
+        etag=ETAG,
+        size=len(CONTENT),
+        last_modified=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        content_type="text/plain",
+    )
+    client.get_object.side_effect = get_object
+    rs.app.dependency_overrides[minio_client] = lambda: client
+    yield client
+    rs.app.dependency_overrides.pop(minio_client)
+
+
+def get(rs, **headers):
+    return rs.get(URL, params={"proxy": True}, headers=headers)
+
+
+def test_whole_content(rs, minio):
+    r = get(rs)
+    assert r.status_code == 200
+    assert r.content == CONTENT
+    assert r.headers["ETag"] == f'"{ETAG}"'
+    assert r.headers["Accept-Ranges"] == "bytes"
+    assert r.headers["Content-Disposition"] == (
+        "inline; filename*=UTF-8''file.txt"
+    )
+
+
+def test_single_range(rs, minio):
+    r = get(rs, range="bytes=2-4")
+    assert r.status_code == 206
+    assert r.content == b"234"
+    assert r.headers["Content-Range"] == "bytes 2-4/10"
+    assert r.headers["Content-Length"] == "3"
+    # the content is checked to be the stated version
+    kwargs = minio.get_object.call_args.kwargs
+    assert kwargs["request_headers"] == {"If-Match": ETAG}
+
+
+def test_suffix_range(rs, minio):
+    r = get(rs, range="bytes=-3")
+    assert r.status_code == 206
+    assert r.content == b"789"
+    assert r.headers["Content-Range"] == "bytes 7-9/10"
+
+
+def test_open_range_is_cut_to_size(rs, minio):
+    r = get(rs, range="bytes=8-100")
+    assert r.status_code == 206
+    assert r.content == b"89"
+
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=5-2", "bytes=-0"])
+def test_unsatisfiable_range(rs, minio, header):
+    r = get(rs, range=header)
+    assert r.status_code == 416
+    assert r.headers["Content-Range"] == "bytes */10"
+
+
+def test_several_ranges_get_whole_content(rs, minio):
+    r = get(rs, range="bytes=0-1,4-5")
+    assert r.status_code == 200
+    assert r.content == CONTENT
+
+
+def test_mismatched_if_range_gets_whole_content(rs, minio):
+    r = get(rs, range="bytes=2-4", **{"if-range": '"other"'})
+    assert r.status_code == 200
+    assert r.content == CONTENT
+
+    r = get(rs, range="bytes=2-4", **{"if-range": f'"{ETAG}"'})
+    assert r.status_code == 206
+
+
+@pytest.mark.parametrize(
+    "header", [f'"{ETAG}"', f'W/"{ETAG}"', f'"x", "{ETAG}"', "*"]
+)
+def test_not_modified(rs, minio, header):
+    r = get(rs, **{"if-none-match": header})
+    assert r.status_code == 304
+    assert r.content == b""
+    minio.get_object.assert_not_called()
+
+
+def test_modified(rs, minio):
+    r = get(rs, **{"if-none-match": '"other"'})
+    assert r.status_code == 200
+
+
+def test_missing_content(rs, minio):
+    minio.stat_object.side_effect = OSError("not found")
+    assert get(rs).status_code == 404
+    assert rs.get(
+        "/content/other/file", params={"proxy": True}
+    ).status_code == (404)
+
+
+def make_linked_document(document_id: str, mo_id: str) -> dict:
+    return {
+        "id": document_id,
+        "name": document_id,
+        "externalIdentifier": [{"id": mo_id}],
+        "attachment": [{"id": "file", "name": "file.txt"}],
+    }
+
+
+def test_content_links(rs, mongo, minio):
+    mongo.document.insert_many(
+        [
+            make_linked_document("permitted", "5"),
+            make_linked_document("forbidden", "6"),
+        ]
+    )
+    minio.get_presigned_url.side_effect = (
+        lambda method, bucket, object_name, **kwargs: f"signed/{object_name}"
+    )
+    rs.app.dependency_overrides[get_object_permissions] = lambda: (
+        ObjectPermissions(
+            permissions=("realm.__role",),
+            read=frozenset({"5"}),
+            create=frozenset(),
+            update=frozenset(),
+            delete=frozenset(),
+        )
+    )
+    links = [
+        {"documentId": "permitted", "contentId": "file", "versionId": "v1"},
+        {"documentId": "forbidden", "contentId": "file"},
+        {"documentId": "permitted", "contentId": "missing"},
+        {"documentId": "missing", "contentId": "file"},
+        # the field names are accepted too
+        {"document_id": "permitted", "content_id": "file"},
+    ]
+    try:
+        r = rs.post("/content", json=links)
+    finally:
+        rs.app.dependency_overrides.pop(get_object_permissions)
+    assert r.status_code == 200, r.text
+    assert r.json() == [
+        {
+            "documentId": "permitted",
+            "contentId": "file",
+            "versionId": "v1",
+            "url": "signed/permitted/file",
+        },
+        {
+            "documentId": "forbidden",
+            "contentId": "file",
+            "versionId": None,
+            "url": None,
+        },
+        {
+            "documentId": "permitted",
+            "contentId": "missing",
+            "versionId": None,
+            "url": None,
+        },
+        {
+            "documentId": "missing",
+            "contentId": "file",
+            "versionId": None,
+            "url": None,
+        },
+        {
+            "documentId": "permitted",
+            "contentId": "file",
+            "versionId": None,
+            "url": "signed/permitted/file",
+        },
+    ]
+    versions = [
+        call.kwargs["version_id"]
+        for call in minio.get_presigned_url.call_args_list
+    ]
+    assert versions == ["v1", None]
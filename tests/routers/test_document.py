@@ -1,11 +1,15 @@
 # from app.database import db
 
+import json
 import pytest
 import sys
 import os
+from datetime import datetime
 
 sys.path.append(os.path.join(sys.path[0], "..", "app"))
 
+from utils.ndjson import NEXT_CURSOR_FIELD
+
 prefix = os.environ.get("PREFIX", "/api/documents/v1")
 
 
@@ -18,7 +22,9 @@ def create_document(rs, mock_database):
 
 
 def test_can_read_documents(rs, create_document, mock_database):
-    mock_database.document.find.return_value = [{"name": "test post document"}]
+    mock_database.document.find.return_value.to_list.return_value = [
+        {"name": "test post document"}
+    ]
     r = rs.get("/document")
     print("\n", r.url, "\n", r.status_code, "\n", r.text)
     assert r.status_code == 200, (
@@ -74,3 +80,59 @@ def test_can_read_documents(rs, create_document, mock_database):
 #     assert db.document.find_one({"id": pytest.id})["status"] == "created", (
 #         "Status should be 'created'"
 #     )
+
+
+@pytest.fixture()
+def stored_documents(mongo, mock_database):
+    from database import async_db
+
+    mock_database.document = async_db.document
+    mongo.document.insert_many(
+        [
+            {"id": "c", "name": "c", "creationDate": datetime(2024, 1, 1)},
+            {"id": "a", "name": "a", "creationDate": datetime(2024, 1, 3)},
+            {"id": "b", "name": "b", "creationDate": datetime(2024, 1, 2)},
+        ]
+    )
+
+
+def test_limit_keeps_default_order(rs, stored_documents):
+    r = rs.get("/document", params={"limit": 2})
+    assert r.status_code == 200, r.text
+    assert [d["id"] for d in r.json()] == ["c", "a"]
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_keyset_pages(rs, stored_documents):
+    ids = []
+    params = {"limit": 2, "cursor": ""}
+    while True:
+        r = rs.get("/document", params=params)
+        assert r.status_code == 200, r.text
+        ids.extend(d["id"] for d in r.json())
+        if "X-Next-Cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["X-Next-Cursor"]
+    assert ids == ["c", "b", "a"]
+
+
+def test_keyset_stream_ends_with_cursor(rs, stored_documents):
+    params = {"limit": 2, "cursor": "", "stream": "true"}
+    lines = [
+        json.loads(line)
+        for line in rs.get("/document", params=params).text.splitlines()
+    ]
+    assert [d["id"] for d in lines[:-1]] == ["c", "b"]
+
+    params["cursor"] = lines[-1][NEXT_CURSOR_FIELD]
+    lines = [
+        json.loads(line)
+        for line in rs.get("/document", params=params).text.splitlines()
+    ]
+    # the last page is not full
+    assert [d["id"] for d in lines] == ["a"]
+
+
+def test_invalid_cursor_is_rejected(rs, stored_documents):
+    r = rs.get("/document", params={"cursor": "not a cursor"})
+    assert r.status_code == 422
@@ -0,0 +1,167 @@
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from database import async_db
+from file_server import minio_client
+from security.security_data_models import ObjectPermissions
+from security.security_utils import get_object_permissions
+from utils.document_counts import rebuild_document_counts
+
+
+@pytest.fixture()
+def minio(rs):
+    client = MagicMock()
+    client.remove_objects.return_value = iter([])
+    rs.app.dependency_overrides[minio_client] = lambda: client
+    yield client
+    rs.app.dependency_overrides.pop(minio_client)
+
+
+def make_document(document_id: str, *mo_ids: str) -> dict:
+    return {
+        "id": document_id,
+        "name": document_id,
+        "status": "created",
+        "externalIdentifier": [{"id": mo_id} for mo_id in mo_ids],
+        "attachment": [{"id": f"{document_id}-file", "name": "file.txt"}],
+    }
+
+
+def test_delete_documents_by_mo_id(rs, mongo, minio):
+    mongo.document.insert_many(
+        [
+            make_document("only", "5"),
+            make_document("shared", "5", "6"),
+            make_document("other", "7"),
+        ]
+    )
+    rs.portal.call(rebuild_document_counts)
+    r = rs.delete("/inventory/object/5")
+    assert r.status_code == 200, r.text
+
+    remaining = {d["id"]: d for d in mongo.document.find()}
+    assert set(remaining) == {"shared", "other"}
+    assert remaining["shared"]["externalIdentifier"] == [{"id": "6"}]
+    counts = {c["_id"]: c["count"] for c in mongo.document_counts.find()}
+    assert counts == {"5": 0, "6": 1, "7": 1}
+    # the contents of the removed document only
+    deleted = minio.remove_objects.call_args.kwargs["delete_object_list"]
+    assert [d._name for d in deleted] == ["only/only-file"]
+
+
+def make_source_document() -> dict:
+    document = make_document("source", "5")
+    document["externalIdentifier"][0]["href"] = "http://inventory/object/5"
+    document["attachment"][0]["url"] = (
+        "http://documents/content/source/source-file"
+    )
+    return document
+
+
+def make_permissions(**actions: set[str]) -> ObjectPermissions:
+    return ObjectPermissions(
+        permissions=("realm.__role",),
+        **{
+            action: frozenset(actions.get(action, ()))
+            for action in ("read", "create", "update", "delete")
+        },
+    )
+
+
+@pytest.fixture()
+def permissions(rs, mongo, mock_database):
+    # the permitted documents are read through utils.document_utils
+    mock_database.document = async_db.document
+
+    def set_permissions(value: ObjectPermissions):
+        rs.app.dependency_overrides[get_object_permissions] = lambda: value
+
+    yield set_permissions
+    rs.app.dependency_overrides.pop(get_object_permissions, None)
+
+
+def test_delete_needs_delete_permission(rs, mongo, minio, permissions):
+    mongo.document.insert_one(make_document("only", "5"))
+    permissions(make_permissions(read={"5"}, update={"5"}))
+    r = rs.delete("/inventory/object/5")
+    assert r.status_code == 500
+    assert mongo.document.count_documents({}) == 1
+
+    permissions(make_permissions(delete={"5"}))
+    r = rs.delete("/inventory/object/5")
+    assert r.status_code == 200, r.text
+    assert mongo.document.count_documents({}) == 0
+
+
+def test_copy_needs_create_permission_on_target(rs, mongo, minio, permissions):
+    mongo.document.insert_one(make_source_document())
+    url = "/copy_between_objects"
+    params = {"from_mo_id": 5, "to_mo_id": 6}
+
+    permissions(make_permissions(read={"5", "6"}, create={"5"}))
+    assert rs.post(url, params=params).status_code == 500
+
+    # the source documents are not readable
+    permissions(make_permissions(read={"6"}, create={"6"}))
+    r = rs.post(url, params=params)
+    assert r.status_code == 200, r.text
+    assert r.json() == []
+    minio.copy_object.assert_not_called()
+
+    permissions(make_permissions(read={"5", "6"}, create={"6"}))
+    r = rs.post(url, params=params)
+    assert r.status_code == 200, r.text
+    assert [d["externalIdentifier"] for d in r.json()] == [
+        [{"id": "6", "href": "http://inventory/object/6"}]
+    ]
+    minio.copy_object.assert_called_once()
+    assert mongo.document.count_documents({"externalIdentifier.id": "6"}) == 1
+
+
+def test_admin_copies_everything(rs, mongo, minio, permissions):
+    mongo.document.insert_one(make_source_document())
+    permissions(None)
+    r = rs.post(
+        "/copy_between_objects", params={"from_mo_id": 5, "to_mo_id": 6}
+    )
+    assert r.status_code == 200, r.text
+    assert len(r.json()) == 1
+
+
+@pytest.fixture()
+def local_time_zone(monkeypatch):
+    # a local time different from UTC
+    monkeypatch.setenv("TZ", "Etc/GMT-3")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_copy_dates_are_naive_local_time(
+    rs, mongo, minio, permissions, local_time_zone
+):
+    mongo.document.insert_one(make_source_document())
+    permissions(None)
+    before = datetime.now().replace(microsecond=0)
+    r = rs.post(
+        "/copy_between_objects", params={"from_mo_id": 5, "to_mo_id": 6}
+    )
+    assert r.status_code == 200, r.text
+    # stored like the defaults of Document, the filters compare to them
+    copy = mongo.document.find_one({"externalIdentifier.id": "6"})
+    assert copy["creationDate"].tzinfo is None
+    assert before <= copy["creationDate"] <= datetime.now()
+    assert copy["lastUpdate"] == copy["creationDate"]
+    r = rs.get(
+        "/document",
+        params={
+            "creationDate.gte": before.isoformat(),
+            "creationDate.lt": (before + timedelta(hours=1)).isoformat(),
+        },
+    )
+    assert r.status_code == 200, r.text
+    assert [d["id"] for d in r.json()] == [copy["id"]]
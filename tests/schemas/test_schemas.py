@@ -0,0 +1,58 @@
+import pytest
+from pydantic import ValidationError
+
+from schemas.document import Document
+
+
+def test_url_is_stored_as_string():
+    document = Document.model_validate(
+        {"name": "document", "href": "http://example.com"}
+    )
+    # a bare host gains a trailing "/"
+    assert document.href == "http://example.com/"
+    assert isinstance(document.href, str)
+
+
+def test_invalid_url_is_rejected():
+    with pytest.raises(ValidationError):
+        Document.model_validate({"name": "document", "href": "not a url"})
+
+
+def test_fields_are_read_by_alias_and_name():
+    by_alias = Document.model_validate(
+        {"name": "document", "externalIdentifier": [{"id": "1"}]}
+    )
+    by_name = Document.model_validate(
+        {"name": "document", "external_identifier": [{"id": "1"}]}
+    )
+    assert by_alias.external_identifier == by_name.external_identifier
+    dumped = by_name.model_dump(by_alias=True, exclude_none=True)
+    assert dumped["externalIdentifier"] == [{"id": "1"}]
+
+
+def test_numbers_are_accepted_for_strings():
+    document = Document.model_validate(
+        {"name": 5, "externalIdentifier": [{"id": 7}]}
+    )
+    assert document.name == "5"
+    assert document.external_identifier[0].id == "7"
+
+
+def test_status_default_is_stored_as_value():
+    document = Document.model_validate({"name": "document"})
+    assert document.model_dump(by_alias=True)["status"] == "created"
+
+
+def test_blob_namespace_is_not_an_id():
+    with pytest.raises(ValidationError):
+        Document.model_validate({"name": "document", "id": "blobs"})
+    # other IDs starting with the namespace are kept apart by the "/"
+    assert Document.model_validate({"name": "document", "id": "blob"}).id == (
+        "blob"
+    )
+
+
+def test_document_with_reserved_id_is_rejected(rs, mock_database):
+    mock_database.document.find_one.return_value = None
+    r = rs.post("/document", json={"name": "document", "id": "blobs"})
+    assert r.status_code == 422
@@ -0,0 +1,49 @@
+import asyncio
+
+from security.permissions_cache import (
+    PermissionsCache,
+    invalidate_permissions_cache,
+    permissions_cache,
+)
+from security.security_data_models import ObjectPermissions
+
+
+def make_permissions() -> ObjectPermissions:
+    return ObjectPermissions(
+        permissions=("documents.role",),
+        read=frozenset({"1"}),
+        create=frozenset(),
+        update=frozenset(),
+        delete=frozenset(),
+    )
+
+
+def test_cached_until_the_permissions_change(mongo):
+    cache = PermissionsCache(maxsize=10, version_ttl=60)
+    value = make_permissions()
+
+    async def check():
+        version = await cache.get_version()
+        cache.set("key", value, version)
+        assert cache.get("key", await cache.get_version()) is value
+        await invalidate_permissions_cache()
+        cache.clear()
+        assert cache.get("key", await cache.get_version()) is None
+
+    asyncio.run(check())
+
+
+def test_result_queried_during_a_change_is_stale(mongo):
+    value = make_permissions()
+
+    async def check():
+        # the version is read before the query, the change lands during it
+        version = await permissions_cache.get_version()
+        await invalidate_permissions_cache()
+        permissions_cache.set("key", value, version)
+        assert (
+            permissions_cache.get("key", await permissions_cache.get_version())
+            is None
+        )
+
+    asyncio.run(check())
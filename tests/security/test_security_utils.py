@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from security.permissions_cache import permissions_cache
+from security.security_config import ADMIN_ROLE
+from security.security_data_models import ClientRoles, UserData
+from security.security_utils import get_object_permissions
+
+
+@pytest.fixture(autouse=True)
+def clear_permissions_cache():
+    permissions_cache.clear()
+    yield
+    permissions_cache.clear()
+
+
+def make_user(*roles: str) -> UserData:
+    return UserData(
+        id="user",
+        audience=None,
+        name="user",
+        preferred_name="user",
+        realm_access=ClientRoles(name="realm", roles=list(roles)),
+        resource_access=None,
+        groups=None,
+    )
+
+
+def make_record(role: str, object_id: int, **actions: bool) -> dict:
+    return {
+        "permission": f"realm.__{role}",
+        "id": object_id,
+        "parent_id": object_id,
+        **actions,
+    }
+
+
+def test_admin_is_not_restricted(mongo):
+    user = make_user("viewer", ADMIN_ROLE)
+    assert asyncio.run(get_object_permissions(user)) is None
+
+
+def test_permitted_objects(mongo):
+    mongo.permissions.insert_many(
+        [
+            make_record("viewer", 5, read=True),
+            make_record("editor", 6, read=True, update=True, delete=True),
+            make_record("other", 7, read=True, create=True),
+        ]
+    )
+    permissions = asyncio.run(
+        get_object_permissions(make_user("viewer", "editor"))
+    )
+    assert permissions.permissions == ("realm.__editor", "realm.__viewer")
+    assert permissions.read == {"5", "6"}
+    assert permissions.update == {"6"}
+    assert permissions.delete == {"6"}
+    assert permissions.create == frozenset()
+
+
+def test_denied_action_is_denied_for_all_objects(mongo):
+    mongo.permissions.insert_many(
+        [
+            make_record("viewer", 5, read=True, update=True),
+            make_record("guest", 6, read=True, update=False),
+        ]
+    )
+    permissions = asyncio.run(
+        get_object_permissions(make_user("viewer", "guest"))
+    )
+    assert permissions.read == {"5", "6"}
+    assert permissions.update == frozenset()
+
+
+def test_user_without_permissions(mongo):
+    mongo.permissions.insert_one(make_record("other", 5, read=True))
+    permissions = asyncio.run(get_object_permissions(make_user("viewer")))
+    assert permissions.read == frozenset()
+    assert permissions.delete == frozenset()
@@ -0,0 +1,97 @@
+import io
+import zipfile
+import zlib
+from unittest.mock import MagicMock
+
+import pytest
+from minio import S3Error
+
+import settings
+from utils.archive import get_archive_files, iterate_archive
+
+
+class Response(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.headers = {
+            "content-length": str(len(data)),
+            "last-modified": "Mon, 01 Jan 2024 10:00:00 GMT",
+        }
+
+    def stream(self, amt: int):
+        while chunk := self.read(amt):
+            yield chunk
+
+    def release_conn(self):
+        pass
+
+
+def make_client(objects: dict[str, bytes]) -> MagicMock:
+    def get_object(bucket_name, object_name):
+        if object_name not in objects:
+            raise S3Error("NoSuchKey", "removed", None, None, None, None)
+        return Response(objects[object_name])
+
+    client = MagicMock()
+    client.get_object.side_effect = get_object
+    return client
+
+
+def build_archive(objects: dict[str, bytes], files) -> zipfile.ZipFile:
+    data = b"".join(iterate_archive(make_client(objects), files))
+    return zipfile.ZipFile(io.BytesIO(data))
+
+
+def test_archive_files_get_unique_names():
+    documents = [
+        {"id": "d1", "attachment": [{"id": "a1", "name": "a.pdf"}]},
+        {
+            "id": "d2",
+            "attachment": [
+                {"id": "a2", "name": "dir/a.pdf"},
+                {"id": "a3", "name": None},
+            ],
+        },
+        {"id": "d3"},
+    ]
+    assert get_archive_files(documents) == [
+        ("a.pdf", "d1/a1"),
+        ("a (2).pdf", "d2/a2"),
+        ("content", "d2/a3"),
+    ]
+
+
+def test_archive_holds_the_objects(monkeypatch):
+    monkeypatch.setattr(settings, "CONTENT_PROXY_CHUNK_SIZE", 1000)
+    objects = {"d1/a1": b"x" * 5000, "d2/a2": b"hello"}
+    archive = build_archive(
+        objects,
+        [("a.txt", "d1/a1"), ("gone.txt", "d9/a9"), ("b.txt", "d2/a2")],
+    )
+    assert archive.testzip() is None
+    # removed contents are skipped
+    assert archive.namelist() == ["a.txt", "b.txt"]
+    assert archive.read("a.txt") == objects["d1/a1"]
+    assert archive.getinfo("b.txt").date_time == (2024, 1, 1, 10, 0, 0)
+
+
+def test_empty_archive():
+    assert build_archive({}, []).namelist() == []
+
+
+def deflate(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize("level", [0, 1, 9])
+def test_compress_level_is_applied(monkeypatch, level):
+    monkeypatch.setattr(settings, "ARCHIVE_COMPRESS_LEVEL", level)
+    data = b"".join(b"line %d of the document\n" % i for i in range(20000))
+    info = build_archive({"d/a": data}, [("a.txt", "d/a")]).getinfo("a.txt")
+    if level == 0:
+        assert info.compress_type == zipfile.ZIP_STORED
+        assert info.compress_size == len(data)
+    else:
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert info.compress_size == len(deflate(data, level))
@@ -0,0 +1,52 @@
+import base64
+import binascii
+import os
+
+import pytest
+
+from utils.base64_stream import Base64Reader, get_decoded_length
+
+DATA = os.urandom(1000)
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 10, 1000])
+def test_decoded_length(size):
+    content = base64.b64encode(DATA[:size]).decode()
+    assert get_decoded_length(content) == size
+
+
+def test_decoded_length_rejects_bad_padding():
+    with pytest.raises(binascii.Error):
+        get_decoded_length("abc")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5, 7, 64, 999, 4096])
+def test_reads_by_parts(chunk_size):
+    reader = Base64Reader(base64.b64encode(DATA).decode())
+    parts = []
+    while part := reader.read(chunk_size):
+        assert len(part) <= chunk_size
+        parts.append(part)
+    assert b"".join(parts) == DATA
+    assert reader.read(chunk_size) == b""
+
+
+def test_reads_rest():
+    reader = Base64Reader(base64.b64encode(DATA).decode())
+    assert reader.read(5) == DATA[:5]
+    assert reader.read() == DATA[5:]
+    assert reader.read() == b""
+
+
+def test_decodes_only_requested_part():
+    content = base64.b64encode(DATA).decode()
+    reader = Base64Reader(content)
+    reader.read(10)
+    # 10 bytes are in the first 16 characters
+    assert reader._position == 16
+
+
+def test_invalid_characters_are_rejected():
+    reader = Base64Reader("ab!d" * 4)
+    with pytest.raises(binascii.Error):
+        reader.read(3)
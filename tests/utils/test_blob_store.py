@@ -0,0 +1,111 @@
+import hashlib
+from io import BytesIO
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils import blob_store
+from utils.blob_store import (
+    BLOB_REMOVING,
+    get_blob_object_name,
+    link_blobs,
+    store_blob,
+    unlink_blobs,
+)
+
+CONTENT = b"content"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+def store(client, object_name: str, content: bytes = CONTENT) -> str | None:
+    return store_blob(
+        client=client,
+        object_name=object_name,
+        open_data=lambda: BytesIO(content),
+        length=len(content),
+    )
+
+
+def get_refs(mongo) -> dict[str, int]:
+    return {blob["_id"]: blob["refs"] for blob in mongo.blobs.find()}
+
+
+def test_same_content_is_uploaded_once(mongo):
+    client = MagicMock()
+    assert store(client, "a/1") is None
+    assert store(client, "b/1") is None
+    assert client.put_object.call_count == 1
+    assert client.put_object.call_args.kwargs["object_name"] == (
+        get_blob_object_name(DIGEST)
+    )
+    assert get_refs(mongo) == {DIGEST: 2}
+
+    # a replaced content returns the previous blob, still referenced
+    assert store(client, "a/1", b"other") == DIGEST
+    assert client.put_object.call_count == 2
+    assert get_refs(mongo)[DIGEST] == 2
+
+
+def test_links_are_copied_with_references(mongo):
+    client = MagicMock()
+    store(client, "a/1")
+    linked = link_blobs([("a/1", "c/1"), ("a/1", "d/1"), ("plain/1", "e/1")])
+    assert linked == {"c/1", "d/1"}
+    assert get_refs(mongo) == {DIGEST: 3}
+    assert mongo.blob_links.find_one({"_id": "d/1"})["blob"] == DIGEST
+
+
+def test_last_release_removes_blob(mongo):
+    client = MagicMock()
+    store(client, "a/1")
+    store(client, "b/1")
+    assert unlink_blobs(client, ["a/1", "plain/1"]) == ["plain/1"]
+    assert get_refs(mongo) == {DIGEST: 1}
+    client.remove_object.assert_not_called()
+
+    unlink_blobs(client, ["b/1"])
+    assert get_refs(mongo) == {}
+    client.remove_object.assert_called_once()
+
+
+def test_store_waits_for_removal(mongo, monkeypatch):
+    client = MagicMock()
+    mongo.blobs.insert_one(
+        {"_id": DIGEST, "refs": 0, "stored": True, "state": BLOB_REMOVING}
+    )
+    # the removal ends while the store waits
+    monkeypatch.setattr(
+        blob_store.time, "sleep", lambda _: mongo.blobs.delete_many({})
+    )
+    store(client, "a/1")
+    # uploaded again, after the removal of the old object
+    client.put_object.assert_called_once()
+    assert mongo.blobs.find_one({"_id": DIGEST}) == {
+        "_id": DIGEST,
+        "refs": 1,
+        "size": len(CONTENT),
+        "stored": True,
+    }
+
+
+def test_failed_removal_keeps_blob_usable(mongo):
+    client = MagicMock()
+    store(client, "a/1")
+    client.remove_object.side_effect = OSError("unavailable")
+    with pytest.raises(OSError):
+        unlink_blobs(client, ["a/1"])
+    assert "state" not in mongo.blobs.find_one({"_id": DIGEST})
+
+    # the object was not removed, referencing the blob again is enough
+    store(client, "b/1")
+    assert client.put_object.call_count == 1
+    assert get_refs(mongo) == {DIGEST: 1}
+
+
+def test_failed_upload_drops_reference(mongo):
+    client = MagicMock()
+    client.put_object.side_effect = OSError("unavailable")
+    with pytest.raises(OSError):
+        store(client, "a/1")
+    assert get_refs(mongo) == {}
+    assert mongo.blob_links.count_documents({}) == 0
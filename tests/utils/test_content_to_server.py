@@ -0,0 +1,72 @@
+import base64
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+import settings
+from schemas.document import Document
+from tasks.remove_object_version import remove_object_latest_version
+from utils import content_to_server
+from utils.content_to_server import drop_old_content, replace_content_with_link
+
+
+@pytest.fixture()
+def minio(monkeypatch):
+    client = MagicMock()
+    client.list_objects.return_value = []
+    monkeypatch.setattr(content_to_server, "minio_client", lambda: client)
+    return client
+
+
+def make_document(document_id: str, *attachment_ids: str) -> Document:
+    return Document.model_validate(
+        {
+            "id": document_id,
+            "name": "document",
+            "attachment": [
+                {"id": attachment_id, "name": "file.txt"}
+                for attachment_id in attachment_ids
+            ],
+        }
+    )
+
+
+def test_dropped_document_lists_only_its_contents(mongo, minio):
+    drop_old_content(make_document("b", "1"))
+    # "b" alone would also list "blobs/..." and the other documents
+    assert minio.list_objects.call_args.kwargs["prefix"] == "b/"
+
+
+def test_failed_upload_removes_only_uploaded_versions(minio, monkeypatch):
+    monkeypatch.setattr(settings, "BLOB_DEDUPLICATION", False)
+    monkeypatch.setattr(settings, "MINIO_UPLOAD_CONCURRENCY", 1)
+    document = make_document("a", "1", "2")
+    for attachment in document.attachment:
+        attachment.content = base64.b64encode(b"content").decode()
+        attachment.mime_type = "text/plain"
+    minio.put_object.side_effect = [
+        SimpleNamespace(version_id="new"),
+        OSError("unavailable"),
+    ]
+    with pytest.raises(HTTPException):
+        replace_content_with_link(document, "http://testserver/")
+    # a delete marker would hide the replaced content
+    minio.remove_object.assert_called_once_with(
+        bucket_name=settings.MINIO_BUCKET, object_name="a/1", version_id="new"
+    )
+
+
+def test_latest_version_of_exact_name_is_removed():
+    client = MagicMock()
+    client.list_objects.return_value = [
+        SimpleNamespace(
+            object_name="a/10",
+            is_latest=True,
+            is_delete_marker=False,
+            version_id="other",
+        ),
+    ]
+    remove_object_latest_version("a", "1", client)
+    client.remove_object.assert_not_called()
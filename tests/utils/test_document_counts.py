@@ -0,0 +1,146 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from schemas.document import Document
+from utils.document_counts import (
+    SEQUENCE_ID,
+    counts_write,
+    get_sequence_state,
+    prune_document_counts,
+    rebuild_document_counts,
+    set_count,
+    update_document_counts,
+    write_counts,
+)
+
+
+def make_document(mo_id: str, status: str = "created") -> Document:
+    return Document.model_validate(
+        {
+            "name": "document",
+            "status": status,
+            "externalIdentifier": [{"id": mo_id}],
+        }
+    )
+
+
+def insert(mongo, *documents: Document):
+    mongo.document.insert_many(
+        [document.model_dump(by_alias=True) for document in documents]
+    )
+
+
+def get_counts(mongo) -> dict[str, int]:
+    return {c["_id"]: c["count"] for c in mongo.document_counts.find()}
+
+
+def test_counts_follow_writes(mongo):
+    documents = [make_document("1"), make_document("1"), make_document("2")]
+    insert(mongo, *documents)
+    asyncio.run(update_document_counts(new_documents=documents))
+    assert get_counts(mongo) == {"1": 2, "2": 1}
+
+    mongo.document.delete_many({"id": documents[0].id})
+    asyncio.run(update_document_counts(old_documents=documents[:1]))
+    assert get_counts(mongo) == {"1": 1, "2": 1}
+
+    mongo.document.delete_many({})
+    asyncio.run(update_document_counts(old_documents=documents[1:]))
+    # zeros are kept for the incremental requests
+    assert get_counts(mongo) == {"1": 0, "2": 0}
+
+
+def test_counts_are_recounted_not_incremented(mongo):
+    documents = [make_document("1"), make_document("1")]
+    insert(mongo, *documents)
+    # the counter drifted, the next write fixes it
+    mongo.document_counts.insert_one({"_id": "1", "count": 7, "sequence": 0})
+    asyncio.run(update_document_counts(new_documents=documents[:1]))
+    assert get_counts(mongo) == {"1": 2}
+
+
+def test_older_count_does_not_replace_newer(mongo):
+    asyncio.run(write_counts([set_count("1", 3, sequence=5)]))
+    asyncio.run(write_counts([set_count("1", 1, sequence=4)]))
+    assert mongo.document_counts.find_one({"_id": "1"})["count"] == 3
+    assert mongo.document_counts.find_one({"_id": "1"})["sequence"] == 5
+
+
+def test_watermark_excludes_writes_in_progress(mongo):
+    async def check():
+        async with counts_write() as first:
+            async with counts_write() as second:
+                pass
+            # the second write is done, but the first is not
+            stable, _ = await get_sequence_state()
+            assert stable < first < second
+        stable, _ = await get_sequence_state()
+        assert stable == second
+
+    asyncio.run(check())
+    assert mongo.count_writers.count_documents({}) == 0
+
+
+def test_watermark_recovers_from_stopped_writer(mongo):
+    now = datetime.now(timezone.utc)
+    # a process stopped inside counts_write
+    mongo.sequences.insert_one({"_id": SEQUENCE_ID, "value": 5, "stable": 4})
+    mongo.count_writers.insert_one(
+        {"sequence": 5, "expires": now + timedelta(minutes=1)}
+    )
+    assert asyncio.run(get_sequence_state())[0] == 4
+
+    async def write():
+        async with counts_write() as sequence:
+            return sequence
+
+    # newer writes are not visible while the lease lives
+    assert asyncio.run(write()) == 6
+    assert asyncio.run(get_sequence_state())[0] == 4
+
+    mongo.count_writers.update_one(
+        {"sequence": 5}, {"$set": {"expires": now - timedelta(seconds=1)}}
+    )
+    assert asyncio.run(get_sequence_state())[0] == 6
+
+
+def test_watermark_waits_for_writer_taking_it(mongo):
+    mongo.sequences.insert_one({"_id": SEQUENCE_ID, "value": 5, "stable": 3})
+    # leased, the watermark is not stored yet
+    mongo.count_writers.insert_one(
+        {"expires": datetime.now(timezone.utc) + timedelta(minutes=1)}
+    )
+    assert asyncio.run(get_sequence_state())[0] == 3
+
+
+def test_rebuild_removes_stale_counters(mongo):
+    insert(
+        mongo,
+        make_document("1"),
+        make_document("1"),
+        make_document("2", "deleted"),
+    )
+    mongo.document_counts.insert_many(
+        [
+            {"_id": "1", "count": 5, "sequence": 0},
+            {"_id": "3", "count": 1, "sequence": 0},
+        ]
+    )
+    asyncio.run(rebuild_document_counts())
+    assert get_counts(mongo) == {"1": 2}
+    stable, rebuilt = asyncio.run(get_sequence_state())
+    assert rebuilt == stable
+
+
+def test_prune_removes_zeros_and_forces_full_map(mongo):
+    document = make_document("1")
+    insert(mongo, document)
+    asyncio.run(update_document_counts(new_documents=[document]))
+    mongo.document.delete_many({})
+    asyncio.run(update_document_counts(old_documents=[document]))
+    assert get_counts(mongo) == {"1": 0}
+
+    asyncio.run(prune_document_counts())
+    assert get_counts(mongo) == {}
+    stable, rebuilt = asyncio.run(get_sequence_state())
+    assert rebuilt == stable > 0
@@ -0,0 +1,112 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import settings
+from kafka import kafka_document_pb2
+from kafka.consumer import kafka_producer
+from kafka.consumer.kafka_producer import (
+    DisabledDocumentsKafkaProducer,
+    DocumentsKafkaProducer,
+    get_documents_kafka_producer_factory_method,
+)
+from utils.kafka import delivery_report, send_to_kafka
+
+
+@pytest.fixture()
+def producer_class():
+    with patch.object(kafka_producer, "Producer") as producer_class:
+        producer = producer_class.return_value
+        producer.poll.side_effect = lambda timeout: time.sleep(0.001)
+        producer.flush.return_value = 0
+        yield producer_class
+
+
+def test_poll_thread_starts_on_first_message(producer_class):
+    documents_producer = DocumentsKafkaProducer(kafka_topic="topic")
+    producer_class.assert_not_called()
+    assert documents_producer._poll_thread is None
+
+    documents_producer.send_created_attachments_by_mo_ids([1, 2])
+    documents_producer.send_deleted_attachments_by_mo_ids([3])
+    producer_class.assert_called_once()
+    assert documents_producer._poll_thread.is_alive()
+    assert producer_class.return_value.produce.call_count == 2
+    documents_producer.close()
+
+
+def test_close_stops_polling_and_flushes(producer_class):
+    documents_producer = DocumentsKafkaProducer(kafka_topic="topic")
+    documents_producer.send_created_attachments_by_mo_ids([1])
+    poll_thread = documents_producer._poll_thread
+
+    documents_producer.close()
+    assert not poll_thread.is_alive()
+    producer_class.return_value.flush.assert_called_once_with(
+        settings.KAFKA_PRODUCER_FLUSH_TIMEOUT
+    )
+    assert documents_producer._producer is None
+    # closing again does nothing, the next message starts a new producer
+    documents_producer.close()
+    producer_class.return_value.flush.assert_called_once()
+    documents_producer.send_created_attachments_by_mo_ids([1])
+    assert producer_class.call_count == 2
+    documents_producer.close()
+
+
+def test_full_queue_is_polled_and_retried():
+    producer = MagicMock()
+    producer.produce.side_effect = [BufferError(), None]
+    send_to_kafka(
+        data=kafka_document_pb2.Document(mo_id=[1]),
+        topic="topic",
+        key="CREATED",
+        producer=producer,
+    )
+    producer.poll.assert_called_once_with(settings.KAFKA_PRODUCER_POLL_TIMEOUT)
+    assert producer.produce.call_count == 2
+    assert producer.produce.call_args.kwargs == {
+        "topic": "topic",
+        "key": "CREATED",
+        "value": kafka_document_pb2.Document(mo_id=[1]).SerializeToString(),
+        "on_delivery": delivery_report,
+    }
+
+
+def test_producer_is_created_once(monkeypatch):
+    monkeypatch.setattr(kafka_producer, "KAFKA_TURN_ON", True)
+    monkeypatch.setattr(kafka_producer, "_instance", None)
+    created = MagicMock()
+
+    def create(kafka_topic):
+        # widens the window between the check and the assignment
+        time.sleep(0.05)
+        return created
+
+    producer_class = MagicMock(side_effect=create)
+    monkeypatch.setattr(
+        kafka_producer, "DocumentsKafkaProducer", producer_class
+    )
+    barrier = threading.Barrier(8)
+
+    def get_producer():
+        barrier.wait()
+        return get_documents_kafka_producer_factory_method()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        producers = list(executor.map(lambda _: get_producer(), range(8)))
+    producer_class.assert_called_once()
+    assert all(p is created for p in producers)
+
+
+def test_disabled_producer(monkeypatch):
+    monkeypatch.setattr(kafka_producer, "KAFKA_TURN_ON", False)
+    monkeypatch.setattr(kafka_producer, "_instance", None)
+    assert isinstance(
+        get_documents_kafka_producer_factory_method(),
+        DisabledDocumentsKafkaProducer,
+    )
+    assert kafka_producer._instance is None
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from utils.pagination import (
+    KEYSET_SORT,
+    InvalidCursor,
+    add_keyset_filter,
+    decode_cursor,
+    encode_cursor,
+)
+
+DOCUMENTS = [
+    {"id": "b", "creationDate": None},
+    {"id": "a", "creationDate": None},
+    {"id": "d", "creationDate": datetime(2024, 1, 2)},
+    {"id": "c", "creationDate": datetime(2024, 1, 2)},
+    {"id": "e", "creationDate": datetime(2024, 1, 1)},
+]
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        {"id": "1", "creationDate": datetime(2024, 1, 2, 3, 4, 5, 6)},
+        {"id": "2", "creationDate": None},
+    ],
+)
+def test_cursor_round_trip(document):
+    cursor = encode_cursor(document)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == document
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "e30"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_pages_follow_keyset_order(mongo):
+    mongo.document.insert_many([dict(document) for document in DOCUMENTS])
+    ids = []
+    cursor = None
+    while True:
+        filters = {"name": {"$exists": False}}
+        if cursor is not None:
+            filters = add_keyset_filter(filters, decode_cursor(cursor))
+        page = list(mongo.document.find(filters).sort(KEYSET_SORT).limit(2))
+        if not page:
+            break
+        ids.extend(document["id"] for document in page)
+        cursor = encode_cursor(page[-1])
+    # missing dates first, equal dates by ID
+    assert ids == ["a", "b", "e", "c", "d"]
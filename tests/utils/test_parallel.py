@@ -0,0 +1,69 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import file_server
+from file_server import MINIO_POOL_SIZE, MinioClient
+from utils.parallel import run_in_parallel
+
+
+def test_results_by_index_and_progress():
+    progress = []
+    results, error = run_in_parallel(
+        [lambda i=i: i * 10 for i in range(5)],
+        max_workers=3,
+        on_progress=lambda done, total: progress.append((done, total)),
+    )
+    assert error is None
+    assert results == {0: 0, 1: 10, 2: 20, 3: 30, 4: 40}
+    assert progress == [(done, 5) for done in range(1, 6)]
+
+
+def test_first_error_cancels_pending_tasks():
+    started = []
+
+    def fail():
+        started.append("fail")
+        raise ValueError("failed")
+
+    def task(index):
+        started.append(index)
+        time.sleep(0.01)
+        return index
+
+    tasks = [lambda i=i: task(i) for i in range(20)]
+    tasks[1] = fail
+    # one worker: the tasks queued when the failure is seen are cancelled
+    results, error = run_in_parallel(tasks, max_workers=1)
+    assert isinstance(error, ValueError)
+    assert started[:2] == [0, "fail"]
+    assert len(started) < len(tasks)
+    # completed tasks are returned to be rolled back by the caller
+    assert set(results) == set(started) - {"fail"}
+
+
+def test_no_tasks():
+    assert run_in_parallel([], max_workers=4) == ({}, None)
+
+
+def test_minio_client_is_created_once():
+    barrier = threading.Barrier(8)
+    client = MinioClient(
+        url="minio:9000",
+        user="user",
+        password="password",  # noqa: S106
+    )
+
+    def get_client():
+        barrier.wait()
+        return client()
+
+    with patch.object(file_server, "Minio") as minio:
+        minio.return_value = MagicMock()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(executor.map(lambda _: get_client(), range(8)))
+    minio.assert_called_once()
+    assert all(c is minio.return_value for c in clients)
+    http_client = minio.call_args.kwargs["http_client"]
+    assert http_client.connection_pool_kw["maxsize"] == MINIO_POOL_SIZE
@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from schemas.document import ChangeDocument
+from schemas.document_specification import ChangeDocumentSpecification
+from utils.formatter import MongoFormatter
+from utils.parser import Parser
+
+NOT_DELETED = {"status": {"$ne": "deleted"}}
+
+
+@pytest.fixture()
+def parser() -> Parser:
+    return Parser(MongoFormatter(ChangeDocument), ChangeDocument)
+
+
+def test_filters_are_combined(parser):
+    assert parser.parse("name=a")["filters"] == {
+        "$and": [{"name": "a"}, NOT_DELETED]
+    }
+    assert parser.parse("name=a,b&status=created")["filters"] == {
+        "$and": [{"name": {"$in": ["a", "b"]}}, {"status": "created"}]
+    }
+    assert parser.parse("name=a;name<>b")["filters"] == {
+        "$and": [{"$or": [{"name": "a"}, {"name": {"$ne": "b"}}]}, NOT_DELETED]
+    }
+
+
+def test_controls_are_taken_out(parser):
+    result = parser.parse("limit=5&name=a&offset=2&fields=name")
+    assert result["limit"] == 5
+    assert result["offset"] == 2
+    assert result["fields"] == ["id", "href", "name"]
+    assert result["filters"] == {"$and": [{"name": "a"}, NOT_DELETED]}
+    assert parser.parse("limit=5")["filtered"] is False
+
+
+def test_cached_result_is_not_shared(parser):
+    first = parser.parse("name=a")
+    first["filters"]["$and"].append({"changed": True})
+    assert parser.parse("name=a")["filters"] == {
+        "$and": [{"name": "a"}, NOT_DELETED]
+    }
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("lastUpdate.lt=2024-01-02", datetime(2024, 1, 2)),
+        ("lastUpdate.lt=2024-01-02T10:30:00", datetime(2024, 1, 2, 10, 30)),
+    ],
+)
+def test_dates_are_coerced(parser, query, expected):
+    condition = parser.parse(query)["filters"]["$and"][0]
+    assert condition == {"lastUpdate": {"$lt": expected}}
+
+
+def test_time_zone_is_converted_to_naive_local_time(parser):
+    condition = parser.parse("creationDate>=2024-01-02T10:00:00+03:00")[
+        "filters"
+    ]["$and"][0]
+    value = condition["creationDate"]["$gte"]
+    expected = datetime(2024, 1, 2, 7, tzinfo=timezone.utc).astimezone()
+    assert value.tzinfo is None
+    assert value == expected.replace(tzinfo=None)
+
+
+@pytest.mark.parametrize(
+    "query", ["lastUpdate.lt=2024", "creationDate>1700000000", "lastUpdate=x"]
+)
+def test_numbers_are_not_dates(parser, query):
+    with pytest.raises(ValueError):
+        parser.parse(query)
+
+
+def test_regex_is_not_coerced(parser):
+    condition = parser.parse("lastUpdate=~2024")["filters"]["$and"][0]
+    assert condition == {"lastUpdate": {"$regex": "2024"}}
+
+
+def test_bool_and_nested_int_are_coerced():
+    parser = Parser(
+        MongoFormatter(ChangeDocumentSpecification),
+        ChangeDocumentSpecification,
+    )
+    filters = parser.parse(
+        "isBundle=true&specCharacteristic.maxCardinality.gt=3"
+    )["filters"]
+    assert filters == {
+        "$and": [
+            {"isBundle": True},
+            {"specCharacteristic.maxCardinality": {"$gt": 3}},
+            NOT_DELETED,
+        ]
+    }
+
+
+def test_invalid_date_is_rejected_with_422(rs):
+    r = rs.get("/document", params={"lastUpdate.lt": "2024"})
+    assert r.status_code == 422
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from security.permissions_cache import (
+    invalidate_permissions_cache,
+    permissions_cache,
+)
+from utils.presigned_urls import (
+    MAX_EXPIRES,
+    PresignedUrlCache,
+    stamp_content_version,
+)
+
+KEY = ("a", "1")
+
+
+@pytest.fixture()
+def cache(mongo):
+    permissions_cache.clear()
+    mongo.document.insert_many([{"id": "a"}, {"id": "b"}])
+    yield PresignedUrlCache(maxsize=10, window=60)
+    permissions_cache.clear()
+
+
+def get_version(cache: PresignedUrlCache, document_id: str = "a"):
+    return asyncio.run(cache.get_versions([document_id])).get(document_id)
+
+
+def test_cached_until_document_changes(cache, mongo):
+    cache.set(KEY, "url-a", get_version(cache))
+    cache.set(("b", "1"), "url-b", get_version(cache, "b"))
+    assert cache.get(KEY, get_version(cache)) == "url-a"
+
+    # replaced by any process
+    document = mongo.document.find_one({"id": "a"})
+    mongo.document.replace_one({"id": "a"}, stamp_content_version(document))
+    assert cache.get(KEY, get_version(cache)) is None
+    # the other documents keep their URLs
+    assert cache.get(("b", "1"), get_version(cache, "b")) == "url-b"
+
+
+def test_recreated_document_drops_urls(cache, mongo):
+    cache.set(KEY, "url-a", get_version(cache))
+    mongo.document.delete_many({"id": "a"})
+    assert get_version(cache) is None
+    assert cache.get(KEY, get_version(cache)) is None
+
+    mongo.document.insert_one({"id": "a"})
+    assert cache.get(KEY, get_version(cache)) is None
+
+
+def test_permission_changes_drop_urls(cache):
+    cache.set(KEY, "url-a", get_version(cache))
+    asyncio.run(invalidate_permissions_cache())
+    permissions_cache.clear()
+    assert cache.get(KEY, get_version(cache)) is None
+
+
+def test_url_lives_for_lifetime_until_window_end(cache):
+    lifetime = timedelta(minutes=15)
+    request_date, expires = cache.get_signing(lifetime)
+    window_end = request_date + timedelta(seconds=cache.window)
+    assert request_date <= datetime.now(timezone.utc) < window_end
+    assert request_date + expires >= window_end + lifetime
+
+
+def test_lifetime_near_limit_is_not_cached(cache):
+    lifetime = MAX_EXPIRES - timedelta(seconds=30)
+    assert cache.get_signing(lifetime) == (None, lifetime)
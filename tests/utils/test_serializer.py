@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import orjson
+import pytest
+from pydantic import TypeAdapter
+
+from schemas.document import ResponseDocument
+from utils.presigned_urls import stamp_content_version
+from utils.serializer import TrustedSerializer
+
+documents_adapter = TypeAdapter(list[ResponseDocument])
+
+
+@pytest.fixture()
+def stored_documents(mongo) -> list[dict]:
+    document = ResponseDocument(
+        id="doc",
+        href="http://documents/document/doc",
+        name="doc",
+        description="description",
+        status="created",
+        version="1",
+        creationDate=datetime(2024, 1, 2, 10, 30, 15, 123456),
+        lastUpdate=datetime(2024, 1, 3),
+        **{"@type": "Document", "@schemaLocation": "http://schemas/document"},
+        externalIdentifier=[
+            {
+                "id": "5",
+                "href": "http://inventory/object/5",
+                "externalIdentifierType": "object",
+                "@type": "ExternalIdentifier",
+            }
+        ],
+        attachment=[
+            {
+                "id": "file",
+                "name": "file.txt",
+                "url": "http://documents/content/doc/file",
+                "mimeType": "text/plain",
+                "attachmentType": "text",
+                "size": {"amount": 10.0, "units": "bytes"},
+                "validFor": {"startDateTime": datetime(2024, 1, 1)},
+            },
+            {"id": "empty"},
+        ],
+        characteristic=[
+            {"name": "pages", "value": 3, "valueType": "integer"},
+            {"name": "tags", "value": ["a", "b"]},
+        ],
+    )
+    sparse = ResponseDocument(
+        id="sparse",
+        name="sparse",
+        creationDate=datetime(2024, 1, 2),
+        lastUpdate=datetime(2024, 1, 2),
+    )
+    # stored as by the routers, with the hidden fields added on write
+    mongo.document.insert_many(
+        [
+            stamp_content_version(
+                d.model_dump(exclude_none=True, by_alias=True)
+            )
+            for d in (document, sparse)
+        ]
+    )
+    return list(mongo.document.find())
+
+
+@pytest.mark.parametrize("exclude_none", [True, False])
+def test_output_matches_response_model(stored_documents, exclude_none):
+    assert all("_id" in d and "_contentVersion" in d for d in stored_documents)
+    # byte for byte the JSON of the response model used before
+    expected = documents_adapter.dump_json(
+        documents_adapter.validate_python(stored_documents),
+        by_alias=True,
+        exclude_none=exclude_none,
+    )
+    serializer = TrustedSerializer(ResponseDocument, exclude_none=exclude_none)
+    result = serializer.dumps_many(stored_documents)
+    assert result == expected
+
+    document = orjson.loads(result)[0]
+    assert "_id" not in document
+    assert "_contentVersion" not in document
+    assert document["creationDate"] == "2024-01-02T10:30:15.123000"
+    assert document["attachment"][0]["validFor"]["startDateTime"] == (
+        "2024-01-01T00:00:00"
+    )
+    assert document["externalIdentifier"][0]["@type"] == "ExternalIdentifier"
+
+
+def test_single_document_matches_response_model(stored_documents):
+    expected = ResponseDocument.model_validate(stored_documents[0])
+    result = TrustedSerializer(ResponseDocument).dumps(stored_documents[0])
+    assert orjson.loads(result) == orjson.loads(
+        expected.model_dump_json(by_alias=True)
+    )
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+import settings
+from database import async_db
+from security.security_data_models import ObjectPermissions
+from utils import total_count
+from utils.total_count import CountMode, get_total_count
+
+CREATED = {"status": {"$ne": "deleted"}}
+
+
+@pytest.fixture()
+def documents(mongo):
+    if total_count._counts is not None:
+        total_count._counts.clear()
+    mongo.document.insert_many(
+        [
+            {"id": "1", "status": "created"},
+            {"id": "2", "status": "created"},
+            {"id": "3", "status": "deleted"},
+        ]
+    )
+    yield mongo.document
+    if total_count._counts is not None:
+        total_count._counts.clear()
+
+
+def count(filters: dict, **kwargs) -> int | None:
+    return asyncio.run(get_total_count(async_db.document, filters, **kwargs))
+
+
+def test_none_is_not_counted(documents):
+    assert count(CREATED, mode=CountMode.NONE) is None
+
+
+def test_exact_is_cached_per_filter(documents, monkeypatch):
+    monkeypatch.setattr(settings, "TOTAL_COUNT_DEFAULT_MODE", "exact")
+    assert count(CREATED) == 2
+    documents.insert_one({"id": "4", "status": "created"})
+    if total_count._counts is not None:
+        # counted again after TOTAL_COUNT_CACHE_TTL
+        assert count(CREATED) == 2
+    assert count({"status": "created"}, mode=CountMode.EXACT) == 3
+
+
+def test_estimated_uses_collection_metadata(documents):
+    # deleted documents included
+    assert count(CREATED, mode=CountMode.ESTIMATED, filtered=False) == 3
+    # a filter of the user is counted exactly
+    assert count(CREATED, mode=CountMode.ESTIMATED, filtered=True) == 2
+
+
+def test_permissions_are_counted_per_scope(documents):
+    documents.update_one(
+        {"id": "1"}, {"$set": {"externalIdentifier": [{"id": "5"}]}}
+    )
+    documents.update_one(
+        {"id": "2"}, {"$set": {"externalIdentifier": [{"id": "6"}]}}
+    )
+
+    def permissions(name: str, *read: str) -> ObjectPermissions:
+        return ObjectPermissions(
+            permissions=(name,),
+            read=frozenset(read),
+            create=frozenset(),
+            update=frozenset(),
+            delete=frozenset(),
+        )
+
+    # the permissions filter the request, the estimate is not used
+    assert (
+        count(
+            CREATED,
+            mode=CountMode.ESTIMATED,
+            filtered=False,
+            object_permissions=permissions("a", "5"),
+        )
+        == 1
+    )
+    assert (
+        count(
+            CREATED,
+            mode=CountMode.EXACT,
+            object_permissions=permissions("b", "5", "6"),
+        )
+        == 2
+    )